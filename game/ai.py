@@ -0,0 +1,167 @@
+"""
+A depth-limited expectimax player.
+
+The search runs on packed 4x4 bitboards: player nodes try every legal
+``Direction`` and chance nodes spawn a 2 (90%) or a 4 (10%) on each empty
+cell, the same odds ``GameBoard.sprinkle`` uses.
+"""
+
+from collections import OrderedDict
+from typing import Callable
+
+from game.bitboard import BitBoard, ROW_CHANGED, mash_cells, zero_nibbles
+from game.board import SPAWN_VALUES, Direction, GameBoard, GameError, GameOverError, value_to_exponent
+
+Evaluator = Callable[[int], float]
+
+SPAWN_ODDS = tuple((value_to_exponent(value), odds) for (value, odds) in SPAWN_VALUES)
+
+GAME_OVER_VALUE = 0.0
+
+
+def empty_cell_heuristic(cells: int) -> float:
+    """
+    Score a position by its number of empty cells; more room is better.
+    """
+    return 1.0 + zero_nibbles(cells).bit_count()
+
+
+class TranspositionTable:
+    """
+    A bounded map from (cells, depth) to a searched value.
+
+    When full, the least recently used entry is evicted. ``hits`` and
+    ``misses`` count lookups so callers can see how well it is working.
+    """
+
+    def __init__(self, capacity: int = 200_000):
+        GameError.require_condition(capacity > 0, "Transposition table capacity must be positive")
+        self.capacity = capacity
+        self.entries: OrderedDict[tuple[int, int], float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple[int, int]) -> float | None:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple[int, int], value: float):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class Expectimax:
+    """
+    Pick moves by searching ``depth`` player moves ahead.
+
+    Chance nodes whose probability of being reached falls below
+    ``min_probability`` are not expanded; they are scored with ``evaluate``
+    instead. The transposition table is kept between decisions, since the
+    positions searched for one move come up again for the next. Pass
+    ``table`` to search with a table of your own, such as a
+    ``game.parallel.SharedTranspositionTable``, instead of a new one with
+    ``cache_size`` entries.
+    """
+
+    def __init__(
+        self,
+        depth: int = 3,
+        min_probability: float = 0.005,
+        cache_size: int = 200_000,
+        evaluate: Evaluator = empty_cell_heuristic,
+        table: TranspositionTable | None = None,
+    ):
+        GameError.require_condition(depth >= 1, "Search depth must be at least 1")
+        self.depth = depth
+        self.min_probability = min_probability
+        self.evaluate = evaluate
+        self.table = TranspositionTable(cache_size) if table is None else table
+        self.nodes = 0
+
+    def move_values(self, board: GameBoard | BitBoard) -> dict[Direction, float]:
+        """
+        Return the expected value of each legal move from ``board``.
+        """
+        bits = board if isinstance(board, BitBoard) else BitBoard.from_game_board(board)
+        values = {}
+        for direction in Direction:
+            try:
+                (cells, _, flag) = mash_cells(bits.cells, direction)
+            except GameError:
+                continue
+            if flag & ROW_CHANGED:
+                values[direction] = self._chance_node(cells, self.depth - 1, 1.0)
+        return values
+
+    def best_move(self, board: GameBoard | BitBoard) -> Direction:
+        values = self.move_values(board)
+        GameOverError.require_condition(len(values) > 0, "Game Over! (No moves left)")
+        return max(values, key=values.__getitem__)
+
+    def _max_node(self, cells: int, depth: int, probability: float) -> float:
+        if depth == 0 or probability < self.min_probability:
+            return self.evaluate(cells)
+
+        key = (cells, depth)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        best = GAME_OVER_VALUE
+        for direction in Direction:
+            try:
+                (after, _, flag) = mash_cells(cells, direction)
+            except GameError:
+                continue
+            if flag & ROW_CHANGED:
+                value = self._chance_node(after, depth - 1, probability)
+                if value > best:
+                    best = value
+
+        self.table.put(key, best)
+        return best
+
+    def _chance_node(self, cells: int, depth: int, probability: float) -> float:
+        self.nodes += 1
+        empties = zero_nibbles(cells)
+        count = empties.bit_count()
+        if count == 0:
+            return self.evaluate(cells)
+
+        total = 0.0
+        while empties:
+            low = empties & -empties
+            empties ^= low
+            for (exponent, odds) in SPAWN_ODDS:
+                total += odds * self._max_node(cells | (exponent * low), depth, probability * odds / count)
+        return total / count
+
+
+def best_move(board: GameBoard, depth: int = 3) -> Direction:
+    """
+    Search ``board`` with a fresh ``Expectimax`` and return the best move.
+    """
+    return Expectimax(depth=depth).best_move(board)
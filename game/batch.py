@@ -0,0 +1,226 @@
+"""
+A vectorized engine that steps many boards of the same size at once.
+
+Boards are stored as an ``(N, size, size)`` array of tile exponents, where 0 is
+an empty cell and ``k`` is a tile with value ``2 ** k``.
+"""
+
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from game.bitboard import SPAWN_HIGH_EXPONENT, SPAWN_LOW_EXPONENT
+from game.board import SPAWN_LOW_ODDS, Direction, GameBoard, GameError, decode_grid, value_to_exponent
+
+EXPONENT_DTYPE = np.uint8
+
+DIRECTION_CODES = {direction: code for (code, direction) in enumerate(Direction)}
+
+
+def direction_codes(directions: Direction | Sequence[Direction] | np.ndarray, count: int) -> np.ndarray:
+    if isinstance(directions, Direction):
+        return np.full(count, DIRECTION_CODES[directions], dtype=np.int8)
+    if isinstance(directions, np.ndarray):
+        codes = directions.astype(np.int8, copy=False)
+    else:
+        codes = np.fromiter((DIRECTION_CODES[d] for d in directions), dtype=np.int8, count=len(directions))
+    GameError.require_condition(
+        codes.shape == (count,),
+        f"Expected {count} directions, got {len(codes)}",
+    )
+    return codes
+
+
+def orient(exponents: np.ndarray, direction: Direction) -> np.ndarray:
+    """
+    Return a view of the boards in which ``direction`` mashes each row toward column 0.
+
+    Writing into the view writes into the boards in their original orientation.
+    """
+    if direction is Direction.WEST:
+        return exponents
+    if direction is Direction.EAST:
+        return exponents[:, :, ::-1]
+    if direction is Direction.NORTH:
+        return exponents.transpose(0, 2, 1)
+    return exponents.transpose(0, 2, 1)[:, :, ::-1]
+
+
+def compact_rows(rows: np.ndarray) -> np.ndarray:
+    order = np.argsort(rows == 0, axis=1, kind="stable")
+    return np.take_along_axis(rows, order, axis=1)
+
+
+def mash_rows(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mash every row of an ``(M, n)`` exponent array toward column 0.
+
+    This slides tiles together, merges equal neighbors from left to right the
+    way ``Slice.mash`` does, and slides them together again. Returns the
+    mashed rows and the score gained by each row.
+    """
+    rows = compact_rows(rows)
+    scores = np.zeros(len(rows), dtype=np.int64)
+    for j in range(rows.shape[1] - 1):
+        left = rows[:, j]
+        right = rows[:, j + 1]
+        merge = (left != 0) & (left == right)
+        left[merge] += 1
+        right[merge] = 0
+        scores += np.where(merge, np.left_shift(1, left, dtype=np.int64), 0)
+    return (compact_rows(rows), scores)
+
+
+class BatchBoard:
+    """
+    N boards of one size that move, spawn and end together.
+
+    Every method works on all the boards in one set of array operations, so
+    the cost per board falls as N grows.
+    """
+
+    def __init__(self, exponents: np.ndarray, scores: np.ndarray | None = None):
+        GameError.require_condition(
+            exponents.ndim == 3 and exponents.shape[1] == exponents.shape[2],
+            "Boards must be an (N, size, size) array",
+        )
+        self.exponents = exponents.astype(EXPONENT_DTYPE, copy=False)
+        self.scores = np.zeros(len(exponents), dtype=np.int64) if scores is None else scores.astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.exponents)
+
+    @property
+    def size(self) -> int:
+        return self.exponents.shape[1]
+
+    @classmethod
+    def empty(cls, count: int, size: int) -> "BatchBoard":
+        return cls(np.zeros((count, size, size), dtype=EXPONENT_DTYPE))
+
+    @classmethod
+    def from_game_boards(cls, boards: Iterable[GameBoard]) -> "BatchBoard":
+        boards = list(boards)
+        GameError.require_condition(len(boards) > 0, "Need at least one board")
+        size = boards[0].size
+        GameError.require_condition(
+            all(b.size == size for b in boards),
+            "All boards in a batch must be the same size",
+        )
+        exponents = np.zeros((len(boards), size, size), dtype=EXPONENT_DTYPE)
+        for (n, board) in enumerate(boards):
+            for tile in board.grid:
+                if tile.value is not None:
+                    exponents[n, tile.pos.row, tile.pos.col] = value_to_exponent(tile.value)
+        return cls(exponents, np.array([b.score for b in boards], dtype=np.int64))
+
+    def to_game_board(self, index: int) -> GameBoard:
+        grid = decode_grid(self.exponents[index].ravel().tolist(), self.size)
+        return GameBoard(size=self.size, grid=grid, score=int(self.scores[index]))
+
+    def to_game_boards(self) -> list[GameBoard]:
+        return [self.to_game_board(n) for n in range(len(self))]
+
+    def mash(self, directions: Direction | Sequence[Direction] | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Mash each board in its own direction.
+
+        Returns the score gained by each board and a mask of the boards that
+        changed. Boards that could not move are left as they were, which is
+        where ``GameBoard.move`` would raise ``BadMoveError``.
+        """
+        codes = direction_codes(directions, len(self))
+        gained = np.zeros(len(self), dtype=np.int64)
+        valid = np.zeros(len(self), dtype=bool)
+        size = self.size
+        for direction in Direction:
+            (selected,) = np.nonzero(codes == DIRECTION_CODES[direction])
+            if len(selected) == 0:
+                continue
+            before = self.exponents[selected]
+            after = before.copy()
+            oriented = orient(after, direction)
+            (rows, row_scores) = mash_rows(oriented.reshape(-1, size))
+            oriented[...] = rows.reshape(oriented.shape)
+            gained[selected] = row_scores.reshape(-1, size).sum(axis=1)
+            valid[selected] = (after != before).any(axis=(1, 2))
+            self.exponents[selected] = after
+        return (gained, valid)
+
+    def can_mash(self, directions: Direction | Sequence[Direction] | np.ndarray) -> np.ndarray:
+        probe = BatchBoard(self.exponents.copy())
+        (_, valid) = probe.mash(directions)
+        return valid
+
+    def has_move(self) -> np.ndarray:
+        """
+        Check every board for a playable move in any direction.
+
+        A board can move if it has an empty cell and a tile (some row or
+        column then holds both), or two equal tiles next to each other.
+        """
+        exponents = self.exponents
+        empty = exponents == 0
+        playable = empty.any(axis=(1, 2)) & ~empty.all(axis=(1, 2))
+        horizontal = (exponents[:, :, :-1] == exponents[:, :, 1:]) & ~empty[:, :, 1:]
+        vertical = (exponents[:, :-1, :] == exponents[:, 1:, :]) & ~empty[:, 1:, :]
+        return playable | horizontal.any(axis=(1, 2)) | vertical.any(axis=(1, 2))
+
+    def sprinkle(
+        self,
+        mask: np.ndarray | None = None,
+        picks: np.ndarray | None = None,
+        rolls: np.ndarray | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> np.ndarray:
+        """
+        Drop a 2 (90% of the time) or a 4 on a random empty cell of each masked board.
+
+        ``picks`` and ``rolls`` are uniform draws in [0, 1), one per board:
+        the empty cells of a board are taken in row-major order and cell
+        ``int(pick * count)`` gets a 4 if ``roll >= 0.9`` and a 2 otherwise.
+        That is the spawn stream ``GameBoard.sprinkle`` consumes, so feeding
+        both engines the same draws spawns the same tiles. Missing draws come
+        from ``rng``. Boards without an empty cell are skipped. Returns the
+        mask of boards that got a tile.
+        """
+        count = len(self)
+        if rng is None:
+            rng = np.random.default_rng()
+        if picks is None:
+            picks = rng.random(count)
+        if rolls is None:
+            rolls = rng.random(count)
+
+        flat = self.exponents.reshape(count, -1)
+        empty = flat == 0
+        empty_counts = empty.sum(axis=1)
+        spawned = empty_counts > 0
+        if mask is not None:
+            spawned &= mask
+
+        (selected,) = np.nonzero(spawned)
+        if len(selected) == 0:
+            return spawned
+        targets = (picks[selected] * empty_counts[selected]).astype(np.int64)
+        cells = np.argmax(np.cumsum(empty[selected], axis=1) > targets[:, None], axis=1)
+        flat[selected, cells] = np.where(rolls[selected] < SPAWN_LOW_ODDS, SPAWN_LOW_EXPONENT, SPAWN_HIGH_EXPONENT)
+        return spawned
+
+    def move(
+        self,
+        directions: Direction | Sequence[Direction] | np.ndarray,
+        picks: np.ndarray | None = None,
+        rolls: np.ndarray | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Move every board, spawn a tile on each board that moved and check for game over.
+
+        Returns the score gained by each board, the mask of boards that
+        moved, and the mask of boards with no moves left.
+        """
+        (gained, valid) = self.mash(directions)
+        self.scores += gained
+        self.sprinkle(mask=valid, picks=picks, rolls=rolls, rng=rng)
+        return (gained, valid, ~self.has_move())
@@ -0,0 +1,308 @@
+"""
+Benchmarks for the engine's hot paths.
+
+Every case runs against seeded boards at sizes 3-8 and fill ratios from empty
+to nearly full, so runs on the same machine are comparable. Results record
+operations per second and the peak bytes allocated per call, and can be
+compared against a stored baseline to catch throughput regressions.
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterable
+
+from pydantic import BaseModel
+
+from game.board import (
+    Direction,
+    GameBoard,
+    GameOverError,
+    Move,
+    MoveFrame,
+    Position,
+    Slice,
+    Tile,
+)
+from game.packed import PackedBoard
+
+BENCHMARK_SIZES = (3, 4, 5, 6, 7, 8)
+BENCHMARK_FILLS = (0.0, 0.25, 0.5, 0.75, 0.95)
+BOARDS_PER_CASE = 16
+DEFAULT_BASELINE = Path(__file__).parent.parent / "benchmarks" / "baseline.json"
+
+# Code to time in a fresh interpreter, from a bare start up to the CLI.
+STARTUP_SCRIPTS = {
+    "python": "pass",
+    "import game.board": "import game.board",
+    "import game.simulate": "import game.simulate",
+    "game --help": "from game.cli import cli; cli(['--help'])",
+}
+
+
+class BenchmarkResult(BaseModel):
+    name: str
+    size: int
+    fill: float
+    calls: int
+    ops_per_sec: float
+    alloc_bytes_per_call: float
+
+    @property
+    def key(self) -> tuple[str, int, float]:
+        return (self.name, self.size, self.fill)
+
+
+class BenchmarkReport(BaseModel):
+    python: str
+    machine: str
+    results: list[BenchmarkResult]
+
+
+class StartupResult(BaseModel):
+    name: str
+    seconds: float
+
+
+class Regression(BaseModel):
+    name: str
+    size: int
+    fill: float
+    baseline_ops_per_sec: float
+    ops_per_sec: float
+
+    @property
+    def ratio(self) -> float:
+        return self.ops_per_sec / self.baseline_ops_per_sec
+
+
+def make_board(size: int, fill: float, seed: int) -> GameBoard:
+    """
+    Build a reproducible board with roughly ``fill`` of its cells taken.
+
+    Tile values are small powers of two, so mostly-full boards still have
+    merges available.
+    """
+    rng = random.Random(f"{size}-{fill}-{seed}")
+    grid = [
+        Tile.make(i, j, value=2 ** rng.randint(1, 7) if rng.random() < fill else None)
+        for i in range(size)
+        for j in range(size)
+    ]
+    return GameBoard(size=size, grid=grid)
+
+
+def make_frame(board: GameBoard) -> MoveFrame:
+    """
+    Build the frame of every tile sliding one cell west into an empty cell.
+    """
+    moves = []
+    for i in range(board.size):
+        for j in range(1, board.size):
+            tile = board.tile(i, j)
+            if tile.value is not None and board.tile(i, j - 1).value is None:
+                moves.append(Move(
+                    start_pos=Position.make(i, j),
+                    final_pos=Position.make(i, j - 1),
+                    start_value=tile.value,
+                    final_value=tile.value,
+                ))
+    return MoveFrame(moves=moves)
+
+
+def copy_slice(slc: Slice) -> Slice:
+    return Slice(tiles=[Tile.make(t.pos.row, t.pos.col, t.value) for t in slc.tiles])
+
+
+def packed_move(board: GameBoard) -> tuple[PackedBoard, Direction] | None:
+    packed = PackedBoard.from_game_board(board)
+    direction = next((d for d in Direction if packed.can_mash(d)), None)
+    return None if direction is None else (packed, direction)
+
+
+def legal_direction(board: GameBoard) -> Direction | None:
+    return next((d for d in Direction if board.can_mash(d)), None)
+
+
+def _move(pair: tuple[GameBoard | PackedBoard, Direction]):
+    (board, direction) = pair
+    try:
+        board.move(direction)
+    except GameOverError:
+        pass
+
+
+# Each case builds its inputs from a fixture board (outside the timed loop)
+# and names the call to time on each input. Inputs are rebuilt for every
+# call because most of these calls change the board.
+Case = tuple[str, Callable[[GameBoard], object | None], Callable[[object], object]]
+
+CASES: list[Case] = [
+    ("Slice.mash", lambda b: copy_slice(next(iter(b.slice(Direction.WEST)))), lambda s: s.mash()),
+    ("Slice.can_mash", lambda b: next(iter(b.slice(Direction.WEST))), lambda s: s.can_mash()),
+    ("GameBoard.slice", lambda b: b, lambda b: list(b.slice(Direction.NORTH))),
+    (
+        "GameBoard.move",
+        lambda b: (b.copy(deep=True), d) if (d := legal_direction(b)) is not None else None,
+        _move,
+    ),
+    ("PackedBoard.move", packed_move, _move),
+    ("GameBoard.has_move", lambda b: b, lambda b: b.has_move()),
+    ("GameBoard.afterstates", lambda b: b, lambda b: b.afterstates()),
+    (
+        "GameBoard.sprinkle",
+        lambda b: b.copy(deep=True) if any(t.value is None for t in b.grid) else None,
+        lambda b: b.sprinkle(),
+    ),
+    ("GameBoard.pretty", lambda b: b if any(t.value is not None for t in b.grid) else None, lambda b: b.pretty()),
+    ("MoveFrame.simplify", lambda b: make_frame(b), lambda f: f.simplify()),
+]
+
+
+def _prepare(setup, boards: list[GameBoard], count: int) -> list:
+    inputs = []
+    for n in range(count):
+        prepared = setup(boards[n % len(boards)])
+        if prepared is not None:
+            inputs.append(prepared)
+    return inputs
+
+
+def _noop(item):
+    pass
+
+
+def _peak_bytes(call: Callable[[object], object], inputs: list) -> float:
+    """
+    Return the mean peak of bytes allocated above the starting point per call.
+
+    The measurement itself allocates a little, so callers subtract the
+    result for a call that does nothing.
+    """
+    tracemalloc.start()
+    peaks = 0
+    for item in inputs:
+        tracemalloc.reset_peak()
+        (start, _) = tracemalloc.get_traced_memory()
+        call(item)
+        (_, peak) = tracemalloc.get_traced_memory()
+        peaks += peak - start
+    tracemalloc.stop()
+    return peaks / len(inputs)
+
+
+def run_case(
+    name: str,
+    setup: Callable[[GameBoard], object | None],
+    call: Callable[[object], object],
+    size: int,
+    fill: float,
+    min_time: float = 0.05,
+) -> BenchmarkResult | None:
+    """
+    Time ``call`` on freshly prepared inputs until ``min_time`` seconds have been measured.
+
+    Returns None if no fixture board can be prepared for this case (moving
+    an empty board, say).
+    """
+    boards = [make_board(size, fill, seed) for seed in range(BOARDS_PER_CASE)]
+    if not _prepare(setup, boards, len(boards)):
+        return None
+
+    inputs = _prepare(setup, boards, len(boards))
+    alloc_bytes_per_call = max(0.0, _peak_bytes(call, inputs) - _peak_bytes(_noop, inputs))
+
+    # Stop on measured time, but also cap the wall time: for the fastest
+    # calls, preparing inputs costs far more than the calls themselves.
+    calls = 0
+    elapsed = 0.0
+    batch = len(boards)
+    deadline = time.perf_counter() + 5 * min_time
+    while elapsed < min_time and time.perf_counter() < deadline:
+        inputs = _prepare(setup, boards, batch)
+        started = time.perf_counter()
+        for item in inputs:
+            call(item)
+        elapsed += time.perf_counter() - started
+        calls += len(inputs)
+        batch *= 2
+
+    return BenchmarkResult(
+        name=name,
+        size=size,
+        fill=fill,
+        calls=calls,
+        ops_per_sec=calls / elapsed,
+        alloc_bytes_per_call=alloc_bytes_per_call,
+    )
+
+
+def run_benchmarks(
+    sizes: Iterable[int] = BENCHMARK_SIZES,
+    fills: Iterable[float] = BENCHMARK_FILLS,
+    names: Iterable[str] | None = None,
+    min_time: float = 0.05,
+) -> BenchmarkReport:
+    selected = [c for c in CASES if names is None or c[0] in set(names)]
+    results = []
+    for (name, setup, call) in selected:
+        for size in sizes:
+            for fill in fills:
+                result = run_case(name, setup, call, size, fill, min_time=min_time)
+                if result is not None:
+                    results.append(result)
+    return BenchmarkReport(
+        python=sys.version.split()[0],
+        machine=platform.machine(),
+        results=results,
+    )
+
+
+def measure_startup(repeat: int = 5) -> list[StartupResult]:
+    """
+    Time each of ``STARTUP_SCRIPTS`` in a new interpreter, keeping the best of ``repeat`` runs.
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(Path(__file__).parent.parent), *sys.path])}
+    results = []
+    for (name, script) in STARTUP_SCRIPTS.items():
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", script], env=env, check=True, stdout=subprocess.DEVNULL)
+            best = min(best, time.perf_counter() - started)
+        results.append(StartupResult(name=name, seconds=best))
+    return results
+
+
+def compare(report: BenchmarkReport, baseline: BenchmarkReport, tolerance: float = 0.2) -> list[Regression]:
+    """
+    Find the cases that lost more than ``tolerance`` of their baseline throughput.
+    """
+    known = {r.key: r for r in baseline.results}
+    regressions = []
+    for result in report.results:
+        base = known.get(result.key)
+        if base is not None and result.ops_per_sec < base.ops_per_sec * (1 - tolerance):
+            regressions.append(Regression(
+                name=result.name,
+                size=result.size,
+                fill=result.fill,
+                baseline_ops_per_sec=base.ops_per_sec,
+                ops_per_sec=result.ops_per_sec,
+            ))
+    return regressions
+
+
+def save_report(report: BenchmarkReport, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report.dict(), indent=2) + "\n")
+
+
+def load_report(path: Path) -> BenchmarkReport:
+    return BenchmarkReport.parse_file(path)
@@ -1,23 +1,39 @@
+"""
+The game engine: boards, tiles and the rules for moving them.
+
+Nothing here depends on the TUI (``game.tui``) or the command line
+(``game.cli``), so headless code such as simulation workers can import it
+without loading textual, rich or typer.
+"""
+
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, insort
+from copy import copy
 from functools import cache
-from random import choice, random
-from typing import List, Optional, Iterable, Any
+from math import isqrt
+from pathlib import Path
+from random import Random, choice, random
+from typing import Iterable, Iterator
 
-import snick
-import typer
 from auto_name_enum import AutoNameEnum, NoMangleMixin, auto
 from buzz import Buzz
-from pydantic import BaseModel
-from rich.panel import Panel
-from textual.app import App
-from textual.views import GridView
-from textual.reactive import Reactive
-from textual.widget import Widget
-
-MAX_BOARD_SIZE = 8
-MIN_BOARD_SIZE = 8
+
+from game.tables import row_table
+
+MAX_BOARD_SIZE = 32
+MIN_BOARD_SIZE = 3
 DEFAULT_BOARD_SIZE = 4
 
 
+# The values ``GameBoard.sprinkle`` drops, and how often it drops each.
+SPAWN_VALUES = ((2, 0.9), (4, 0.1))
+
+# A spawn drops the low value when its roll, uniform in [0, 1), falls below
+# the low value's odds, and the high value otherwise.
+(SPAWN_LOW, SPAWN_LOW_ODDS) = SPAWN_VALUES[0]
+SPAWN_HIGH = SPAWN_VALUES[1][0]
+
 oob = object()
 
 
@@ -40,36 +56,110 @@ class Direction(AutoNameEnum, NoMangleMixin):
     WEST = auto()
 
 
-class Position(BaseModel):
-    row: int
-    col: int
+class Position:
+    """
+    A cell on the board.
+
+    Positions are never changed after they are made, so ``make`` hands out one
+    shared instance per cell instead of allocating a new one every time.
+    """
+
+    __slots__ = ("row", "col")
+
+    def __init__(self, row: int, col: int):
+        self.row = row
+        self.col = col
 
     @classmethod
     def make(cls, row: int, col: int) -> "Position":
-        return cls(row=row, col=col)
+        return _position(row, col)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return self.row == other.row and self.col == other.col
 
-class Tile(BaseModel):
-    pos: Position
-    value: int | None = None
+    def __hash__(self) -> int:
+        return hash((self.row, self.col))
+
+    def __repr__(self) -> str:
+        return f"Position(row={self.row}, col={self.col})"
+
+
+@cache
+def _position(row: int, col: int) -> Position:
+    return Position(row, col)
+
+
+class Tile:
+    __slots__ = ("pos", "value")
+
+    def __init__(self, pos: Position, value: int | None = None):
+        self.pos = pos
+        self.value = value
 
     @classmethod
     def make(cls, row: int, col: int, value: int | None = None) -> "Tile":
         """
-        Yeah, I get it. It's a named tuple at this point. However, pydantic models
-        are composable and serializable, so...
+        Yeah, I get it. It's a named tuple at this point. However, it's the
+        one mutable thing on the board, so...
         """
         return cls(pos=Position.make(row, col), value=value)
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tile):
+            return NotImplemented
+        return self.pos == other.pos and self.value == other.value
+
+    def __repr__(self) -> str:
+        return f"Tile(pos={self.pos!r}, value={self.value!r})"
+
+
+class Move:
+    __slots__ = ("start_pos", "final_pos", "start_value", "final_value")
+
+    def __init__(
+        self,
+        start_pos: Position,
+        final_pos: Position,
+        start_value: int | None,
+        final_value: int | None,
+    ):
+        self.start_pos = start_pos
+        self.final_pos = final_pos
+        self.start_value = start_value
+        self.final_value = final_value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Move):
+            return NotImplemented
+        return (
+            self.start_pos == other.start_pos
+            and self.final_pos == other.final_pos
+            and self.start_value == other.start_value
+            and self.final_value == other.final_value
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Move(start_pos={self.start_pos!r}, final_pos={self.final_pos!r}, "
+            f"start_value={self.start_value!r}, final_value={self.final_value!r})"
+        )
+
+
+class MoveFrame:
+    __slots__ = ("moves",)
 
-class Move(BaseModel):
-    start_pos: Position
-    final_pos: Position
-    start_value: int
-    final_value: int
+    def __init__(self, moves: list[Move]):
+        self.moves = list(moves)
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MoveFrame):
+            return NotImplemented
+        return self.moves == other.moves
 
-class MoveFrame(BaseModel):
-    moves: list[Move]
+    def __repr__(self) -> str:
+        return f"MoveFrame(moves={self.moves!r})"
 
     def simplify(self):
         finals = {(m.final_pos.row, m.final_pos.col): m for m in self.moves}
@@ -83,19 +173,81 @@ class MoveFrame(BaseModel):
         self.moves = [m for m in finals.values()]
 
 
-class Context(BaseModel):
-    turn: int
-    score: int
-    history: list[MoveFrame]
+class Context:
+    __slots__ = ("turn", "score", "history")
+
+    def __init__(self, turn: int, score: int, history: list[MoveFrame]):
+        self.turn = turn
+        self.score = score
+        self.history = list(history)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Context):
+            return NotImplemented
+        return self.turn == other.turn and self.score == other.score and self.history == other.history
+
+    def __repr__(self) -> str:
+        return f"Context(turn={self.turn!r}, score={self.score!r}, history={self.history!r})"
 
 
-class Slice(BaseModel):
-    tiles: list[Tile]
+def mash_values(values: list[int | None]) -> tuple[list[int | None], int]:
+    """
+    Slide and merge one line of tile values toward its start.
+
+    Returns the new values, padded with None to the same length, and the score gained.
+    """
+    size = len(values)
+    values = list(values)
+    score = 0
+    i = 0
+    while len(values) > 0 and i < len(values) - 1:
+        if values[i] is None:
+            values.pop(i)
+            continue
+
+        if values[i + 1] is None:
+            values.pop(i + 1)
+            continue
+
+        if values[i] == values[i + 1]:
+            newval = values.pop(i)
+            # Make static type checkers happy
+            assert newval is not None
+            newval = newval * 2
+            score += newval
+            values[i] = newval
+
+        i += 1
+    values.extend([None] * (size - len(values)))
+    return (values, score)
+
+
+class Slice:
+    """
+    One line of tiles, in the order a mash pushes them.
+
+    A slice from ``GameBoard.slice`` keeps its ``board``, and ``mash`` sets
+    tiles through it so the board's empty-cell index stays up to date.
+    """
+
+    __slots__ = ("tiles", "board")
+
+    def __init__(self, tiles: Iterable[Tile], board: "GameBoard | None" = None):
+        self.tiles = list(tiles)
+        self.board = board
 
     @classmethod
     def make(cls, *tiles: Tile) -> "Slice":
         return cls(tiles=tiles)
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Slice):
+            return NotImplemented
+        return self.tiles == other.tiles
+
+    def __repr__(self) -> str:
+        return f"Slice(tiles={self.tiles!r})"
+
     def can_mash(self) -> bool:
         values: list[int | None] = [t.value for t in self.tiles]
         seen_none = False
@@ -110,56 +262,266 @@ class Slice(BaseModel):
         return False
 
     def mash(self) -> int:
-        values: list[int | None] = [t.value for t in self.tiles]
-        score = 0
-        i = 0
-        while len(values) > 0 and i < len(values) - 1:
-            if values[i] is None:
-                values.pop(i)
-                continue
-
-            if values[i + 1] is None:
-                values.pop(i + 1)
-                continue
-
-            if values[i] == values[i + 1]:
-                newval = values.pop(i)
-                # Make static type checkers happy
-                assert newval is not None
-                newval = newval * 2
-                score += newval
-                values[i] = newval
-
-            i += 1
-        for (i, tile) in enumerate(self.tiles):
-            tile.value = values[i] if i < len(values) else None
-
+        (values, score) = mash_values([t.value for t in self.tiles])
+        board = self.board
+        for (tile, value) in zip(self.tiles, values):
+            if board is None:
+                tile.value = value
+            elif tile.value != value:
+                board.put(tile.pos.row, tile.pos.col, value)
         return score
 
 
-class GameBoard(BaseModel):
-    size: int
-    grid: list[Tile] = []
-    score: int = 0
+class Afterstate:
+    """
+    The board one direction would leave behind, before a new tile spawns.
+
+    ``values`` holds the tile values in row-major order, with None for an
+    empty cell. ``legal`` is False if nothing would move, in which case
+    ``values`` are the source board's own. The source board is not changed;
+    ``board()`` builds a new one.
+    """
+
+    __slots__ = ("direction", "source", "values", "score", "legal")
+
+    def __init__(self, direction: Direction, source: "GameBoard", values: list[int | None], score: int, legal: bool):
+        self.direction = direction
+        self.source = source
+        self.values = values
+        self.score = score
+        self.legal = legal
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Afterstate):
+            return NotImplemented
+        return (
+            self.direction == other.direction
+            and self.values == other.values
+            and self.score == other.score
+            and self.legal == other.legal
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Afterstate(direction={self.direction!r}, values={self.values!r}, "
+            f"score={self.score!r}, legal={self.legal!r})"
+        )
+
+    def board(self) -> "GameBoard":
+        """
+        Build the board after the mash, with the score gained added and the source's spawn source.
+        """
+        source = self.source
+        grid = [Tile(pos, value) for (pos, value) in zip(cell_positions(source.size), self.values)]
+        return GameBoard(size=source.size, grid=grid, score=source.score + self.score, spawns=source.spawns)
+
+
+class Spawn:
+    """
+    One way a new tile can land: ``value`` on the empty cell at ``pos``.
+
+    ``count`` is how many equally likely outcomes this one stands for, which
+    is more than one only for the grouped outcomes of
+    ``game.symmetry.distinct_spawn_outcomes``. ``probability`` covers all of them.
+    """
+
+    __slots__ = ("pos", "value", "probability", "count")
+
+    def __init__(self, pos: Position, value: int, probability: float, count: int = 1):
+        self.pos = pos
+        self.value = value
+        self.probability = probability
+        self.count = count
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Spawn):
+            return NotImplemented
+        return (
+            self.pos == other.pos
+            and self.value == other.value
+            and self.probability == other.probability
+            and self.count == other.count
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Spawn(pos={self.pos!r}, value={self.value!r}, "
+            f"probability={self.probability!r}, count={self.count!r})"
+        )
+
+
+class SpawnSource(ABC):
+    """
+    Where a board's sprinkled tiles come from.
+
+    ``draw()`` returns a uniform pick in [0, 1) and the value to spawn. The
+    board takes the empty cell at ``int(pick * count)`` in row-major order,
+    the same rule ``BatchBoard.sprinkle`` uses.
+    """
+
+    @abstractmethod
+    def draw(self) -> tuple[float, int]:
+        ...
+
+    @abstractmethod
+    def copy(self) -> "SpawnSource":
+        ...
+
+
+class RandomSpawns(SpawnSource):
+    """
+    Spawns from a private, seeded RNG, drawn ``block_size`` spawns at a time.
+
+    Each spawn consumes two draws from the RNG, the pick and then the roll
+    for a 4 (10% of the time), so a game seeded the same way spawns the
+    same tiles no matter which process plays it, or what block size it uses.
+    """
+
+    def __init__(self, seed: int | str | None = None, block_size: int = 32):
+        GameError.require_condition(block_size > 0, "Block size must be positive")
+        self.rng = Random(seed)
+        self.block_size = block_size
+        self.block = array("d")
+        self.position = 0
+
+    def draw(self) -> tuple[float, int]:
+        if self.position == len(self.block):
+            self._refill()
+        block = self.block
+        position = self.position
+        self.position = position + 2
+        return (block[position], SPAWN_LOW if block[position + 1] < SPAWN_LOW_ODDS else SPAWN_HIGH)
+
+    def _refill(self):
+        draw = self.rng.random
+        self.block = array("d", [draw() for _ in range(2 * self.block_size)])
+        self.position = 0
+
+    def copy(self) -> "RandomSpawns":
+        # Building a twin through __init__ would seed a throwaway RNG from urandom.
+        twin = RandomSpawns.__new__(RandomSpawns)
+        twin.rng = copy(self.rng)
+        twin.block_size = self.block_size
+        twin.block = self.block
+        twin.position = self.position
+        return twin
+
+
+MASK_64 = (1 << 64) - 1
+MAX_COUNTER_SEED = 1 << 63
+
+# ``CounterSpawns`` rolls 32 bits, so its odds are scaled to match.
+SPAWN_LOW_BITS = int(SPAWN_LOW_ODDS * 0x100000000)
+
+
+def mix_64(x: int) -> int:
+    """
+    Scramble a 64 bit int with the SplitMix64 finalizer.
+    """
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return x ^ (x >> 31)
+
+
+class CounterSpawns(SpawnSource):
+    """
+    Spawns computed from the seed and the number of spawns drawn so far.
+
+    The whole state is two ints, ``seed`` and ``drawn``, so a source can be
+    stored and picked up again later with ``CounterSpawns(seed, drawn)``.
+    Seeds that are not ints in [0, 2 ** 63) are hashed into that range.
+    """
+
+    __slots__ = ("seed", "drawn")
+
+    def __init__(self, seed: int | str | None = None, drawn: int = 0):
+        if not (isinstance(seed, int) and 0 <= seed < MAX_COUNTER_SEED):
+            seed = Random(seed).getrandbits(63)
+        self.seed = seed
+        self.drawn = drawn
+
+    def draw(self) -> tuple[float, int]:
+        bits = mix_64((mix_64(self.seed) + self.drawn * 0x9E3779B97F4A7C15) & MASK_64)
+        self.drawn += 1
+        return ((bits >> 32) / 0x100000000, SPAWN_LOW if (bits & 0xFFFFFFFF) < SPAWN_LOW_BITS else SPAWN_HIGH)
+
+    def copy(self) -> "CounterSpawns":
+        return CounterSpawns(self.seed, self.drawn)
+
+
+class GameBoard:
+    """
+    A square board of tiles, stored row by row in ``grid``.
+
+    The board keeps a sorted index of its empty cells, which ``mash``,
+    ``sprinkle`` and ``reset`` update as they go, as do ``put`` and the
+    slices from ``slice``. Code that sets tile values directly must call
+    ``reindex()`` afterwards.
+
+    New tiles come from ``spawns``. Without one, the board draws from the
+    global ``random`` module.
+    """
+
+    __slots__ = ("size", "grid", "score", "spawns", "_empty")
+
+    def __init__(
+        self,
+        size: int,
+        grid: list[Tile] | None = None,
+        score: int = 0,
+        spawns: SpawnSource | None = None,
+    ):
+        check_size(size)
+        self.size = size
+        self.grid = list(grid) if grid is not None else []
+        self.score = score
+        self.spawns = spawns
+        self.reindex()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GameBoard):
+            return NotImplemented
+        return self.size == other.size and self.score == other.score and self.grid == other.grid
+
+    def __repr__(self) -> str:
+        return f"GameBoard(size={self.size!r}, grid={self.grid!r}, score={self.score!r})"
+
+    def copy(self, deep: bool = False) -> "GameBoard":
+        """
+        Copy the board.
+
+        The copy always gets its own tiles, so moves on one board never show
+        up on the other. A shallow copy shares this board's spawn source. A
+        deep copy gets its own, and would spawn the same tiles this board will.
+        """
+        spawns = self.spawns
+        if deep and spawns is not None:
+            spawns = spawns.copy()
+        return GameBoard(
+            size=self.size,
+            grid=[Tile(t.pos, t.value) for t in self.grid],
+            score=self.score,
+            spawns=spawns,
+        )
 
     def reset(self, should_sprinkle=True):
         self.score = 0
         self.grid = [Tile.make(i, j, value=None) for i in range(self.size) for j in range(self.size)]
+        self._empty = list(range(len(self.grid)))
         if should_sprinkle:
             self.sprinkle()
             self.sprinkle()
 
     @classmethod
-    def from_text(cls, text: str):
-        cls.parse_raw(text)
-
+    def from_text(cls, text: str) -> "GameBoard":
+        """
+        Read a board from comma-separated rows of tile values, leaving empty cells blank.
+        """
         lines = text.strip().split("\n")
         size = len(lines)
-        GameError.require_condition(size >= 3, "Board is too small")
-        GameError.require_condition(size <= MAX_BOARD_SIZE, "Board is too big")
+        check_size(size)
 
-        board = cls(size=size)
-        board.build()
+        grid = []
         for (i, line) in enumerate(lines):
             values = [v.strip()  for v in line.split(',')]
             GameError.require_condition(
@@ -170,34 +532,92 @@ class GameBoard(BaseModel):
                 if value == "":
                     value = None
                 else:
-                    # TODO: check for powers of 2
                     with GameError.handle_errors(f"Invalid tile value: {value}"):
                         value = int(value)
-                board.tile(i, j).value = value
+                    GameError.require_condition(
+                        value >= 2 and value & (value - 1) == 0,
+                        f"Invalid tile value: {value} is not a power of 2",
+                    )
+                grid.append(Tile.make(i, j, value=value))
+        return cls(size=size, grid=grid)
+
+    def to_text(self) -> str:
+        """
+        Write the board in the format ``from_text`` reads.
+        """
+        rows = []
+        for i in range(self.size):
+            values = [self.tile(i, j).value for j in range(self.size)]
+            rows.append(", ".join("" if v is None else str(v) for v in values))
+        return "\n".join(rows) + "\n"
 
-    def tile(self, row: int, col: int) -> Tile:
-        return self.grid[idx(self.size, row, col)]
+    def save(self, path: Path):
+        """
+        Write the board, score included, to ``path`` as JSON.
+        """
+        from game.models import GameBoardModel
 
-    def slice(self, direction: Direction) -> Iterable[Slice]:
-        assert self.grid is not None
-        up_range = range(self.size)
-        down_range = range(self.size - 1, -1, -1)
+        path.write_text(GameBoardModel.from_core(self).json() + "\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "GameBoard":
+        """
+        Read a board written by ``save``, or one in the text format of ``from_text``.
+        """
+        from game.models import GameBoardModel
+
+        text = path.read_text()
+        if not text.lstrip().startswith("{"):
+            return cls.from_text(text)
+
+        with GameError.handle_errors(f"Invalid board file: {path}"):
+            board = GameBoardModel.parse_raw(text).to_core()
+        GameError.require_condition(
+            [t.pos for t in board.grid] == [Position.make(i, j) for i in range(board.size) for j in range(board.size)],
+            f"Invalid board file: {path} does not hold every cell of the board in order",
+        )
+        return board
 
-        if direction is Direction.EAST:
-            for i in up_range:
-                yield Slice(tiles=[self.tile(i, j) for j in down_range])
+    def key(self) -> tuple[int, ...]:
+        """
+        Return the tile values in row-major order, with 0 for an empty cell.
+
+        Unlike the board, the key is immutable and hashable; see ``game.symmetry``.
+        """
+        return tuple([t.value or 0 for t in self.grid])
 
-        elif direction is Direction.WEST:
-            for i in up_range:
-                yield Slice(tiles=[self.tile(i, j) for j in up_range])
+    @classmethod
+    def from_key(cls, key: tuple[int, ...]) -> "GameBoard":
+        size = isqrt(len(key))
+        GameError.require_condition(size * size == len(key), "A board key must fill a square board")
+        grid = [Tile.make(i, j, value=key[idx(size, i, j)] or None) for i in range(size) for j in range(size)]
+        return cls(size=size, grid=grid)
+
+    def reindex(self):
+        """
+        Rebuild the index of empty cells from the tiles in the grid.
+        """
+        self._empty = [k for (k, t) in enumerate(self.grid) if t.value is None]
 
-        elif direction is Direction.NORTH:
-            for j in up_range:
-                yield Slice(tiles=[self.tile(i, j) for i in up_range])
+    @property
+    def empty_count(self) -> int:
+        return len(self._empty)
 
-        elif direction is Direction.SOUTH:
-            for j in up_range:
-                yield Slice(tiles=[self.tile(i, j) for i in down_range])
+    def is_full(self) -> bool:
+        return not self._empty
+
+    def tile(self, row: int, col: int) -> Tile:
+        return self.grid[idx(self.size, row, col)]
+
+    def lines(self, direction: Direction) -> Iterable[list[Tile]]:
+        assert self.grid is not None
+        grid = self.grid
+        for indices in line_indices(self.size, direction):
+            yield [grid[k] for k in indices]
+
+    def slice(self, direction: Direction) -> Iterable[Slice]:
+        for tiles in self.lines(direction):
+            yield Slice(tiles=tiles, board=self)
 
     def pretty(self):
         max_val = max(self.grid, key=lambda t: t.value if t.value is not None else 0)
@@ -219,117 +639,215 @@ class GameBoard(BaseModel):
         return output
 
     def has_move(self) -> bool:
-        return any(self.can_mash(d) for d in Direction)
+        # A tile and an empty cell always share a row or column with room
+        # to slide, so only a full board needs a closer look.
+        if self._empty:
+            return len(self._empty) < len(self.grid)
+
+        # On a full board, a move needs two matching neighbors.
+        grid = self.grid
+        for (a, b) in neighbor_indices(self.size):
+            if grid[a].value == grid[b].value:
+                return True
+        return False
 
     def can_mash(self, direction: Direction) -> bool:
-        # TODO: Make board hashable so we can cash self.slice()?
-        return any(s.can_mash() for s in self.slice(direction))
+        table = row_table(self.size)
+        if table is None:
+            return any(s.can_mash() for s in self.slice(direction))
+
+        for tiles in self.lines(direction):
+            found = table.can_mash_values([t.value for t in tiles])
+            if found is None:
+                found = Slice(tiles=tiles).can_mash()
+            if found:
+                return True
+        return False
 
     def mash(self, direction: Direction) -> int:
-        return sum(s.mash() for s in self.slice(direction))
-
-    def sprinkle(self):
-        empty_tiles = [t for t in self.grid if t.value is None]
-        picked_tile = choice(empty_tiles)
-        picked_tile.value = 2 if random() < 0.9 else 4
-
-    def move(self, direction: Direction):
-        BadMoveError.require_condition(
-            self.can_mash(direction),
-            f"Can't move {direction}",
-        )
-        self.score += self.mash(direction)
-        self.sprinkle()
-        GameOverError.require_condition(
-            self.has_move(),
-            "Game Over! (No moves left)"
-        )
-
-
-class Status(Widget):
-
-    score = Reactive(0)
-    turn = Reactive(0)
-    message = Reactive("")
-
-    def render(self):
-        parts = [
-            f"Score: {self.score}",
-            f"Turn:  {self.turn}",
-        ]
-        if self.message:
-            parts.extend([
-                "",
-                self.message,
-            ])
-
-        return Panel(snick.dedent_all(*parts))
-
-
-class TuiTile(Widget):
-
-    value = Reactive(None)
-
-    def render(self):
-        if self.value is None:
-            return ""
-        # TODO: actually calculate the width needed here
-        return Panel(f"{self.value: ^6}")
-
-
-class TuiBoard(GridView):
-    board: GameBoard
-    turn = Reactive(0)
-    game_over = Reactive(False)
+        (score, _) = self._mash(direction)
+        return score
 
-    def __init__(self, size: int, *args, **kwargs):
-        self.board = GameBoard(size=size)
-        self.board.reset()
-        super().__init__(*args, **kwargs)
+    def _mash(self, direction: Direction, frame: MoveFrame | None = None) -> tuple[int, bool]:
+        """
+        Mash every line toward ``direction`` in one pass.
 
-    def watch_game_over(self, value: bool):
-        self.log(f"Game over!")
-        if self.status is not None and value is True:
-            self.status.message = "Game Over! (no moves left)"
+        Returns the score gained and whether any tile moved. Only changed
+        tiles are written, so a mash that returns False left the board as it
+        was. Each changed cell is added to ``frame``, if given.
+        """
+        table = row_table(self.size)
+        grid = self.grid
+        score = 0
+        changed = False
+        empty = self._empty
+        for indices in line_indices(self.size, direction):
+            before = [grid[k].value for k in indices]
+            result = None if table is None else table.mash_values(before)
+            if result is None:
+                (after, gained) = mash_values(before)
+            else:
+                (after, gained, _) = result
+            score += gained
+
+            # Only touch the tiles that changed, and keep the empty-cell
+            # index in step with the ones that filled up or emptied out.
+            for (k, old, new) in zip(indices, before, after):
+                if old != new:
+                    changed = True
+                    tile = grid[k]
+                    tile.value = new
+                    if frame is not None:
+                        frame.moves.append(Move(tile.pos, tile.pos, old, new))
+                    if old is None:
+                        del empty[bisect_left(empty, k)]
+                    elif new is None:
+                        insort(empty, k)
+        return (score, changed)
+
+    def afterstates(self) -> dict[Direction, Afterstate]:
+        """
+        Work out what every direction would do to the board, without changing it.
 
-    def watch_turn(self, value: int):
-        self.log(f"reacted to change in turn: {value}")
-        if self.tui_tiles is not None:
-            for (i, tile) in enumerate(self.board.grid):
-                self.tui_tiles[i].value = tile.value
+        This reads the tiles once. Each row is mashed both ways for WEST and
+        EAST, and each column, read out once, both ways for NORTH and SOUTH.
+        The results are in ``Direction`` order.
+        """
+        # Lines are mashed directly rather than through the row table:
+        # packing each line both ways for a lookup costs more than it saves.
+        size = self.size
+        values = [t.value for t in self.grid]
+        rows = [values[k:k + size] for k in range(0, len(values), size)]
+        columns = [values[j::size] for j in range(size)]
+
+        found = {}
+        for (lines, forward, backward) in (
+            (rows, Direction.WEST, Direction.EAST),
+            (columns, Direction.NORTH, Direction.SOUTH),
+        ):
+            (ahead, behind) = ([None] * len(values), [None] * len(values))
+            (ahead_score, behind_score) = (0, 0)
+            (ahead_legal, behind_legal) = (False, False)
+            for (n, line) in enumerate(lines):
+                backward_line = line[::-1]
+                (after, gained) = mash_values(line)
+                (after_back, gained_back) = mash_values(backward_line)
+                moved = after != line
+                moved_back = after_back != backward_line
+                after_back.reverse()
+                if lines is rows:
+                    ahead[n * size:(n + 1) * size] = after
+                    behind[n * size:(n + 1) * size] = after_back
+                else:
+                    ahead[n::size] = after
+                    behind[n::size] = after_back
+                ahead_score += gained
+                behind_score += gained_back
+                ahead_legal = ahead_legal or moved
+                behind_legal = behind_legal or moved_back
+            found[forward] = Afterstate(forward, self, ahead, ahead_score, ahead_legal)
+            found[backward] = Afterstate(backward, self, behind, behind_score, behind_legal)
+        return {direction: found[direction] for direction in Direction}
+
+    def sprinkle(self) -> Tile:
+        """
+        Drop a 2 (90% of the time) or a 4 on a random empty cell, and return its tile.
 
-        if self.status is not None:
-            self.status.score = self.board.score
-            self.status.turn = value
+        The empty cells are offered to ``choice`` in row-major order.
+        """
+        if self.spawns is None:
+            k = choice(self._empty)
+            value = SPAWN_LOW if random() < SPAWN_LOW_ODDS else SPAWN_HIGH
+            i = bisect_left(self._empty, k)
+        else:
+            (pick, value) = self.spawns.draw()
+            i = int(pick * len(self._empty))
+            k = self._empty[i]
+        del self._empty[i]
+        picked_tile = self.grid[k]
+        picked_tile.value = value
+        return picked_tile
+
+    def spawn_outcomes(self) -> Iterator[Spawn]:
+        """
+        Yield every tile ``sprinkle`` could drop, with its probability.
 
-    def mash(self, direction: Direction):
-        if self.game_over:
-            return
-        self.log(f"Called mash with {direction}")
-        try:
-            self.board.move(direction)
-            self.turn += 1
-            self.status.message = ""
-        except GameOverError:
-            self.game_over = True
-            self.log("That's it, man! Game over, man! Game OVER!")
-        except Exception as err:
-            self.status.message = str(err)
+        Outcomes come cell by cell in row-major order, a 2 before a 4. No
+        board is built for them: to look at a child, ``place()`` the spawn's
+        tile and ``put()`` None back on its cell afterwards. Only the list of
+        empty cells is copied, so doing that while iterating is safe.
+        """
+        empty = list(self._empty)
+        positions = cell_positions(self.size)
+        for k in empty:
+            for (value, odds) in SPAWN_VALUES:
+                yield Spawn(positions[k], value, odds / len(empty))
 
-    def on_mount(self) -> None:
+    def place(self, row: int, col: int, value: int) -> Tile:
+        """
+        Put a tile of ``value`` on an empty cell, as if it had been sprinkled there.
+        """
+        k = idx(self.size, row, col)
+        i = bisect_left(self._empty, k)
+        GameError.require_condition(
+            i < len(self._empty) and self._empty[i] == k,
+            f"Can't place a tile on the full cell at ({row}, {col})",
+        )
+        del self._empty[i]
+        tile = self.grid[k]
+        tile.value = value
+        return tile
 
-        self.grid.add_column("col", max_size=10, repeat=self.board.size)
-        self.grid.add_row("row", max_size=4, repeat=self.board.size)
-        self.grid.add_row("status", max_size=8)
+    def put(self, row: int, col: int, value: int | None) -> Tile:
+        """
+        Set the value of any cell, keeping the empty-cell index up to date.
+        """
+        k = idx(self.size, row, col)
+        tile = self.grid[k]
+        if tile.value is None and value is not None:
+            del self._empty[bisect_left(self._empty, k)]
+        elif tile.value is not None and value is None:
+            insort(self._empty, k)
+        tile.value = value
+        return tile
+
+    def step(self, direction: Direction, frame: MoveFrame | None = None) -> Tile:
+        """
+        Mash toward ``direction`` and sprinkle a new tile, without checking for game over.
 
-        self.grid.add_areas(status=f"col1-start|col{self.board.size}-end,status")
+        Returns the sprinkled tile. If ``frame`` is given, every cell that
+        changed is added to it as a move that starts and ends on that cell,
+        in the order the changes happened.
+        """
+        (score, changed) = self._mash(direction, frame)
+        BadMoveError.require_condition(changed, f"Can't move {direction}")
+        self.score += score
+        spawned = self.sprinkle()
+        if frame is not None:
+            frame.moves.append(Move(spawned.pos, spawned.pos, None, spawned.value))
+        return spawned
+
+    def move(self, direction: Direction, frame: MoveFrame | None = None) -> Tile:
+        spawned = self.step(direction, frame)
+        GameOverError.require_condition(
+            self.has_move(),
+            "Game Over! (No moves left)"
+        )
+        return spawned
 
-        self.tui_tiles = [TuiTile() for _ in self.board.grid]
-        self.status = Status()
-        self.game_over = False
 
-        self.grid.place(*self.tui_tiles, status=self.status)
-        self.turn = 1
+def check_size(size: int):
+    """
+    Make sure a board of ``size`` x ``size`` is one the game supports.
+    """
+    GameError.require_condition(
+        size >= MIN_BOARD_SIZE,
+        f"Board is too small: {size}x{size} (the smallest is {MIN_BOARD_SIZE}x{MIN_BOARD_SIZE})",
+    )
+    GameError.require_condition(
+        size <= MAX_BOARD_SIZE,
+        f"Board is too big: {size}x{size} (the biggest is {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE})",
+    )
 
 
 @cache
@@ -337,51 +855,76 @@ def idx(size: int, row: int, col: int) -> int:
     return row * size + col
 
 
-class Game(App):
-    tui_board: TuiBoard
+@cache
+def cell_positions(size: int) -> tuple[Position, ...]:
+    """
+    Return the position of every cell of a board in row-major order, the order of ``GameBoard.grid``.
+    """
+    return tuple(Position.make(i, j) for i in range(size) for j in range(size))
+
 
-    def __init__(self, *args, size: int = DEFAULT_BOARD_SIZE, **kwargs):
-        self.size = size
-        super().__init__(*args, **kwargs)
+def value_to_exponent(value: int | None) -> int:
+    """
+    Return ``k`` for a tile of value ``2 ** k``, or 0 for an empty cell.
+    """
+    if value is None:
+        return 0
+    exponent = value.bit_length() - 1
+    GameError.require_condition(
+        value > 1 and value == 1 << exponent,
+        f"Invalid tile value: {value}",
+    )
+    return exponent
 
-    async def on_load(self, event):
-        await self.bind("w", f"mash('{Direction.NORTH}')")
-        await self.bind("up", f"mash('{Direction.NORTH}')")
-        await self.bind("s", f"mash('{Direction.SOUTH}')")
-        await self.bind("down", f"mash('{Direction.SOUTH}')")
-        await self.bind("a", f"mash('{Direction.WEST}')")
-        await self.bind("left", f"mash('{Direction.WEST}')")
-        await self.bind("d", f"mash('{Direction.EAST}')")
-        await self.bind("right", f"mash('{Direction.EAST}')")
 
-    async def action_mash(self, dir_str: str):
-        self.log(f"Got an action mash of {dir_str}")
-        self.tui_board.mash(Direction[dir_str])
+def exponent_to_value(exponent: int) -> int | None:
+    return None if exponent == 0 else 1 << exponent
 
-    async def on_mount(self) -> None:
-        self.tui_board = TuiBoard(self.size)
-        await self.view.dock(self.tui_board)
 
+def encode_grid(grid: Iterable[Tile]) -> bytes:
+    """
+    Pack a grid into one exponent per byte, in row-major order.
 
-cli = typer.Typer()
+    Unlike ``value_to_exponent``, this doesn't check the values, which every
+    board the engine plays holds anyway.
+    """
+    return bytes((t.value or 1).bit_length() - 1 for t in grid)
 
 
-@cli.command()
-def play(
-    size: int = typer.Option(
-        DEFAULT_BOARD_SIZE,
-        help="The size of the board (size x size).",
-    ),
-):
+def decode_grid(exponents: Iterable[int], size: int) -> list[Tile]:
     """
-    Play 2048 with the size of board you specify.
+    Build the grid of a board from its exponents in row-major order, as ``encode_grid`` packs them.
+    """
+    return [Tile(pos, 1 << e if e else None) for (pos, e) in zip(cell_positions(size), exponents)]
 
-    The game is still pretty rough, but you can still have some fun.
 
-    Animation and color coming soon.
+@cache
+def neighbor_indices(size: int) -> tuple[tuple[int, int], ...]:
+    """
+    Return the grid indices of every pair of horizontally or vertically adjacent cells.
     """
-    Game.run(title="twenty-forty-eight", log="twenty-forty-eight.log", size=size)
+    pairs = []
+    for i in range(size):
+        for j in range(size):
+            if j + 1 < size:
+                pairs.append((idx(size, i, j), idx(size, i, j + 1)))
+            if i + 1 < size:
+                pairs.append((idx(size, i, j), idx(size, i + 1, j)))
+    return tuple(pairs)
 
 
-if __name__ == '__main__':
-    cli()
+@cache
+def line_indices(size: int, direction: Direction) -> tuple[tuple[int, ...], ...]:
+    """
+    Return the grid indices of each line of a board, in the order tiles slide toward ``direction``.
+    """
+    up_range = range(size)
+    down_range = range(size - 1, -1, -1)
+    if direction is Direction.EAST:
+        return tuple(tuple(idx(size, i, j) for j in down_range) for i in up_range)
+    elif direction is Direction.WEST:
+        return tuple(tuple(idx(size, i, j) for j in up_range) for i in up_range)
+    elif direction is Direction.NORTH:
+        return tuple(tuple(idx(size, i, j) for i in up_range) for j in up_range)
+    else:
+        return tuple(tuple(idx(size, i, j) for i in down_range) for j in up_range)
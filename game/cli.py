@@ -0,0 +1,260 @@
+"""
+The command line interface, installed as the ``game`` script.
+
+Each command imports what it needs when it runs, so ``game --help`` and
+headless commands never load the TUI.
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+
+from game.board import DEFAULT_BOARD_SIZE, GameError, check_size
+from game.tables import MAX_TABLE_SIZE, load_row_table
+
+cli = typer.Typer()
+
+
+def board_size_option(size: int) -> int:
+    try:
+        check_size(size)
+    except GameError as err:
+        raise typer.BadParameter(str(err))
+    return size
+
+
+@cli.command()
+def play(
+    size: int = typer.Option(
+        DEFAULT_BOARD_SIZE,
+        callback=board_size_option,
+        help="The size of the board (size x size).",
+    ),
+    record: Optional[Path] = typer.Option(
+        None,
+        help="Record every move of the game to this file. See 'replay'.",
+    ),
+    profile: Optional[Path] = typer.Option(
+        None,
+        help="Time the engine's hot paths and write the results here on exit (.prom for Prometheus, else JSON).",
+    ),
+):
+    """
+    Play 2048 with the size of board you specify.
+
+    The game is still pretty rough, but you can still have some fun.
+
+    Animation and color coming soon.
+    """
+    from game.tui import Game
+
+    # Enable the profiler after importing the TUI, so its hot paths are timed too.
+    profiler = None
+    if profile is not None:
+        from game.instrument import Profiler
+
+        profiler = Profiler()
+        profiler.enable()
+    try:
+        Game.run(title="twenty-forty-eight", log="twenty-forty-eight.log", size=size, record=record)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.snapshot().save(profile)
+
+
+@cli.command()
+def replay(
+    path: Path = typer.Argument(..., help="A game record written by 'play --record'."),
+    turn: Optional[int] = typer.Option(None, help="The turn to show. Defaults to the last one."),
+):
+    """
+    Show the board of a recorded game at any turn.
+    """
+    from game.record import GameRecord, RecordError
+
+    try:
+        with GameRecord(path) as record:
+            if turn is None:
+                turn = len(record)
+            board = record.board_at(turn)
+            turns = len(record)
+    except RecordError as err:
+        typer.echo(str(err), err=True)
+        raise typer.Exit(1)
+
+    typer.echo(board.pretty(), nl=False)
+    typer.echo(f"Turn {turn} of {turns}, score {board.score}")
+
+
+@cli.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="The address to listen on."),
+    port: int = typer.Option(2048, help="The port to listen on."),
+    size: int = typer.Option(
+        DEFAULT_BOARD_SIZE,
+        callback=board_size_option,
+        help="The board size for sessions that don't ask for one.",
+    ),
+    spill: Optional[Path] = typer.Option(
+        None,
+        help="Where to keep idle sessions. Defaults to a temporary file, removed on exit.",
+    ),
+    memory_budget: int = typer.Option(64, help="Megabytes of sessions to keep in memory."),
+):
+    """
+    Host games for network clients, speaking JSON lines over TCP.
+    """
+    import asyncio
+
+    from game.server import GameServer
+    from game.store import SessionStore
+
+    store = SessionStore(spill, memory_budget=memory_budget * 1024 * 1024)
+    typer.echo(f"Serving games on {host}:{port}")
+    try:
+        asyncio.run(GameServer(default_size=size, store=store).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+def simulate(
+    games: int = typer.Option(100, help="The number of games to play."),
+    policy: str = typer.Option("random", help="How to pick moves: random, corner or greedy."),
+    size: int = typer.Option(
+        DEFAULT_BOARD_SIZE,
+        callback=board_size_option,
+        help="The size of the board (size x size).",
+    ),
+    workers: int = typer.Option(
+        os.cpu_count() or 1,
+        help="The number of worker processes. Defaults to one per core.",
+    ),
+    seed: int = typer.Option(0, help="Game N is seeded with seed + N."),
+    output: Path = typer.Option(
+        Path("simulation.jsonl"),
+        help="Where to write one line of JSON per finished game.",
+    ),
+    use_tables: bool = typer.Option(True, "--tables/--no-tables", help="Mash with the row-transition tables."),
+    profile: Optional[Path] = typer.Option(
+        None,
+        help="Time the engine's hot paths and write the results here (.prom for Prometheus, else JSON).",
+    ),
+):
+    """
+    Play many games without the TUI and report how fast they went.
+    """
+    from game.instrument import Profiler
+    from game.simulate import PolicyName, simulate_to_file
+
+    try:
+        policy_name = PolicyName(policy.lower())
+    except ValueError:
+        raise typer.BadParameter(
+            f"Unknown policy {policy!r}. Choose from: {', '.join(p.value for p in PolicyName)}",
+            param_hint="--policy",
+        )
+
+    profiler = None if profile is None else Profiler()
+    summary = simulate_to_file(
+        output,
+        games,
+        policy_name=policy_name,
+        size=size,
+        workers=workers,
+        seed=seed,
+        use_tables=use_tables,
+        profiler=profiler,
+    )
+    typer.echo(f"Played {summary.games} games ({summary.moves} moves) in {summary.seconds:.2f}s")
+    typer.echo(f"Games per second: {summary.games_per_second:.1f}")
+    typer.echo(f"Moves per second: {summary.moves_per_second:.1f}")
+    typer.echo(f"Results written to {output}")
+    if profiler is not None:
+        profiler.snapshot().save(profile)
+        typer.echo(f"Profile written to {profile}")
+
+
+@cli.command()
+def bench(
+    output: Path = typer.Option(Path("bench.json"), help="Where to write the results as JSON."),
+    baseline: Optional[Path] = typer.Option(
+        None,
+        help="Results to compare against. Defaults to benchmarks/baseline.json in the repo.",
+    ),
+    tolerance: float = typer.Option(0.2, help="The fraction of baseline throughput a case may lose."),
+    size: Optional[List[int]] = typer.Option(None, help="A board size to run. May be repeated."),
+    case: Optional[List[str]] = typer.Option(None, help="A case to run, like GameBoard.move. May be repeated."),
+    min_time: float = typer.Option(0.05, help="Seconds to measure each case for."),
+    startup: bool = typer.Option(False, "--startup", help="Time imports and 'game --help' instead, and stop."),
+):
+    """
+    Benchmark the engine's hot paths and compare the results to a baseline.
+
+    Exits with status 1 if any case got slower than the baseline allows.
+    """
+    from game.benchmark import (
+        BENCHMARK_SIZES,
+        DEFAULT_BASELINE,
+        compare,
+        load_report,
+        measure_startup,
+        run_benchmarks,
+        save_report,
+    )
+
+    if startup:
+        for result in measure_startup():
+            typer.echo(f"{result.name:<20} {result.seconds * 1000:>8.1f} ms")
+        return
+
+    report = run_benchmarks(sizes=size or BENCHMARK_SIZES, names=case or None, min_time=min_time)
+    save_report(report, output)
+    for result in report.results:
+        typer.echo(
+            f"{result.name:<20} size={result.size} fill={result.fill:<4} "
+            f"{result.ops_per_sec:>12.1f} ops/s {result.alloc_bytes_per_call:>10.0f} B/call"
+        )
+    typer.echo(f"Results written to {output}")
+
+    baseline = baseline or DEFAULT_BASELINE
+    if not baseline.exists():
+        typer.echo(f"No baseline found at {baseline}")
+        return
+
+    regressions = compare(report, load_report(baseline), tolerance=tolerance)
+    for regression in regressions:
+        typer.echo(
+            f"REGRESSION {regression.name} size={regression.size} fill={regression.fill}: "
+            f"{regression.ops_per_sec:.1f} ops/s vs {regression.baseline_ops_per_sec:.1f} "
+            f"({regression.ratio:.0%} of baseline)"
+        )
+    if regressions:
+        raise typer.Exit(1)
+    typer.echo(f"No regressions against {baseline}")
+
+
+@cli.command()
+def tables(
+    size: List[int] = typer.Option(
+        list(range(3, MAX_TABLE_SIZE + 1)),
+        help="The row length to build a table for. May be repeated.",
+    ),
+    directory: Optional[Path] = typer.Option(
+        None,
+        help="Where to keep the tables. Defaults to the user cache directory.",
+    ),
+):
+    """
+    Build the row-transition tables that speed up mashing and save them to disk.
+    """
+    for table_size in size:
+        table = load_row_table(table_size, directory)
+        typer.echo(f"Row table for size {table_size}: {len(table)} rows")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,149 @@
+"""
+A packed corpus of board positions.
+
+After a short header, the file is a run of fixed-width records, one per
+board, each holding one exponent byte per cell in row-major order (0 for an
+empty cell). The file is mapped rather than read, so opening a corpus of
+millions of boards costs nothing up front. A record becomes a ``GameBoard``
+only when it is accessed, and ranges of records can be viewed as a numpy
+array without copying, or loaded into a ``BatchBoard`` in one copy.
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from buzz import Buzz
+
+from game.board import GameBoard, decode_grid, encode_grid
+
+CORPUS_MAGIC = b"2048CORP"
+CORPUS_VERSION = 1
+CORPUS_HEADER = struct.Struct("<8sHBx")
+
+
+class CorpusError(Buzz):
+    pass
+
+
+def encode_board(board: GameBoard) -> bytes:
+    return encode_grid(board.grid)
+
+
+def decode_board(record, size: int) -> GameBoard:
+    return GameBoard(size=size, grid=decode_grid(record, size))
+
+
+def save_corpus(path: Path, boards: Iterable[GameBoard], size: int, append: bool = False) -> int:
+    """
+    Write ``boards`` to a corpus at ``path``, or add them to the end of an existing one.
+
+    Every board must be ``size`` x ``size``. Returns the number of boards written.
+    """
+    if append and path.exists():
+        with Corpus(path) as corpus:
+            CorpusError.require_condition(
+                corpus.size == size,
+                f"Can't add {size}x{size} boards to a corpus of {corpus.size}x{corpus.size} boards",
+            )
+        mode = "ab"
+    else:
+        mode = "wb"
+
+    count = 0
+    with open(path, mode) as file:
+        if mode == "wb":
+            file.write(CORPUS_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, size))
+        for board in boards:
+            CorpusError.require_condition(
+                board.size == size,
+                f"Can't add a {board.size}x{board.size} board to a corpus of {size}x{size} boards",
+            )
+            file.write(encode_board(board))
+            count += 1
+    return count
+
+
+class Corpus:
+    """
+    A read-only, memory-mapped view of a corpus file.
+
+    Indexing returns a new ``GameBoard`` built from just that record.
+    Records appended after the corpus was opened are not seen.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as file:
+            with CorpusError.handle_errors(f"{path} is empty or unreadable"):
+                self.source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with CorpusError.handle_errors(f"Invalid corpus header in {path}"):
+            (magic, version, size) = CORPUS_HEADER.unpack_from(self.source)
+        CorpusError.require_condition(magic == CORPUS_MAGIC, f"{path} is not a board corpus")
+        CorpusError.require_condition(version == CORPUS_VERSION, f"{path} has an unsupported version: {version}")
+        CorpusError.require_condition(size > 0, f"{path} is corrupt")
+        self.size = size
+        self.record_size = size * size
+        (self.count, extra) = divmod(len(self.source) - CORPUS_HEADER.size, self.record_size)
+        CorpusError.require_condition(extra == 0, f"{path} is truncated or corrupt")
+        self.view = memoryview(self.source)[CORPUS_HEADER.size:]
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> GameBoard:
+        return decode_board(self.record(index), self.size)
+
+    def __iter__(self) -> Iterator[GameBoard]:
+        for index in range(self.count):
+            yield self[index]
+
+    def record(self, index: int) -> memoryview:
+        """
+        Return the raw exponents of one board, without building it.
+        """
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"No board {index} in a corpus of {self.count}")
+        start = index * self.record_size
+        return self.view[start:start + self.record_size]
+
+    def exponents(self, start: int = 0, stop: int | None = None):
+        """
+        Return the exponents of a range of boards as a read-only numpy array, shaped (boards, size, size).
+
+        The array is a view of the mapped file; nothing is copied. Drop it
+        before closing the corpus.
+        """
+        import numpy as np
+
+        stop = self.count if stop is None else min(stop, self.count)
+        start = min(start, stop)
+        array = np.frombuffer(
+            self.view,
+            dtype=np.uint8,
+            count=(stop - start) * self.record_size,
+            offset=start * self.record_size,
+        )
+        return array.reshape(stop - start, self.size, self.size)
+
+    def batch(self, start: int = 0, stop: int | None = None):
+        """
+        Load a range of boards into a ``BatchBoard``.
+        """
+        from game.batch import BatchBoard
+
+        return BatchBoard(self.exponents(start, stop).copy())
+
+    def close(self):
+        self.view.release()
+        self.source.close()
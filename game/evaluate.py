@@ -0,0 +1,234 @@
+"""
+Static evaluation of boards for search agents, by table lookup.
+
+A board is scored from its rows and columns. Each line contributes the same
+terms wherever it sits on the board:
+
+- ``empty``: the number of empty cells (counted on rows only, so each cell
+  counts once);
+- ``monotonicity``: minus the smaller of the total rise and the total fall
+  in exponent along the line, so 0 for a line that only climbs or only falls;
+- ``smoothness``: minus the summed exponent gaps between neighboring tiles,
+  skipping empty cells;
+- ``merges``: the number of neighboring tiles, again skipping empty cells,
+  that are equal and could merge.
+
+``corner`` rewards boards whose big tiles lean toward one corner. It weighs
+every exponent by its distance from the opposite corner and keeps the best
+of the four corners. That weighting splits into a part per row and a part
+per column position, so it is a lookup per row too.
+
+All of these terms are computed once, with array operations, for every
+packed row a ``game.tables`` row table covers. A ``Heuristic`` folds them
+into two weighted tables, one for rows and one for columns. Scoring a board
+then takes two lookups per line plus three for the corner term, and a
+``BatchBoard``'s worth of boards takes the same lookups as array indexing.
+"""
+
+from functools import cache, cached_property
+from typing import NamedTuple
+
+import numpy as np
+
+from game.batch import BatchBoard, compact_rows
+from game.bitboard import BITBOARD_SIZE, ROW_MASK, transpose
+from game.board import GameBoard, GameError
+from game.tables import CELL_BITS, CELL_MASK, MAX_EXPONENT, MAX_TABLE_SIZE, encode_values
+
+
+class Weights(NamedTuple):
+    """
+    How much each term counts toward a board's score.
+
+    ``base`` is added to every score. ``game.ai.Expectimax`` scores a lost
+    board as 0, so the default keeps ordinary 4x4 boards above that.
+    """
+    empty: float = 2.7
+    monotonicity: float = 1.0
+    smoothness: float = 0.1
+    merges: float = 1.0
+    corner: float = 0.1
+    base: float = 1000.0
+
+
+class LineTerms(NamedTuple):
+    empty: int
+    monotonicity: int
+    smoothness: int
+    merges: int
+
+
+def line_terms(exponents: list[int]) -> LineTerms:
+    """
+    Compute the terms of one line of exponents directly, with 0 for an empty cell.
+
+    This is what the tables hold for every packed row.
+    """
+    rises = sum(max(b - a, 0) for (a, b) in zip(exponents, exponents[1:]))
+    falls = sum(max(a - b, 0) for (a, b) in zip(exponents, exponents[1:]))
+    tiles = [e for e in exponents if e != 0]
+    neighbors = list(zip(tiles, tiles[1:]))
+    return LineTerms(
+        empty=len(exponents) - len(tiles),
+        monotonicity=-min(rises, falls),
+        smoothness=-sum(abs(a - b) for (a, b) in neighbors),
+        merges=sum(a == b for (a, b) in neighbors),
+    )
+
+
+class TermTables(NamedTuple):
+    """
+    The unweighted terms of every packed row of one size, indexed by the row.
+
+    ``totals`` is the sum of a row's exponents, and ``leans`` the sum of each
+    exponent times its distance from column 0. Together they give the
+    corner term.
+    """
+    empty: np.ndarray
+    monotonicity: np.ndarray
+    smoothness: np.ndarray
+    merges: np.ndarray
+    totals: np.ndarray
+    leans: np.ndarray
+
+
+@cache
+def term_tables(size: int) -> TermTables:
+    GameError.require_condition(
+        1 <= size <= MAX_TABLE_SIZE,
+        f"Evaluation tables are only built for sizes up to {MAX_TABLE_SIZE}",
+    )
+    packed = np.arange(1 << (CELL_BITS * size), dtype=np.int64)
+    shifts = CELL_BITS * np.arange(size, dtype=np.int64)
+    rows = ((packed[:, None] >> shifts) & CELL_MASK).astype(np.int32)
+
+    steps = rows[:, 1:] - rows[:, :-1]
+    rises = np.maximum(steps, 0).sum(axis=1)
+    falls = np.maximum(-steps, 0).sum(axis=1)
+
+    tiles = compact_rows(rows)
+    (left, right) = (tiles[:, :-1], tiles[:, 1:])
+    paired = right != 0
+    return TermTables(
+        empty=(rows == 0).sum(axis=1, dtype=np.int32),
+        monotonicity=-np.minimum(rises, falls).astype(np.int32),
+        smoothness=-(np.abs(left - right) * paired).sum(axis=1, dtype=np.int32),
+        merges=((left == right) & paired).sum(axis=1, dtype=np.int32),
+        totals=rows.sum(axis=1, dtype=np.int32),
+        leans=(rows * np.arange(size, dtype=np.int32)).sum(axis=1, dtype=np.int32),
+    )
+
+
+def pack_exponents(exponents: np.ndarray) -> np.ndarray:
+    """
+    Pack the last axis of an exponent array into row-table indices.
+    """
+    GameError.require_condition(
+        exponents.size == 0 or int(exponents.max()) <= MAX_EXPONENT,
+        f"Tiles bigger than {1 << MAX_EXPONENT} can't be evaluated",
+    )
+    shifts = CELL_BITS * np.arange(exponents.shape[-1], dtype=np.int64)
+    return (exponents.astype(np.int64) << shifts).sum(axis=-1)
+
+
+class Heuristic:
+    """
+    Scores boards of one size with a fixed set of weights.
+
+    ``evaluate`` scores a ``GameBoard``, ``evaluate_cells`` a 4x4 bitboard
+    (it fits ``game.ai.Expectimax``'s ``evaluate`` argument), and
+    ``evaluate_batch`` a ``BatchBoard`` or an ``(N, size, size)`` exponent
+    array. All three agree on the same board.
+    """
+
+    def __init__(self, size: int = BITBOARD_SIZE, weights: Weights = Weights()):
+        tables = term_tables(size)
+        self.size = size
+        self.weights = weights
+        line = (
+            weights.monotonicity * tables.monotonicity
+            + weights.smoothness * tables.smoothness
+            + weights.merges * tables.merges
+        )
+        self.row_scores = line + weights.empty * tables.empty
+        self.column_scores = line
+        self.totals = tables.totals
+        self.leans = tables.leans
+
+    def __repr__(self) -> str:
+        return f"Heuristic(size={self.size!r}, weights={self.weights!r})"
+
+    @cached_property
+    def _lists(self) -> tuple[list[float], list[float], list[int], list[int]]:
+        # Lists index faster than arrays one item at a time.
+        return (self.row_scores.tolist(), self.column_scores.tolist(), self.totals.tolist(), self.leans.tolist())
+
+    def score_rows(self, rows: list[int], columns: list[int]) -> float:
+        """
+        Score a board from its packed rows and packed columns.
+        """
+        (row_scores, column_scores, totals, leans) = self._lists
+        score = self.weights.base
+        (down, right, total) = (0, 0, 0)
+        for (i, row) in enumerate(rows):
+            score += row_scores[row]
+            t = totals[row]
+            down += i * t
+            right += leans[row]
+            total += t
+        for column in columns:
+            score += column_scores[column]
+
+        # Weighing each exponent by (row + col), its distance from the top
+        # left corner, or by the mirrored distances for the other corners,
+        # splits into a row part and a column part, so the best corner takes
+        # the best of each.
+        last = (self.size - 1) * total
+        return score + self.weights.corner * (max(down, last - down) + max(right, last - right))
+
+    def evaluate(self, board: GameBoard) -> float:
+        GameError.require_condition(
+            board.size == self.size,
+            f"This heuristic scores {self.size}x{self.size} boards",
+        )
+        values = [tile.value for tile in board.grid]
+        size = self.size
+        rows = [encode_values(values[i * size:(i + 1) * size]) for i in range(size)]
+        columns = [encode_values(values[j::size]) for j in range(size)]
+        GameError.require_condition(
+            None not in rows and None not in columns,
+            f"Tiles bigger than {1 << MAX_EXPONENT} can't be evaluated",
+        )
+        return self.score_rows(rows, columns)
+
+    def evaluate_cells(self, cells: int) -> float:
+        GameError.require_condition(self.size == BITBOARD_SIZE, "Only a 4x4 heuristic can score bitboards")
+        flipped = transpose(cells)
+        return self.score_rows(
+            [cells & ROW_MASK, (cells >> 16) & ROW_MASK, (cells >> 32) & ROW_MASK, cells >> 48],
+            [flipped & ROW_MASK, (flipped >> 16) & ROW_MASK, (flipped >> 32) & ROW_MASK, flipped >> 48],
+        )
+
+    def evaluate_batch(self, boards: BatchBoard | np.ndarray) -> np.ndarray:
+        """
+        Score every board in a batch, returning one float per board.
+        """
+        exponents = boards.exponents if isinstance(boards, BatchBoard) else boards
+        GameError.require_condition(
+            exponents.ndim == 3 and exponents.shape[1:] == (self.size, self.size),
+            f"Boards must be an (N, {self.size}, {self.size}) array",
+        )
+        rows = pack_exponents(exponents)
+        columns = pack_exponents(exponents.transpose(0, 2, 1))
+        totals = self.totals[rows]
+        last = self.size - 1
+        down = (totals * np.arange(self.size)).sum(axis=1)
+        right = self.leans[rows].sum(axis=1)
+        total = totals.sum(axis=1)
+        corner = np.maximum(down, last * total - down) + np.maximum(right, last * total - right)
+        return (
+            self.weights.base
+            + self.row_scores[rows].sum(axis=1)
+            + self.column_scores[columns].sum(axis=1)
+            + self.weights.corner * corner
+        )
@@ -0,0 +1,135 @@
+"""
+Undo and redo for a board, kept as a log of reversible deltas.
+
+A turn is stored as the score it gained and, for each cell it changed, the
+cell's index with its exponent before and after (0 for an empty cell). That
+is a few bytes per changed cell, however big the board is, and applying the
+changes backward or forward steps the board back or ahead one turn.
+"""
+
+import struct
+from collections import deque
+
+from buzz import Buzz
+
+from game.board import Direction, GameBoard, GameOverError, Move, MoveFrame, Position, idx, value_to_exponent
+
+DEFAULT_HISTORY_LIMIT = 1000
+
+SCORE = struct.Struct("<I")
+CHANGE = struct.Struct("<HBB")
+
+
+class HistoryError(Buzz):
+    pass
+
+
+def encode_turn(frame: MoveFrame, gained: int, size: int) -> bytes:
+    """
+    Pack the cell changes of a ``MoveFrame`` from ``GameBoard.move`` into bytes.
+    """
+    parts = [SCORE.pack(gained)]
+    for move in frame.moves:
+        pos = move.final_pos
+        parts.append(CHANGE.pack(
+            idx(size, pos.row, pos.col),
+            value_to_exponent(move.start_value),
+            value_to_exponent(move.final_value),
+        ))
+    return b"".join(parts)
+
+
+def decode_turn(data: bytes, size: int) -> tuple[MoveFrame, int]:
+    (gained,) = SCORE.unpack_from(data)
+    moves = []
+    for (k, start, final) in CHANGE.iter_unpack(data[SCORE.size:]):
+        pos = Position.make(*divmod(k, size))
+        moves.append(Move(pos, pos, 1 << start if start else None, 1 << final if final else None))
+    return (MoveFrame(moves=moves), gained)
+
+
+class History:
+    """
+    The undo and redo stacks for one board.
+
+    At most ``limit`` turns can be undone; older ones are dropped as new
+    turns come in. Pass None to keep every turn. Playing a new turn clears
+    the redo stack.
+    """
+
+    def __init__(self, board: GameBoard, limit: int | None = DEFAULT_HISTORY_LIMIT):
+        HistoryError.require_condition(limit is None or limit > 0, "History limit must be positive")
+        self.board = board
+        self.limit = limit
+        self.undo_stack: deque[bytes] = deque(maxlen=limit)
+        self.redo_stack: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self.undo_stack)
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self.undo_stack) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return len(self.redo_stack) > 0
+
+    def push(self, frame: MoveFrame, gained: int):
+        """
+        Add a turn that was just played on the board.
+        """
+        self.undo_stack.append(encode_turn(frame, gained, self.board.size))
+        self.redo_stack.clear()
+
+    def move(self, direction: Direction) -> MoveFrame:
+        """
+        Play ``direction`` on the board like ``GameBoard.move`` and add the turn.
+
+        Returns the cells that changed. The final turn of a game is added
+        before ``GameOverError`` is raised, so it can be undone.
+        """
+        frame = MoveFrame(moves=[])
+        score = self.board.score
+        try:
+            self.board.move(direction, frame)
+        except GameOverError:
+            self.push(frame, self.board.score - score)
+            raise
+        self.push(frame, self.board.score - score)
+        return frame
+
+    def undo(self) -> MoveFrame:
+        """
+        Step the board back one turn, and return the cells that changed.
+        """
+        HistoryError.require_condition(self.can_undo, "Nothing to undo")
+        data = self.undo_stack.pop()
+        (frame, gained) = decode_turn(data, self.board.size)
+        frame.moves.reverse()
+        for move in frame.moves:
+            (move.start_value, move.final_value) = (move.final_value, move.start_value)
+        self._apply(frame)
+        self.board.score -= gained
+        self.redo_stack.append(data)
+        return frame
+
+    def redo(self) -> MoveFrame:
+        """
+        Play an undone turn again, and return the cells that changed.
+        """
+        HistoryError.require_condition(self.can_redo, "Nothing to redo")
+        data = self.redo_stack.pop()
+        (frame, gained) = decode_turn(data, self.board.size)
+        self._apply(frame)
+        self.board.score += gained
+        self.undo_stack.append(data)
+        return frame
+
+    def _apply(self, frame: MoveFrame):
+        for move in frame.moves:
+            self.board.put(move.final_pos.row, move.final_pos.col, move.final_value)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
@@ -0,0 +1,263 @@
+"""
+Opt-in timing of the engine's hot paths.
+
+Nothing here costs anything until a ``Profiler`` is enabled: the hot
+methods listed in ``HOT_PATHS`` are only wrapped while one is, and the
+originals are put back when it is disabled. While enabled, every call is
+counted and its latency added to a histogram with fixed, log-spaced
+buckets, so snapshots from different runs can be compared and merged.
+
+Snapshots can be written as JSON or in the Prometheus text format::
+
+    with Profiler() as profiler:
+        play_some_games()
+    print(profiler.snapshot().to_prometheus())
+"""
+
+import inspect
+import sys
+from bisect import bisect_left
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+
+from buzz import Buzz
+from pydantic import BaseModel
+
+# Upper bounds of the latency buckets, in seconds. Calls slower than the
+# last bound land in a final overflow bucket.
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6,
+    1e-5, 2.5e-5, 5e-5,
+    1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3,
+    1e-2, 2.5e-2, 5e-2,
+    1e-1,
+)
+
+# The methods a profiler times, as "module:Class.method". They are looked
+# up when a profiler is enabled, and those in modules nobody has imported
+# yet are skipped, so profiling a headless run never loads the TUI.
+HOT_PATHS = (
+    "game.board:Slice.mash",
+    "game.board:GameBoard.slice",
+    "game.board:GameBoard.can_mash",
+    "game.board:GameBoard._mash",
+    "game.board:GameBoard.has_move",
+    "game.board:GameBoard.afterstates",
+    "game.board:GameBoard.sprinkle",
+    "game.board:GameBoard.move",
+    "game.tui:TuiBoard.show",
+    "game.tui:TuiTile.render",
+)
+
+METRIC_NAME = "game_call_seconds"
+
+
+class ProfileError(Buzz):
+    pass
+
+
+class Histogram:
+    """
+    The call count, total time and latency buckets of one function.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+class HistogramSnapshot(BaseModel):
+    name: str
+    count: int
+    total_seconds: float
+    bounds: list[float]
+    counts: list[int]
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Return the upper bound of the bucket holding the ``q`` quantile, or infinity past the last bound.
+        """
+        target = q * self.count
+        seen = 0
+        for (bound, count) in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= target and seen > 0:
+                return bound
+        return float("inf")
+
+
+class ProfileSnapshot(BaseModel):
+    histograms: list[HistogramSnapshot]
+
+    def histogram(self, name: str) -> HistogramSnapshot:
+        found = next((h for h in self.histograms if h.name == name), None)
+        ProfileError.require_condition(found is not None, f"No histogram for {name}")
+        return found
+
+    def to_prometheus(self) -> str:
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in the engine's hot paths.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for histogram in self.histograms:
+            label = f'function="{histogram.name}"'
+            cumulative = 0
+            for (bound, count) in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{METRIC_NAME}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f"{METRIC_NAME}_sum{{{label}}} {histogram.total_seconds!r}")
+            lines.append(f"{METRIC_NAME}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: Path):
+        """
+        Write the snapshot to ``path``: in the Prometheus text format for a .prom or .txt file, or else as JSON.
+        """
+        if path.suffix in (".prom", ".txt"):
+            path.write_text(self.to_prometheus())
+        else:
+            path.write_text(self.json(indent=2) + "\n")
+
+
+def _resolve(path: str) -> tuple[type, str, str] | None:
+    (module_name, qualified) = path.split(":")
+    (class_name, attribute) = qualified.split(".")
+    module = sys.modules.get(module_name)
+    if module is None:
+        return None
+    return (getattr(module, class_name), attribute, f"{class_name}.{attribute.lstrip('_')}")
+
+
+def _timed(function, histogram: Histogram):
+    record = histogram.record
+
+    if inspect.isgeneratorfunction(function):
+        # Time only the work done inside the generator, not the caller's
+        # work between the items it takes.
+        @wraps(function)
+        def timed_generator(*args, **kwargs):
+            started = perf_counter()
+            items = function(*args, **kwargs)
+            elapsed = perf_counter() - started
+            try:
+                while True:
+                    started = perf_counter()
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += perf_counter() - started
+                    yield item
+            finally:
+                record(elapsed)
+
+        return timed_generator
+
+    @wraps(function)
+    def timed(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(perf_counter() - started)
+
+    return timed
+
+
+class Profiler:
+    """
+    Counts and times calls to the hot paths while enabled.
+
+    Only one profiler can be enabled at a time, since enabling one wraps
+    the methods for every board in the process. Histograms are kept across
+    enables until ``reset()``.
+    """
+
+    active: "Profiler | None" = None
+
+    def __init__(self, paths: tuple[str, ...] = HOT_PATHS, bounds: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.paths = paths
+        self.bounds = bounds
+        self.histograms: dict[str, Histogram] = {}
+        self.originals: list[tuple[type, str, object]] = []
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *_):
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return Profiler.active is self
+
+    def enable(self):
+        ProfileError.require_condition(Profiler.active is None, "Another profiler is already enabled")
+        for path in self.paths:
+            resolved = _resolve(path)
+            if resolved is None:
+                continue
+            (owner, attribute, name) = resolved
+            histogram = self.histograms.setdefault(name, Histogram(self.bounds))
+            original = owner.__dict__[attribute]
+            self.originals.append((owner, attribute, original))
+            setattr(owner, attribute, _timed(original, histogram))
+        Profiler.active = self
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for (owner, attribute, original) in reversed(self.originals):
+            setattr(owner, attribute, original)
+        self.originals.clear()
+        Profiler.active = None
+
+    def reset(self):
+        self.histograms.clear()
+        if self.enabled:
+            self.disable()
+            self.enable()
+
+    def merge(self, snapshot: ProfileSnapshot):
+        """
+        Add the counts from a snapshot taken elsewhere, such as in a worker process.
+        """
+        for taken in snapshot.histograms:
+            ProfileError.require_condition(
+                tuple(taken.bounds) == self.bounds,
+                f"Can't merge {taken.name}: its buckets don't match",
+            )
+            histogram = self.histograms.setdefault(taken.name, Histogram(self.bounds))
+            histogram.counts = [a + b for (a, b) in zip(histogram.counts, taken.counts)]
+            histogram.count += taken.count
+            histogram.total += taken.total_seconds
+
+    def snapshot(self) -> ProfileSnapshot:
+        return ProfileSnapshot(histograms=[
+            HistogramSnapshot(
+                name=name,
+                count=histogram.count,
+                total_seconds=histogram.total,
+                bounds=list(self.bounds),
+                counts=list(histogram.counts),
+            )
+            for (name, histogram) in sorted(self.histograms.items())
+        ])
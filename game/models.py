@@ -0,0 +1,105 @@
+"""
+Pydantic models of the game, for saving and loading.
+
+The engine in ``game.board`` works on plain ``__slots__`` classes so that
+moving tiles around does not pay for validation. These models mirror them
+field for field; convert with ``from_core()`` and ``to_core()`` at the edges
+where a board is written out or read back in.
+"""
+
+from pydantic import BaseModel
+
+from game.board import Context, GameBoard, Move, MoveFrame, Position, Tile
+
+
+class PositionModel(BaseModel):
+    row: int
+    col: int
+
+    @classmethod
+    def from_core(cls, pos: Position) -> "PositionModel":
+        return cls(row=pos.row, col=pos.col)
+
+    def to_core(self) -> Position:
+        return Position.make(self.row, self.col)
+
+
+class TileModel(BaseModel):
+    pos: PositionModel
+    value: int | None = None
+
+    @classmethod
+    def from_core(cls, tile: Tile) -> "TileModel":
+        return cls(pos=PositionModel.from_core(tile.pos), value=tile.value)
+
+    def to_core(self) -> Tile:
+        return Tile(pos=self.pos.to_core(), value=self.value)
+
+
+class MoveModel(BaseModel):
+    start_pos: PositionModel
+    final_pos: PositionModel
+    start_value: int | None
+    final_value: int | None
+
+    @classmethod
+    def from_core(cls, move: Move) -> "MoveModel":
+        return cls(
+            start_pos=PositionModel.from_core(move.start_pos),
+            final_pos=PositionModel.from_core(move.final_pos),
+            start_value=move.start_value,
+            final_value=move.final_value,
+        )
+
+    def to_core(self) -> Move:
+        return Move(
+            start_pos=self.start_pos.to_core(),
+            final_pos=self.final_pos.to_core(),
+            start_value=self.start_value,
+            final_value=self.final_value,
+        )
+
+
+class MoveFrameModel(BaseModel):
+    moves: list[MoveModel]
+
+    @classmethod
+    def from_core(cls, frame: MoveFrame) -> "MoveFrameModel":
+        return cls(moves=[MoveModel.from_core(m) for m in frame.moves])
+
+    def to_core(self) -> MoveFrame:
+        return MoveFrame(moves=[m.to_core() for m in self.moves])
+
+
+class ContextModel(BaseModel):
+    turn: int
+    score: int
+    history: list[MoveFrameModel]
+
+    @classmethod
+    def from_core(cls, context: Context) -> "ContextModel":
+        return cls(
+            turn=context.turn,
+            score=context.score,
+            history=[MoveFrameModel.from_core(f) for f in context.history],
+        )
+
+    def to_core(self) -> Context:
+        return Context(turn=self.turn, score=self.score, history=[f.to_core() for f in self.history])
+
+
+class GameBoardModel(BaseModel):
+    size: int
+    grid: list[TileModel] = []
+    score: int = 0
+
+    @classmethod
+    def from_core(cls, board: GameBoard) -> "GameBoardModel":
+        return cls(
+            size=board.size,
+            grid=[TileModel.from_core(t) for t in board.grid],
+            score=board.score,
+        )
+
+    def to_core(self) -> GameBoard:
+        return GameBoard(size=self.size, grid=[t.to_core() for t in self.grid], score=self.score)
@@ -0,0 +1,205 @@
+"""
+An engine for big boards that keeps one board in a packed array.
+
+``GameBoard`` holds a ``Tile`` object per cell, which is fine at 4x4 but
+means a move on a 32x32 board walks and rewrites a thousand objects.
+``PackedBoard`` stores the exponents of its cells in one ``(size, size)``
+uint8 array instead, where 0 is an empty cell and ``k`` is a tile with value
+``2 ** k``, and mashes all of its rows with a fixed number of array
+operations. The cost of a move grows with the number of tiles, and copying
+a board is a single array copy.
+"""
+
+from random import choice, random
+
+import numpy as np
+
+from game.batch import EXPONENT_DTYPE, orient
+from game.board import (
+    SPAWN_HIGH,
+    SPAWN_LOW,
+    SPAWN_LOW_ODDS,
+    BadMoveError,
+    Direction,
+    GameBoard,
+    GameError,
+    GameOverError,
+    SpawnSource,
+    check_size,
+    decode_grid,
+    value_to_exponent,
+)
+
+
+def merge_rows(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mash every row of an ``(M, n)`` exponent array toward column 0.
+
+    This gives the same result as ``game.batch.mash_rows``, but works on the
+    tiles alone, in one flat run over all the rows, instead of looping over
+    the columns. Equal tiles next to each other in a row form runs, and
+    within a run the tiles at odd offsets merge into the one before them.
+    Returns the mashed rows and the score gained by each row.
+    """
+    (row_ids, col_ids) = np.nonzero(rows)
+    values = rows[row_ids, col_ids]
+    offsets = np.arange(len(values))
+    repeat = np.zeros(len(values), dtype=bool)
+    repeat[1:] = (values[1:] == values[:-1]) & (row_ids[1:] == row_ids[:-1])
+
+    # The offset where each run starts, carried forward to the rest of the run.
+    starts = np.maximum.accumulate(np.where(repeat, 0, offsets))
+    merged = repeat & ((offsets - starts) % 2 == 1)
+    heads = np.zeros(len(values), dtype=bool)
+    heads[:-1] = merged[1:]
+    values[heads] += 1
+    gained = np.left_shift(1, values[heads], dtype=np.int64)
+    scores = np.bincount(row_ids[heads], weights=gained, minlength=len(rows)).astype(np.int64)
+
+    # Slide what is left of each row up to column 0.
+    kept = ~merged
+    (values, row_ids) = (values[kept], row_ids[kept])
+    offsets = offsets[:len(values)]
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = row_ids[1:] != row_ids[:-1]
+    cols = offsets - np.maximum.accumulate(np.where(first, offsets, 0))
+    mashed = np.zeros_like(rows)
+    mashed[row_ids, cols] = values
+    return (mashed, scores)
+
+
+class PackedBoard:
+    """
+    A single board stored as an array of tile exponents.
+
+    It plays by the same rules as ``GameBoard`` and draws new tiles from
+    ``spawns`` the same way, so the two engines given equal spawn sources
+    play out the same game. Convert with ``from_game_board()`` and
+    ``to_game_board()``.
+    """
+
+    def __init__(self, exponents: np.ndarray, score: int = 0, spawns: SpawnSource | None = None):
+        GameError.require_condition(
+            exponents.ndim == 2 and exponents.shape[0] == exponents.shape[1],
+            "A packed board must be a (size, size) array",
+        )
+        check_size(exponents.shape[0])
+        self.exponents = exponents.astype(EXPONENT_DTYPE, copy=False)
+        self.score = score
+        self.spawns = spawns
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedBoard):
+            return NotImplemented
+        return self.score == other.score and np.array_equal(self.exponents, other.exponents)
+
+    def __repr__(self) -> str:
+        return f"PackedBoard(size={self.size!r}, score={self.score!r})"
+
+    @property
+    def size(self) -> int:
+        return self.exponents.shape[0]
+
+    @classmethod
+    def empty(cls, size: int, spawns: SpawnSource | None = None) -> "PackedBoard":
+        check_size(size)
+        return cls(np.zeros((size, size), dtype=EXPONENT_DTYPE), spawns=spawns)
+
+    def copy(self, deep: bool = False) -> "PackedBoard":
+        """
+        Copy the board.
+
+        The cells are always copied. Like ``GameBoard.copy``, only a deep
+        copy gets its own spawn source.
+        """
+        spawns = self.spawns.copy() if deep and self.spawns is not None else self.spawns
+        return PackedBoard(self.exponents.copy(), score=self.score, spawns=spawns)
+
+    @classmethod
+    def from_game_board(cls, board: GameBoard) -> "PackedBoard":
+        exponents = np.zeros(board.size * board.size, dtype=EXPONENT_DTYPE)
+        for (k, tile) in enumerate(board.grid):
+            if tile.value is not None:
+                exponents[k] = value_to_exponent(tile.value)
+        return cls(exponents.reshape(board.size, board.size), score=board.score, spawns=board.spawns)
+
+    def to_game_board(self) -> GameBoard:
+        grid = decode_grid(self.exponents.ravel().tolist(), self.size)
+        return GameBoard(size=self.size, grid=grid, score=self.score, spawns=self.spawns)
+
+    def reset(self, should_sprinkle=True):
+        self.score = 0
+        self.exponents[...] = 0
+        if should_sprinkle:
+            self.sprinkle()
+            self.sprinkle()
+
+    def value(self, row: int, col: int) -> int | None:
+        exponent = int(self.exponents[row, col])
+        return 1 << exponent if exponent else None
+
+    @property
+    def empty_count(self) -> int:
+        return self.exponents.size - np.count_nonzero(self.exponents)
+
+    def has_move(self) -> bool:
+        exponents = self.exponents
+        tiles = np.count_nonzero(exponents)
+        if tiles < exponents.size:
+            return tiles > 0
+        return bool((exponents[:, :-1] == exponents[:, 1:]).any() or (exponents[:-1, :] == exponents[1:, :]).any())
+
+    def can_mash(self, direction: Direction) -> bool:
+        # A row can mash if a tile has an empty cell before it, or matches
+        # the tile before it.
+        rows = orient(self.exponents[None], direction)[0]
+        (left, right) = (rows[:, :-1], rows[:, 1:])
+        return bool(((right != 0) & ((left == 0) | (left == right))).any())
+
+    def mash(self, direction: Direction) -> int:
+        (score, _) = self._mash(direction)
+        return score
+
+    def _mash(self, direction: Direction) -> tuple[int, bool]:
+        rows = orient(self.exponents[None], direction)[0]
+        (mashed, scores) = merge_rows(rows)
+        changed = not np.array_equal(mashed, rows)
+        if changed:
+            rows[...] = mashed
+        return (int(scores.sum()), changed)
+
+    def sprinkle(self) -> tuple[int, int, int]:
+        """
+        Drop a 2 (90% of the time) or a 4 on a random empty cell.
+
+        Returns the row, column and value of the new tile. The empty cells
+        are taken in row-major order, as ``GameBoard.sprinkle`` does.
+        """
+        empty = np.flatnonzero(self.exponents == 0)
+        GameError.require_condition(len(empty) > 0, "Can't sprinkle a full board")
+        if self.spawns is None:
+            k = int(choice(empty))
+            value = SPAWN_LOW if random() < SPAWN_LOW_ODDS else SPAWN_HIGH
+        else:
+            (pick, value) = self.spawns.draw()
+            k = int(empty[int(pick * len(empty))])
+        (row, col) = divmod(k, self.size)
+        self.exponents[row, col] = value_to_exponent(value)
+        return (row, col, value)
+
+    def step(self, direction: Direction) -> tuple[int, int, int]:
+        """
+        Mash toward ``direction`` and sprinkle a new tile, without checking for game over.
+        """
+        (score, changed) = self._mash(direction)
+        BadMoveError.require_condition(changed, f"Can't move {direction}")
+        self.score += score
+        return self.sprinkle()
+
+    def move(self, direction: Direction) -> tuple[int, int, int]:
+        spawned = self.step(direction)
+        GameOverError.require_condition(
+            self.has_move(),
+            "Game Over! (No moves left)"
+        )
+        return spawned
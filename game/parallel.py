@@ -0,0 +1,276 @@
+"""
+Expectimax spread over worker processes that share one transposition table.
+
+The root moves and the first layer of chance nodes below them are split
+into jobs: one for each (move, empty cell, spawned value). Each job searches
+the max node under one spawn. The table the workers search with lives in
+``multiprocessing.shared_memory``, so a position one worker has searched is
+a hit for all the others instead of being searched again in every process.
+"""
+
+import multiprocessing
+import os
+import time
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+from game.ai import SPAWN_ODDS, Evaluator, Expectimax, empty_cell_heuristic
+from game.bitboard import BITBOARD_SIZE, BitBoard, ROW_CHANGED, mash_cells, row_tables, zero_nibbles
+from game.board import MASK_64, Direction, GameBoard, GameError, GameOverError, mix_64
+from game.tables import load_row_table
+
+DEFAULT_TABLE_SLOTS = 1 << 20
+
+# Each slot is a check word and a value, 8 bytes apiece.
+SLOT_BYTES = 16
+
+# Spreads keys over the slots; see Fibonacci hashing.
+GOLDEN_64 = 0x9E3779B97F4A7C15
+
+# One salt per search depth, so the same cells at another depth make another key.
+DEPTH_SALTS = tuple(mix_64(depth + 1) for depth in range(64))
+
+
+class SharedTranspositionTable:
+    """
+    A fixed-size map from (cells, depth) to a searched value, in shared memory.
+
+    Every process that opens the table by ``name`` sees the same entries.
+    A key hashes to one slot, and a new entry overwrites whatever held it.
+    There are no locks: a slot holds the value and a check word, which is
+    the key XOR-ed with the value's hash, and the value is written first. A
+    reader that finds a slot holding another key, or catches it half
+    written, sees a check that does not match and counts a miss.
+
+    It has ``get`` and ``put`` like ``game.ai.TranspositionTable``, so an
+    ``Expectimax`` can search with it. Only the process that created the
+    table removes it, on ``close()``.
+
+    The entries are shared, but ``hits`` and ``misses`` count the lookups
+    of this process only.
+    """
+
+    def __init__(self, slots: int = DEFAULT_TABLE_SLOTS, name: str | None = None):
+        GameError.require_condition(
+            slots > 0 and slots & (slots - 1) == 0,
+            "Transposition table slots must be a power of two",
+        )
+        self.slots = slots
+        self.shift = 64 - (slots.bit_length() - 1)
+        self.owner = name is None
+        if name is None:
+            self.memory = SharedMemory(create=True, size=SLOT_BYTES * slots)
+        else:
+            with GameError.handle_errors(f"Couldn't open the shared transposition table {name}"):
+                self.memory = SharedMemory(name=name)
+            GameError.require_condition(
+                self.memory.size >= SLOT_BYTES * slots,
+                f"The shared transposition table {name} has fewer than {slots} slots",
+            )
+        self.checks = self.memory.buf[:8 * slots].cast("Q")
+        self.values = self.memory.buf[8 * slots:SLOT_BYTES * slots].cast("d")
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def get(self, key: tuple[int, int]) -> float | None:
+        (cells, depth) = key
+        salted = cells ^ DEPTH_SALTS[depth]
+        slot = ((salted * GOLDEN_64) & MASK_64) >> self.shift
+        check = self.checks[slot]
+        value = self.values[slot]
+        if check ^ (hash(value) & MASK_64) != salted:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple[int, int], value: float):
+        (cells, depth) = key
+        salted = cells ^ DEPTH_SALTS[depth]
+        slot = ((salted * GOLDEN_64) & MASK_64) >> self.shift
+        self.values[slot] = value
+        self.checks[slot] = salted ^ (hash(value) & MASK_64)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.memory.buf[:SLOT_BYTES * self.slots] = bytes(SLOT_BYTES * self.slots)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.checks.release()
+        self.values.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def search_spawn(searcher: Expectimax, job: tuple[int, int, float]) -> tuple[float, int, int, int]:
+    """
+    Search the max node under one first-layer spawn.
+
+    Returns its value, the number of chance nodes visited, and the table
+    hits and misses of the search.
+    """
+    (cells, depth, probability) = job
+    table = searcher.table
+    (nodes, hits, misses) = (searcher.nodes, table.hits, table.misses)
+    value = searcher._max_node(cells, depth, probability)
+    return (value, searcher.nodes - nodes, table.hits - hits, table.misses - misses)
+
+
+# The searcher of a worker process, set up once by ``_init_worker``.
+_searcher: Expectimax | None = None
+
+
+def _init_worker(
+    name: str,
+    slots: int,
+    depth: int,
+    min_probability: float,
+    evaluate: Evaluator,
+    table_dir: Path | None,
+):
+    global _searcher
+    load_row_table(BITBOARD_SIZE, table_dir)
+    row_tables()
+    table = SharedTranspositionTable(slots, name)
+    _searcher = Expectimax(depth=depth, min_probability=min_probability, evaluate=evaluate, table=table)
+
+
+def _search_spawn(job: tuple[int, int, float]) -> tuple[float, int, int, int]:
+    assert _searcher is not None
+    return search_spawn(_searcher, job)
+
+
+class ParallelExpectimax:
+    """
+    Pick moves like ``game.ai.Expectimax``, searching with ``workers`` processes.
+
+    The pool and the shared table live as long as the agent, and the table
+    is kept between decisions, as ``Expectimax`` keeps its own; use the
+    agent as a context manager or call ``close()``. With one worker, the
+    search runs in this process, still on the shared table.
+
+    ``nodes`` counts the chance nodes searched by every process, and
+    ``seconds`` the time spent deciding, so ``nodes_per_second`` is the
+    throughput of the whole pool. ``hits`` and ``misses`` count the table
+    lookups of every process too.
+
+    A pool loads the 4x4 row table from ``table_dir`` (the default cache
+    directory if None), building it there first if needed.
+    """
+
+    def __init__(
+        self,
+        depth: int = 3,
+        min_probability: float = 0.005,
+        table_slots: int = DEFAULT_TABLE_SLOTS,
+        evaluate: Evaluator = empty_cell_heuristic,
+        workers: int | None = None,
+        table_dir: Path | None = None,
+    ):
+        GameError.require_condition(depth >= 1, "Search depth must be at least 1")
+        self.depth = depth
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(table_slots)
+        self.local = Expectimax(depth=depth, min_probability=min_probability, evaluate=evaluate, table=self.table)
+        self.nodes = 0
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0
+        self.pool = None
+        if self.workers > 1:
+            load_row_table(BITBOARD_SIZE, table_dir)
+            self.pool = multiprocessing.Pool(
+                self.workers,
+                initializer=_init_worker,
+                initargs=(self.table.name, table_slots, depth, min_probability, evaluate, table_dir),
+            )
+
+    def __enter__(self) -> "ParallelExpectimax":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def move_values(self, board: GameBoard | BitBoard) -> dict[Direction, float]:
+        """
+        Return the expected value of each legal move from ``board``.
+        """
+        started = time.perf_counter()
+        bits = board if isinstance(board, BitBoard) else BitBoard.from_game_board(board)
+
+        # The chance node after each legal move, and the spawns under it.
+        roots: list[tuple[Direction, int, int]] = []
+        jobs: list[tuple[int, int, float]] = []
+        for direction in Direction:
+            try:
+                (cells, _, flag) = mash_cells(bits.cells, direction)
+            except GameError:
+                continue
+            if not flag & ROW_CHANGED:
+                continue
+            empties = zero_nibbles(cells)
+            count = empties.bit_count()
+            roots.append((direction, cells, count))
+            while empties:
+                low = empties & -empties
+                empties ^= low
+                for (exponent, odds) in SPAWN_ODDS:
+                    jobs.append((cells | (exponent * low), self.depth - 1, odds / count))
+
+        if self.pool is None:
+            results = [search_spawn(self.local, job) for job in jobs]
+        else:
+            results = self.pool.map(_search_spawn, jobs, chunksize=1)
+
+        values = {}
+        spawns = iter(results)
+        for (direction, cells, count) in roots:
+            if count == 0:
+                values[direction] = self.local.evaluate(cells)
+                continue
+            total = 0.0
+            for _ in range(count):
+                for (_, odds) in SPAWN_ODDS:
+                    (value, *_) = next(spawns)
+                    total += odds * value
+            values[direction] = total / count
+
+        self.nodes += len(roots) + sum(nodes for (_, nodes, _, _) in results)
+        self.hits += sum(hits for (_, _, hits, _) in results)
+        self.misses += sum(misses for (_, _, _, misses) in results)
+        self.seconds += time.perf_counter() - started
+        return values
+
+    def best_move(self, board: GameBoard | BitBoard) -> Direction:
+        values = self.move_values(board)
+        GameOverError.require_condition(len(values) > 0, "Game Over! (No moves left)")
+        return max(values, key=values.__getitem__)
@@ -0,0 +1,263 @@
+"""
+A compact binary log of a game, and a replayer for it.
+
+The log starts with a header (board size, RNG seed and keyframe interval)
+followed by blocks of the same layout::
+
+    keyframe | turn record * interval | keyframe | turn record * interval | ...
+
+A keyframe holds the score and the exponent of every cell after its turn;
+the first one holds the starting board. A turn record is two bytes: the
+direction moved, and the cell and value of the tile sprinkled after it.
+Records are only ever appended, and since every block has the same length
+the replayer finds the keyframe before any turn by arithmetic alone.
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from buzz import Buzz
+
+from game.board import Direction, GameBoard, GameOverError, MoveFrame, Tile, decode_grid, encode_grid, idx
+
+RECORD_MAGIC = b"2048GAME"
+RECORD_VERSION = 1
+RECORD_HEADER = struct.Struct("<8sHBBIQ")
+HAS_SEED = 0b1
+MAX_RECORD_SEED = (1 << 64) - 1
+
+TURN = struct.Struct("<H")
+SCORE = struct.Struct("<Q")
+
+DEFAULT_KEYFRAME_INTERVAL = 64
+
+# A turn record packs the sprinkled cell into the low 10 bits, then one bit
+# for a 4 (rather than a 2), then two bits for the direction.
+CELL_FIELD_BITS = 10
+MAX_RECORD_CELLS = 1 << CELL_FIELD_BITS
+FOUR_BIT = 1 << CELL_FIELD_BITS
+DIRECTION_SHIFT = CELL_FIELD_BITS + 1
+DIRECTIONS = list(Direction)
+DIRECTION_CODES = {d: i for (i, d) in enumerate(DIRECTIONS)}
+
+
+class RecordError(Buzz):
+    pass
+
+
+class Turn(NamedTuple):
+    direction: Direction
+    row: int
+    col: int
+    value: int
+
+
+def keyframe_bytes(size: int) -> int:
+    return SCORE.size + size * size
+
+
+def encode_keyframe(board: GameBoard) -> bytes:
+    return SCORE.pack(board.score) + encode_grid(board.grid)
+
+
+def decode_keyframe(data, size: int) -> GameBoard:
+    (score,) = SCORE.unpack_from(data)
+    exponents = data[SCORE.size:SCORE.size + size * size]
+    return GameBoard(size=size, grid=decode_grid(exponents, size), score=score)
+
+
+def encode_turn(direction: Direction, spawned: Tile, size: int) -> int:
+    RecordError.require_condition(spawned.value in (2, 4), f"Can't record a sprinkled {spawned.value}")
+    code = idx(size, spawned.pos.row, spawned.pos.col) | (DIRECTION_CODES[direction] << DIRECTION_SHIFT)
+    return code | FOUR_BIT if spawned.value == 4 else code
+
+
+def decode_turn(code: int, size: int) -> Turn:
+    (row, col) = divmod(code & (MAX_RECORD_CELLS - 1), size)
+    return Turn(
+        direction=DIRECTIONS[code >> DIRECTION_SHIFT],
+        row=row,
+        col=col,
+        value=4 if code & FOUR_BIT else 2,
+    )
+
+
+class GameRecorder:
+    """
+    Stream the moves played on ``board`` to a record at ``path``.
+
+    Play through ``move()``, or call ``record()`` after each successful
+    ``board.step()`` or ``board.move()``. Writes are buffered; ``flush()``
+    or ``close()`` pushes them to disk.
+
+    ``seed`` is stored as an unsigned 64 bit int, with a flag to tell a seed
+    of 0 from no seed at all.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        board: GameBoard,
+        seed: int | None = None,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+    ):
+        RecordError.require_condition(
+            board.size * board.size <= MAX_RECORD_CELLS,
+            f"Can't record boards with more than {MAX_RECORD_CELLS} cells",
+        )
+        RecordError.require_condition(keyframe_interval > 0, "Keyframe interval must be positive")
+        RecordError.require_condition(
+            seed is None or (isinstance(seed, int) and 0 <= seed <= MAX_RECORD_SEED),
+            f"A record seed must be an int from 0 to {MAX_RECORD_SEED}, not {seed!r}",
+        )
+        self.path = path
+        self.board = board
+        self.keyframe_interval = keyframe_interval
+        self.turns = 0
+        self.file = open(path, "wb")
+        self.file.write(RECORD_HEADER.pack(
+            RECORD_MAGIC,
+            RECORD_VERSION,
+            board.size,
+            0 if seed is None else HAS_SEED,
+            keyframe_interval,
+            0 if seed is None else seed,
+        ))
+        self.file.write(encode_keyframe(board))
+
+    def __enter__(self) -> "GameRecorder":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def record(self, direction: Direction, spawned: Tile):
+        self.file.write(TURN.pack(encode_turn(direction, spawned, self.board.size)))
+        self.turns += 1
+        if self.turns % self.keyframe_interval == 0:
+            self.file.write(encode_keyframe(self.board))
+
+    def move(self, direction: Direction, frame: MoveFrame | None = None) -> Tile:
+        """
+        Play ``direction`` on the board like ``GameBoard.move`` and record the turn.
+
+        The final turn of a game is recorded before ``GameOverError`` is raised.
+        """
+        spawned = self.board.step(direction, frame)
+        self.record(direction, spawned)
+        GameOverError.require_condition(
+            self.board.has_move(),
+            "Game Over! (No moves left)"
+        )
+        return spawned
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class GameRecord:
+    """
+    A read-only view of a game record.
+
+    The file is mapped when the record is opened, so turns appended after
+    that are not seen; open it again to pick them up. A partly written last
+    turn or keyframe is ignored.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as file:
+            with RecordError.handle_errors(f"{path} is empty or unreadable"):
+                self.source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with RecordError.handle_errors(f"Invalid game record header in {path}"):
+            (magic, version, size, flags, interval, seed) = RECORD_HEADER.unpack_from(self.source)
+        RecordError.require_condition(magic == RECORD_MAGIC, f"{path} is not a game record")
+        RecordError.require_condition(version == RECORD_VERSION, f"{path} has an unsupported version: {version}")
+        RecordError.require_condition(size > 0 and interval > 0, f"{path} is corrupt")
+        self.size = size
+        self.seed = seed if flags & HAS_SEED else None
+        self.keyframe_interval = interval
+        self.keyframe_size = keyframe_bytes(size)
+        self.block_size = self.keyframe_size + TURN.size * interval
+
+        body = len(self.source) - RECORD_HEADER.size
+        (blocks, rest) = divmod(body, self.block_size)
+        RecordError.require_condition(blocks > 0 or rest >= self.keyframe_size, f"{path} is truncated")
+        if rest >= self.keyframe_size:
+            self.keyframes = blocks + 1
+            self.turns = blocks * interval + (rest - self.keyframe_size) // TURN.size
+        else:
+            self.keyframes = blocks
+            self.turns = blocks * interval
+
+    def __enter__(self) -> "GameRecord":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.turns
+
+    def close(self):
+        self.source.close()
+
+    def _turn_offset(self, turn: int) -> int:
+        (block, position) = divmod(turn - 1, self.keyframe_interval)
+        return RECORD_HEADER.size + block * self.block_size + self.keyframe_size + TURN.size * position
+
+    def turn(self, turn: int) -> Turn:
+        """
+        Return what happened on ``turn``, counting from 1.
+        """
+        RecordError.require_condition(1 <= turn <= self.turns, f"No turn {turn} in a record of {self.turns} turns")
+        (code,) = TURN.unpack_from(self.source, self._turn_offset(turn))
+        return decode_turn(code, self.size)
+
+    def keyframe(self, index: int) -> GameBoard:
+        """
+        Return the board after turn ``index * keyframe_interval``.
+        """
+        RecordError.require_condition(0 <= index < self.keyframes, f"No keyframe {index}")
+        offset = RECORD_HEADER.size + index * self.block_size
+        return decode_keyframe(self.source[offset:offset + self.keyframe_size], self.size)
+
+    def board_at(self, turn: int) -> GameBoard:
+        """
+        Rebuild the board after ``turn``; turn 0 is the starting board.
+
+        Only the turns since the nearest keyframe are replayed.
+        """
+        RecordError.require_condition(0 <= turn <= self.turns, f"No turn {turn} in a record of {self.turns} turns")
+        index = min(turn // self.keyframe_interval, self.keyframes - 1)
+        board = self.keyframe(index)
+        for _ in self._replay(board, index * self.keyframe_interval + 1, turn + 1):
+            pass
+        return board
+
+    def replay(self, start: int = 0, stop: int | None = None) -> Iterator[tuple[int, GameBoard]]:
+        """
+        Yield each turn number from ``start`` up to ``stop`` with the board after it.
+
+        The same board is updated in place and yielded every time; copy it to keep it.
+        """
+        stop = self.turns + 1 if stop is None else min(stop, self.turns + 1)
+        if start >= stop:
+            return
+        board = self.board_at(start)
+        yield (start, board)
+        yield from self._replay(board, start + 1, stop)
+
+    def _replay(self, board: GameBoard, start: int, stop: int) -> Iterator[tuple[int, GameBoard]]:
+        for turn in range(start, stop):
+            (code,) = TURN.unpack_from(self.source, self._turn_offset(turn))
+            (direction, row, col, value) = decode_turn(code, self.size)
+            board.score += board.mash(direction)
+            board.place(row, col, value)
+            yield (turn, board)
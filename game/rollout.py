@@ -0,0 +1,191 @@
+"""
+A Monte Carlo player: try each legal move, then play random games from it.
+
+Rollouts run on packed 4x4 bitboards, so a rollout is a loop over plain ints
+and allocates no board models at all.
+"""
+
+import multiprocessing
+import os
+import time
+from itertools import permutations
+from pathlib import Path
+from random import Random
+
+from pydantic import BaseModel
+
+from game.bitboard import BITBOARD_SIZE, BitBoard, ROW_CHANGED, mash_cells, row_tables, sprinkle_cells
+from game.board import Direction, GameBoard, GameError, GameOverError
+from game.tables import load_row_table
+
+# The first legal move in a random ordering of the directions is a uniform
+# pick among the legal moves, without building a list of them every turn.
+ORDERINGS = list(permutations(Direction))
+
+
+def playout(cells: int, rng: Random) -> int:
+    """
+    Play random legal moves on a packed board until the game ends.
+
+    Returns the score gained along the way.
+    """
+    draw = rng.random
+    score = 0
+    while True:
+        for direction in ORDERINGS[int(draw() * len(ORDERINGS))]:
+            try:
+                (after, gained, flag) = mash_cells(cells, direction)
+            except GameError:
+                continue
+            if flag & ROW_CHANGED:
+                break
+        else:
+            return score
+        cells = sprinkle_cells(after, draw)
+        score += gained
+
+
+def run_rollouts(
+    roots: list[tuple[int, int]],
+    time_budget: float | None,
+    max_rollouts: int | None,
+    seed: int,
+) -> list[tuple[int, int]]:
+    """
+    Cycle through the root afterstates, playing one rollout from each in turn.
+
+    ``roots`` holds the (cells, score gained) of each legal root move. Stops
+    when ``time_budget`` seconds have passed or every root has had
+    ``max_rollouts`` rollouts. Returns the (total score, rollouts) of each root.
+    """
+    rng = Random(seed)
+    draw = rng.random
+    totals = [[0, 0] for _ in roots]
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    while True:
+        for (total, (cells, gained)) in zip(totals, roots):
+            total[0] += gained + playout(sprinkle_cells(cells, draw), rng)
+            total[1] += 1
+        if max_rollouts is not None and totals[0][1] >= max_rollouts:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return [(total, count) for (total, count) in totals]
+
+
+def _run_rollouts(args) -> list[tuple[int, int]]:
+    return run_rollouts(*args)
+
+
+def _init_worker(table_dir: Path | None):
+    load_row_table(BITBOARD_SIZE, table_dir)
+    row_tables()
+
+
+class MoveStats(BaseModel):
+    direction: Direction
+    rollouts: int
+    mean_score: float
+
+
+class Decision(BaseModel):
+    direction: Direction
+    moves: list[MoveStats]
+    rollouts: int
+    seconds: float
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.seconds if self.seconds else 0.0
+
+
+class RolloutAgent:
+    """
+    Pick the root move whose random rollouts reach the best mean final score.
+
+    Each decision splits the rollouts over ``workers`` processes, each
+    stopping after ``time_budget`` seconds or ``max_rollouts`` rollouts per
+    move (whichever comes first). The pool lives as long as the agent, so
+    workers keep their row tables and warm caches from one decision to the
+    next; use the agent as a context manager or call ``close()``. A pool
+    loads the 4x4 row table from ``table_dir`` (the default cache directory
+    if None), building it there first if needed.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        time_budget: float | None = 0.1,
+        max_rollouts: int | None = None,
+        seed: int | None = None,
+        table_dir: Path | None = None,
+    ):
+        GameError.require_condition(
+            time_budget is not None or max_rollouts is not None,
+            "Need a time budget or a rollout limit",
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.max_rollouts = max_rollouts
+        self.seed_source = Random(seed)
+        self.pool = None
+        if self.workers > 1:
+            load_row_table(BITBOARD_SIZE, table_dir)
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(table_dir,))
+
+    def __enter__(self) -> "RolloutAgent":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def decide(self, board: GameBoard | BitBoard) -> Decision:
+        started = time.perf_counter()
+        bits = board if isinstance(board, BitBoard) else BitBoard.from_game_board(board)
+
+        directions = []
+        roots = []
+        for direction in Direction:
+            try:
+                (cells, gained, flag) = mash_cells(bits.cells, direction)
+            except GameError:
+                continue
+            if flag & ROW_CHANGED:
+                directions.append(direction)
+                roots.append((cells, gained))
+        GameOverError.require_condition(len(roots) > 0, "Game Over! (No moves left)")
+
+        per_worker = None
+        if self.max_rollouts is not None:
+            per_worker = -(-self.max_rollouts // self.workers)
+        jobs = [
+            (roots, self.time_budget, per_worker, self.seed_source.getrandbits(64))
+            for _ in range(self.workers)
+        ]
+        if self.pool is None:
+            results = list(map(_run_rollouts, jobs))
+        else:
+            results = self.pool.map(_run_rollouts, jobs)
+
+        moves = []
+        for (i, direction) in enumerate(directions):
+            total = sum(result[i][0] for result in results)
+            count = sum(result[i][1] for result in results)
+            moves.append(MoveStats(direction=direction, rollouts=count, mean_score=bits.score + total / count))
+
+        best = max(moves, key=lambda m: m.mean_score)
+        return Decision(
+            direction=best.direction,
+            moves=moves,
+            rollouts=sum(m.rollouts for m in moves),
+            seconds=time.perf_counter() - started,
+        )
+
+    def best_move(self, board: GameBoard | BitBoard) -> Direction:
+        return self.decide(board).direction
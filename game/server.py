@@ -0,0 +1,348 @@
+"""
+A TCP server that hosts many games at once, and a client to drive it.
+
+Clients speak JSON lines: every request is one JSON object on a line of its
+own, and so is every reply. Requests name an ``op``::
+
+    {"op": "new", "size": 4, "seed": 7}      start a session and watch it
+    {"op": "join", "session": "..."}          watch a session someone else started
+    {"op": "move", "session": "...", "direction": "NORTH"}
+    {"op": "show", "session": "..."}
+    {"op": "close", "session": "..."}
+
+A reply to anything but ``close`` is the session's board::
+
+    {"ok": true, "session": "...", "size": 4, "cells": [2, 0, ...], "score": 0, "turn": 0, "game_over": false}
+
+with cells in row-major order and 0 for an empty cell. A failed request
+gets ``{"ok": false, "error": "..."}``. If a request carries an ``id``, its
+reply carries it too. After a move, every other connection watching the
+session is pushed the new board, marked with ``"push": true``.
+
+Sessions are kept in a ``game.store.SessionStore``, so idle games cost
+little memory. The server runs on one event loop. Each connection reads its requests in
+order and queues its replies; a writer task sends whatever has queued up in
+a single write, so a busy connection does not pay for a write and a drain
+per message. A client that stops reading is dropped once
+``MAX_PENDING_MESSAGES`` replies and pushes have queued up for it.
+
+Requests are handled one at a time on the event loop, and none of them
+awaits while it reads or changes a session, so no two can interleave on
+the same session.
+"""
+
+import asyncio
+import json
+import random
+import secrets
+import time
+from itertools import count
+from typing import Any
+
+from buzz import Buzz
+from pydantic import BaseModel
+
+from game.board import DEFAULT_BOARD_SIZE, BadMoveError, Direction, GameError, GameOverError
+from game.store import PackedSession, SessionStore, StoreError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 2048
+MAX_LINE_BYTES = 64 * 1024
+MAX_PENDING_MESSAGES = 1024
+OPS = ("new", "join", "show", "move", "close")
+
+Message = dict[str, Any]
+
+
+class ServerError(Buzz):
+    pass
+
+
+def parse_direction(name: Any) -> Direction:
+    ServerError.require_condition(isinstance(name, str), "A move needs a direction")
+    ServerError.require_condition(name.upper() in Direction.__members__, f"Unknown direction: {name}")
+    return Direction[name.upper()]
+
+
+def session_state(session: PackedSession) -> Message:
+    return {
+        "ok": True,
+        "session": session.id,
+        "size": session.size,
+        "cells": session.values(),
+        "score": session.score,
+        "turn": session.turn,
+        "game_over": session.game_over,
+    }
+
+
+class Connection:
+    """
+    The write side of one client connection.
+
+    ``send`` only queues a message; the connection's writer task sends
+    everything queued since its last write in one go. Messages only pile up
+    while a write waits for the client to read, so a connection with
+    ``MAX_PENDING_MESSAGES`` queued is dropped instead of growing further.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending: list[bytes] = []
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.watching: set[str] = set()
+
+    def send(self, message: Message):
+        if self.closed:
+            return
+        if len(self.pending) >= MAX_PENDING_MESSAGES:
+            self.drop()
+            return
+        self.pending.append(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        self.ready.set()
+
+    async def write_loop(self):
+        try:
+            while not self.closed or self.pending:
+                await self.ready.wait()
+                self.ready.clear()
+                if not self.pending:
+                    continue
+                (data, self.pending) = (b"".join(self.pending), [])
+                self.writer.write(data)
+                await self.writer.drain()
+        except ConnectionError:
+            self.closed = True
+            self.pending.clear()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    def drop(self):
+        """
+        Close the connection at once, discarding everything not yet sent.
+        """
+        self.close()
+        self.pending.clear()
+        self.writer.transport.abort()
+
+
+class GameServer:
+    """
+    Hosts sessions for every client connected to it.
+
+    Sessions live in ``store``, which spills the ones nobody is playing to
+    disk, and outlive the connection that started them until some client
+    closes them, so a player can reconnect and ``join`` again.
+    """
+
+    def __init__(self, default_size: int = DEFAULT_BOARD_SIZE, store: SessionStore | None = None):
+        self.default_size = default_size
+        self.store = SessionStore() if store is None else store
+        self.ids = count(1)
+        self.connections = 0
+        self.watchers: dict[str, set[Connection]] = {}
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        # A deep backlog lets thousands of clients connect at once.
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES, backlog=4096)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.store.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = Connection(writer)
+        writing = asyncio.create_task(connection.write_loop())
+        self.connections += 1
+        try:
+            while not connection.closed:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await self.respond(connection, line)
+        finally:
+            self.connections -= 1
+            for id in connection.watching:
+                self.unwatch(connection, id)
+            connection.close()
+            await writing
+            writer.close()
+
+    async def respond(self, connection: Connection, line: bytes):
+        request: Any = None
+        try:
+            with ServerError.handle_errors("Requests must be JSON"):
+                request = json.loads(line)
+            ServerError.require_condition(isinstance(request, dict), "Requests must be JSON objects")
+            reply = await self.dispatch(connection, request)
+        except (ServerError, StoreError, GameError, BadMoveError, GameOverError) as err:
+            reply = {"ok": False, "error": err.message}
+        if isinstance(request, dict) and "id" in request:
+            reply["id"] = request["id"]
+        connection.send(reply)
+
+    async def dispatch(self, connection: Connection, request: Message) -> Message:
+        op = request.get("op")
+        ServerError.require_condition(op in OPS, f"Unknown op: {op}")
+        if op == "new":
+            session = self.new_session(request.get("size", self.default_size), request.get("seed"))
+            self.watch(connection, session.id)
+            return session_state(session)
+
+        id = request.get("session")
+        ServerError.require_condition(isinstance(id, str), f"No session {id}")
+        if op == "join":
+            state = session_state(self.store.get(id))
+            self.watch(connection, id)
+            return state
+        if op == "show":
+            return session_state(self.store.get(id))
+        if op == "move":
+            direction = parse_direction(request.get("direction"))
+            state = session_state(self.move(id, direction))
+            pushed = {**state, "push": True}
+            for watcher in self.watchers.get(id, ()):
+                if watcher is not connection:
+                    watcher.send(pushed)
+            return state
+        self.store.delete(id)
+        self.watchers.pop(id, None)
+        return {"ok": True, "session": id}
+
+    def new_session(self, size: Any, seed: Any = None) -> PackedSession:
+        ServerError.require_condition(isinstance(size, int), "The board size must be a number")
+        ServerError.require_condition(
+            seed is None or isinstance(seed, (int, str)),
+            "The seed must be a number or a string",
+        )
+        session = PackedSession.new(f"{next(self.ids):x}-{secrets.token_hex(4)}", size, seed)
+        self.store.add(session)
+        return session
+
+    def move(self, id: str, direction: Direction) -> PackedSession:
+        session = self.store.get(id)
+        GameOverError.require_condition(not session.game_over, "Game Over! (No moves left)")
+        board = session.board()
+        try:
+            board.move(direction)
+        except GameOverError:
+            session.game_over = True
+        session.turn += 1
+        session.update(board)
+        return session
+
+    def watch(self, connection: Connection, id: str):
+        self.watchers.setdefault(id, set()).add(connection)
+        connection.watching.add(id)
+
+    def unwatch(self, connection: Connection, id: str):
+        watchers = self.watchers.get(id)
+        if watchers is not None:
+            watchers.discard(connection)
+            if not watchers:
+                del self.watchers[id]
+
+
+class GameClient:
+    """
+    An asyncio client for ``GameServer``.
+
+    ``request`` sends one request and waits for its reply. Boards pushed for
+    watched sessions in the meantime are kept in ``pushes``.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pushes: list[Message] = []
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> "GameClient":
+        (reader, writer) = await asyncio.open_connection(host, port, limit=MAX_LINE_BYTES)
+        return cls(reader, writer)
+
+    async def request(self, **request) -> Message:
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        while True:
+            line = await self.reader.readline()
+            ServerError.require_condition(line, "The server closed the connection")
+            message = json.loads(line)
+            if not message.get("push"):
+                return message
+            self.pushes.append(message)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class LoadReport(BaseModel):
+    sessions: int
+    moves: int
+    rejected: int
+    games_over: int
+    seconds: float
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.seconds
+
+
+async def _play_session(host: str, port: int, size: int, moves: int, seed: int) -> tuple[int, int, bool]:
+    rng = random.Random(seed)
+    directions = [d.value for d in Direction]
+    client = await GameClient.connect(host, port)
+    try:
+        state = await client.request(op="new", size=size, seed=seed)
+        ServerError.require_condition(state["ok"], f"Couldn't start a session: {state.get('error')}")
+        (played, rejected) = (0, 0)
+        while played < moves and not state["game_over"]:
+            reply = await client.request(op="move", session=state["session"], direction=rng.choice(directions))
+            played += 1
+            if reply["ok"]:
+                state = reply
+            else:
+                rejected += 1
+        await client.request(op="close", session=state["session"])
+        return (played, rejected, state["game_over"])
+    finally:
+        await client.close()
+
+
+async def run_load(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    sessions: int = 100,
+    moves: int = 100,
+    size: int = DEFAULT_BOARD_SIZE,
+    seed: int = 0,
+) -> LoadReport:
+    """
+    Play ``sessions`` games at once against a server, each with its own connection.
+
+    Every game sends up to ``moves`` random moves, one at a time. Moves the
+    board can't make are sent anyway and counted as rejected.
+    """
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        _play_session(host, port, size, moves, seed + n) for n in range(sessions)
+    ))
+    return LoadReport(
+        sessions=sessions,
+        moves=sum(r[0] for r in results),
+        rejected=sum(r[1] for r in results),
+        games_over=sum(r[2] for r in results),
+        seconds=time.perf_counter() - started,
+    )
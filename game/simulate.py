@@ -0,0 +1,194 @@
+"""
+Headless simulation: play many games with a fixed policy across worker processes.
+"""
+
+import multiprocessing
+import random
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+from auto_name_enum import AutoNameEnum, auto
+from pydantic import BaseModel
+
+from game.bitboard import row_tables
+from game.board import Direction, GameBoard, GameOverError, RandomSpawns
+from game.instrument import ProfileSnapshot, Profiler
+from game.tables import MAX_TABLE_SIZE, load_row_table, unload_row_table
+
+
+class PolicyName(AutoNameEnum):
+    RANDOM = auto()
+    CORNER = auto()
+    GREEDY = auto()
+
+
+Policy = Callable[[GameBoard, random.Random], Direction]
+
+# Keep the big tiles in the bottom-left corner: slide down and left
+# whenever possible, right if not, and up only as a last resort.
+CORNER_PRIORITY = [Direction.SOUTH, Direction.WEST, Direction.EAST, Direction.NORTH]
+
+
+def legal_moves(board: GameBoard) -> list[Direction]:
+    return [d for d in CORNER_PRIORITY if board.can_mash(d)]
+
+
+def random_policy(board: GameBoard, rng: random.Random) -> Direction:
+    return rng.choice(legal_moves(board))
+
+
+def corner_policy(board: GameBoard, rng: random.Random) -> Direction:
+    return legal_moves(board)[0]
+
+
+def greedy_policy(board: GameBoard, rng: random.Random) -> Direction:
+    """
+    Take the move that scores the most right now, breaking ties by corner priority.
+    """
+    afterstates = board.afterstates()
+    legal = [afterstates[d] for d in CORNER_PRIORITY if afterstates[d].legal]
+    assert legal
+    # max() keeps the first of equal scores, which is the one corner priority prefers.
+    return max(legal, key=lambda a: a.score).direction
+
+
+POLICIES: dict[PolicyName, Policy] = {
+    PolicyName.RANDOM: random_policy,
+    PolicyName.CORNER: corner_policy,
+    PolicyName.GREEDY: greedy_policy,
+}
+
+
+class GameResult(BaseModel):
+    game: int
+    seed: int
+    score: int
+    moves: int
+    max_tile: int
+    seconds: float
+
+
+class SimulationSummary(BaseModel):
+    games: int
+    moves: int
+    seconds: float
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.seconds if self.seconds else 0.0
+
+
+def play_game(game: int, seed: int, size: int, policy_name: PolicyName) -> GameResult:
+    """
+    Play one game to the end.
+
+    The game is seeded from its own seed alone, so it plays out the same way
+    no matter which worker runs it or how many workers there are. The policy
+    and the spawns draw from separate RNGs, so a policy that draws more or
+    less often does not change which tiles appear.
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    policy = POLICIES[policy_name]
+
+    board = GameBoard(size=size, spawns=RandomSpawns(f"spawns-{seed}"))
+    board.reset()
+    moves = 0
+    while True:
+        moves += 1
+        try:
+            board.move(policy(board, rng))
+        except GameOverError:
+            break
+
+    return GameResult(
+        game=game,
+        seed=seed,
+        score=board.score,
+        moves=moves,
+        max_tile=max(t.value or 0 for t in board.grid),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _play_game(args: tuple[int, int, int, PolicyName, bool]) -> tuple[GameResult, ProfileSnapshot | None]:
+    (game, seed, size, policy_name, profile) = args
+    if not profile:
+        return (play_game(game, seed, size, policy_name), None)
+    with Profiler() as profiler:
+        result = play_game(game, seed, size, policy_name)
+    return (result, profiler.snapshot())
+
+
+def _init_worker(size: int, table_dir: Path | None, use_tables: bool):
+    if use_tables:
+        load_row_table(size, table_dir)
+    else:
+        unload_row_table(size)
+
+
+def run_games(
+    games: int,
+    policy_name: PolicyName = PolicyName.RANDOM,
+    size: int = 4,
+    workers: int = 1,
+    seed: int = 0,
+    use_tables: bool = True,
+    table_dir: Path | None = None,
+    profiler: Profiler | None = None,
+) -> Iterator[GameResult]:
+    """
+    Play ``games`` games and yield each result as soon as its game ends.
+
+    Results arrive in completion order, not game order. With ``use_tables``,
+    the row table for ``size`` is built once here and every worker maps the
+    same file. With a ``profiler``, each game is profiled where it runs and
+    its counts are merged into ``profiler``, which must not be enabled.
+    Without ``use_tables``, any table an earlier call loaded in this process
+    is unloaded first, so the games really mash tile by tile.
+    """
+    use_tables = use_tables and size <= MAX_TABLE_SIZE
+    if use_tables:
+        load_row_table(size, table_dir)
+    else:
+        unload_row_table(size)
+        row_tables.cache_clear()
+
+    jobs = [(game, seed + game, size, policy_name, profiler is not None) for game in range(games)]
+    if workers <= 1:
+        yield from _collect(map(_play_game, jobs), profiler)
+        return
+
+    chunksize = max(1, games // (workers * 8))
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(size, table_dir, use_tables)) as pool:
+        yield from _collect(pool.imap_unordered(_play_game, jobs, chunksize=chunksize), profiler)
+
+
+def _collect(
+    played: Iterator[tuple[GameResult, ProfileSnapshot | None]],
+    profiler: Profiler | None,
+) -> Iterator[GameResult]:
+    for (result, snapshot) in played:
+        if profiler is not None and snapshot is not None:
+            profiler.merge(snapshot)
+        yield result
+
+
+def simulate_to_file(path: Path, *args, **kwargs) -> SimulationSummary:
+    """
+    Run ``run_games`` and stream each result to ``path`` as a line of JSON.
+    """
+    started = time.perf_counter()
+    games = 0
+    moves = 0
+    with open(path, "w") as file:
+        for result in run_games(*args, **kwargs):
+            file.write(result.json() + "\n")
+            games += 1
+            moves += result.moves
+    return SimulationSummary(games=games, moves=moves, seconds=time.perf_counter() - started)
@@ -0,0 +1,272 @@
+"""
+A store for game sessions that keeps the busy ones in memory and spills the rest to disk.
+
+A session is held as a packed board: one exponent byte per cell, like a
+``game.corpus`` record, with its score, turn and the two ints of its
+``CounterSpawns`` state. A ``GameBoard`` is only built while a move is
+being played. Resident sessions are kept in least-recently-used order;
+when they take up more than the memory budget, the coldest are written to
+a SQLite file and dropped from memory. Getting a spilled session reads it
+back in, so callers never need to know where a session was.
+"""
+
+import os
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+from buzz import Buzz
+from pydantic import BaseModel
+
+from game.board import CounterSpawns, GameBoard, decode_grid, encode_grid
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# A rough count of the bytes a resident session costs beyond its cells and
+# id: the object, its ints and its slot in the LRU order.
+SESSION_OVERHEAD = 320
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    cells BLOB NOT NULL,
+    score INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    game_over INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    drawn INTEGER NOT NULL
+)
+"""
+FIELDS = "id, size, cells, score, turn, game_over, seed, drawn"
+
+
+class StoreError(Buzz):
+    pass
+
+
+class PackedSession:
+    """
+    One game, packed for storage.
+
+    Play a turn by unpacking it with ``board()``, moving the board, and
+    packing the result back in with ``update()``.
+    """
+
+    __slots__ = ("id", "size", "cells", "score", "turn", "game_over", "seed", "drawn")
+
+    def __init__(
+        self,
+        id: str,
+        size: int,
+        cells: bytes,
+        score: int = 0,
+        turn: int = 0,
+        game_over: bool = False,
+        seed: int = 0,
+        drawn: int = 0,
+    ):
+        self.id = id
+        self.size = size
+        self.cells = cells
+        self.score = score
+        self.turn = turn
+        self.game_over = game_over
+        self.seed = seed
+        self.drawn = drawn
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedSession):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"PackedSession(id={self.id!r}, size={self.size!r}, score={self.score!r}, turn={self.turn!r})"
+
+    @classmethod
+    def new(cls, id: str, size: int, seed: int | str | None = None) -> "PackedSession":
+        """
+        Start a game on a fresh board with its first two tiles.
+        """
+        board = GameBoard(size=size, spawns=CounterSpawns(seed))
+        board.reset()
+        session = cls(id, size, b"")
+        session.update(board)
+        return session
+
+    @property
+    def nbytes(self) -> int:
+        return SESSION_OVERHEAD + len(self.id) + len(self.cells)
+
+    def board(self) -> GameBoard:
+        return GameBoard(
+            size=self.size,
+            grid=decode_grid(self.cells, self.size),
+            score=self.score,
+            spawns=CounterSpawns(self.seed, self.drawn),
+        )
+
+    def update(self, board: GameBoard):
+        spawns = board.spawns
+        StoreError.require_condition(isinstance(spawns, CounterSpawns), "Only boards with counter spawns can be stored")
+        self.cells = encode_grid(board.grid)
+        self.score = board.score
+        self.seed = spawns.seed
+        self.drawn = spawns.drawn
+
+    def values(self) -> list[int]:
+        """
+        Return the tile values in row-major order, with 0 for an empty cell, like ``GameBoard.key()``.
+        """
+        return [1 << e if e else 0 for e in self.cells]
+
+    def row(self) -> tuple:
+        return (self.id, self.size, self.cells, self.score, self.turn, int(self.game_over), self.seed, self.drawn)
+
+
+class StoreStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    resident: int
+    resident_bytes: int
+    spilled: int
+    memory_budget: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 1.0
+
+
+class SessionStore:
+    """
+    Sessions by id, kept within ``memory_budget`` bytes of resident sessions.
+
+    Spilled sessions go to the SQLite database at ``path``; without a path,
+    a temporary file is used and removed on ``close()``. A session that is
+    read back in is removed from the file, so each session lives in one
+    place at a time.
+    """
+
+    def __init__(self, path: Path | None = None, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        StoreError.require_condition(memory_budget > 0, "Memory budget must be positive")
+        self.memory_budget = memory_budget
+        self.temporary = path is None
+        if path is None:
+            (handle, name) = tempfile.mkstemp(prefix="sessions-", suffix=".db")
+            os.close(handle)
+            path = Path(name)
+        self.path = path
+        with StoreError.handle_errors(f"Couldn't open the session store at {path}"):
+            self.db = sqlite3.connect(path)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(SCHEMA)
+        self.resident: OrderedDict[str, PackedSession] = OrderedDict()
+        self.resident_bytes = 0
+        self.spilled = self.db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __enter__(self) -> "SessionStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.resident) + self.spilled
+
+    def __contains__(self, id: str) -> bool:
+        if id in self.resident:
+            return True
+        return self.db.execute("SELECT 1 FROM sessions WHERE id = ?", (id,)).fetchone() is not None
+
+    def add(self, session: PackedSession):
+        StoreError.require_condition(session.id not in self, f"Session {session.id} already exists")
+        self._admit(session)
+
+    def get(self, id: str) -> PackedSession:
+        """
+        Return a session, reading it back from disk if it was spilled.
+
+        Either way, the session becomes the most recently used.
+        """
+        session = self.resident.get(id)
+        if session is not None:
+            self.hits += 1
+            self.resident.move_to_end(id)
+            return session
+
+        row = self.db.execute(f"SELECT {FIELDS} FROM sessions WHERE id = ?", (id,)).fetchone()
+        StoreError.require_condition(row is not None, f"No session {id}")
+        self.misses += 1
+        (id, size, cells, score, turn, game_over, seed, drawn) = row
+        session = PackedSession(id, size, cells, score, turn, bool(game_over), seed, drawn)
+        self.db.execute("DELETE FROM sessions WHERE id = ?", (id,))
+        self.spilled -= 1
+        self._admit(session)
+        return session
+
+    def delete(self, id: str):
+        session = self.resident.pop(id, None)
+        if session is not None:
+            self.resident_bytes -= session.nbytes
+            return
+        deleted = self.db.execute("DELETE FROM sessions WHERE id = ?", (id,)).rowcount
+        StoreError.require_condition(deleted > 0, f"No session {id}")
+        self.spilled -= 1
+        self.db.commit()
+
+    def _admit(self, session: PackedSession):
+        self.resident[session.id] = session
+        self.resident_bytes += session.nbytes
+        if self.resident_bytes > self.memory_budget:
+            self.evict()
+
+    def evict(self, budget: int | None = None):
+        """
+        Spill the least recently used sessions until the rest fit in ``budget`` bytes.
+
+        The budget defaults to the store's memory budget. The most recently
+        used session is never spilled this way, however big it is. Pass 0 to
+        spill every session.
+        """
+        budget = self.memory_budget if budget is None else budget
+        keep = 1 if budget > 0 else 0
+        spilled = []
+        while self.resident_bytes > budget and len(self.resident) > keep:
+            (_, session) = self.resident.popitem(last=False)
+            self.resident_bytes -= session.nbytes
+            spilled.append(session.row())
+        if spilled:
+            self.db.executemany(f"INSERT OR REPLACE INTO sessions ({FIELDS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", spilled)
+            self.db.commit()
+            self.spilled += len(spilled)
+            self.evictions += len(spilled)
+
+    def stats(self) -> StoreStats:
+        return StoreStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            resident=len(self.resident),
+            resident_bytes=self.resident_bytes,
+            spilled=self.spilled,
+            memory_budget=self.memory_budget,
+        )
+
+    def close(self):
+        """
+        Spill every resident session and close the file, or remove it if it was temporary.
+        """
+        if self.temporary:
+            self.db.close()
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            return
+        self.evict(0)
+        self.db.close()
@@ -0,0 +1,165 @@
+"""
+Board keys and the eight symmetries of a square board.
+
+A board key is the tuple of a board's tile values in row-major order, with 0
+for an empty cell. Rotating or reflecting a board changes its key but not how
+the game plays out from it, so ``canonicalize`` maps all eight variants of a
+board to a single key. A cache keyed on canonical keys gets a hit from any of
+them.
+"""
+
+from functools import cache
+from math import isqrt
+from operator import itemgetter
+from typing import Callable, Iterator
+
+from auto_name_enum import AutoNameEnum, auto
+
+from game.board import SPAWN_VALUES, Direction, GameBoard, Spawn, cell_positions, idx
+
+BoardKey = tuple[int, ...]
+
+# Each transform sends cell (row, col) of a board of size n to a new cell.
+CellMap = Callable[[int, int, int], tuple[int, int]]
+
+
+class Transform(AutoNameEnum):
+    IDENTITY = auto()
+    ROTATE_90 = auto()
+    ROTATE_180 = auto()
+    ROTATE_270 = auto()
+    FLIP_HORIZONTAL = auto()
+    FLIP_VERTICAL = auto()
+    TRANSPOSE = auto()
+    ANTI_TRANSPOSE = auto()
+
+    @property
+    def inverse(self) -> "Transform":
+        return INVERSES.get(self, self)
+
+    def cell(self, row: int, col: int, size: int) -> tuple[int, int]:
+        return CELL_MAPS[self](row, col, size)
+
+    def direction(self, direction: Direction) -> Direction:
+        """
+        Map a move on a board to the same move on the transformed board.
+        """
+        return transform_direction(direction, self)
+
+
+# Rotations turn clockwise. The flips mirror across the vertical and
+# horizontal center lines, and the transposes across the two diagonals.
+CELL_MAPS: dict[Transform, CellMap] = {
+    Transform.IDENTITY: lambda r, c, n: (r, c),
+    Transform.ROTATE_90: lambda r, c, n: (c, n - 1 - r),
+    Transform.ROTATE_180: lambda r, c, n: (n - 1 - r, n - 1 - c),
+    Transform.ROTATE_270: lambda r, c, n: (n - 1 - c, r),
+    Transform.FLIP_HORIZONTAL: lambda r, c, n: (r, n - 1 - c),
+    Transform.FLIP_VERTICAL: lambda r, c, n: (n - 1 - r, c),
+    Transform.TRANSPOSE: lambda r, c, n: (c, r),
+    Transform.ANTI_TRANSPOSE: lambda r, c, n: (n - 1 - c, n - 1 - r),
+}
+
+INVERSES = {
+    Transform.ROTATE_90: Transform.ROTATE_270,
+    Transform.ROTATE_270: Transform.ROTATE_90,
+}
+
+DIRECTION_VECTORS = {
+    Direction.NORTH: (-1, 0),
+    Direction.SOUTH: (1, 0),
+    Direction.EAST: (0, 1),
+    Direction.WEST: (0, -1),
+}
+VECTOR_DIRECTIONS = {v: d for (d, v) in DIRECTION_VECTORS.items()}
+
+
+@cache
+def transform_direction(direction: Direction, transform: Transform) -> Direction:
+    # On a board of size 1 the cell maps have no offset, so they turn a
+    # direction vector the same way they turn the board.
+    return VECTOR_DIRECTIONS[transform.cell(*DIRECTION_VECTORS[direction], 1)]
+
+
+@cache
+def cell_permutation(size: int, transform: Transform) -> tuple[int, ...]:
+    """
+    Return the grid index each cell of the transformed board takes its value from.
+    """
+    sources = [0] * (size * size)
+    for row in range(size):
+        for col in range(size):
+            sources[idx(size, *transform.cell(row, col, size))] = idx(size, row, col)
+    return tuple(sources)
+
+
+def transform_key(key: BoardKey, transform: Transform, size: int | None = None) -> BoardKey:
+    if size is None:
+        size = isqrt(len(key))
+    return tuple(map(key.__getitem__, cell_permutation(size, transform)))
+
+
+@cache
+def symmetries(size: int) -> tuple[tuple[Transform, Callable[[BoardKey], BoardKey]], ...]:
+    """
+    Return each transform but the identity with a getter that applies it to a key.
+    """
+    return tuple((t, itemgetter(*cell_permutation(size, t))) for t in Transform if t is not Transform.IDENTITY)
+
+
+def canonicalize(key: BoardKey, size: int | None = None) -> tuple[BoardKey, Transform]:
+    """
+    Return the smallest of the eight symmetric variants of ``key`` and the transform that produces it.
+
+    Map a move chosen on the canonical board back with ``transform.inverse.direction()``.
+    """
+    if size is None:
+        size = isqrt(len(key))
+    best = key
+    best_transform = Transform.IDENTITY
+    for (transform, permute) in symmetries(size):
+        candidate = permute(key)
+        if candidate < best:
+            (best, best_transform) = (candidate, transform)
+    return (best, best_transform)
+
+
+def canonical_key(board: GameBoard) -> tuple[BoardKey, Transform]:
+    return canonicalize(board.key(), board.size)
+
+
+def transform_board(board: GameBoard, transform: Transform) -> GameBoard:
+    transformed = GameBoard.from_key(transform_key(board.key(), transform, board.size))
+    transformed.score = board.score
+    return transformed
+
+
+def distinct_spawn_outcomes(board: GameBoard) -> Iterator[Spawn]:
+    """
+    Yield the outcomes of ``board.spawn_outcomes()``, once for each group that leads to symmetric boards.
+
+    Two spawns of the same value lead to boards that are rotations or
+    reflections of each other when a symmetry of the board itself maps one
+    cell onto the other. Each group is yielded as its first cell in
+    row-major order, with ``count`` and ``probability`` covering the whole
+    group. A board with no symmetry yields every outcome on its own.
+    """
+    size = board.size
+    key = board.key()
+    permutations = [cell_permutation(size, t) for (t, permute) in symmetries(size) if permute(key) == key]
+    if not permutations:
+        yield from board.spawn_outcomes()
+        return
+
+    positions = cell_positions(size)
+    empty = [k for (k, value) in enumerate(key) if value == 0]
+    grouped: set[int] = set()
+    for k in empty:
+        if k in grouped:
+            continue
+        # The symmetries of a board form a group, so the cells they send k
+        # to are all the cells that can stand in for it.
+        orbit = {k}.union(p[k] for p in permutations)
+        grouped.update(orbit)
+        for (value, odds) in SPAWN_VALUES:
+            yield Spawn(positions[k], value, odds * len(orbit) / len(empty), len(orbit))
@@ -0,0 +1,234 @@
+"""
+Precomputed row-transition tables.
+
+A row of ``size`` cells is packed into an int with 4 bits per cell holding the
+tile exponent (0 for an empty cell), cell 0 in the low nibble. For every
+possible packed row, a table stores the row mashed toward cell 0, the score
+gained and whether anything moved. Tables are written to disk once and opened
+through ``mmap`` so that every process on a machine shares the same pages.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+from buzz import Buzz
+
+CELL_BITS = 4
+CELL_MASK = 0xF
+MAX_EXPONENT = CELL_MASK
+
+# 16 ** 6 rows would take minutes to build and over 100MB on disk, so bigger
+# boards keep using the per-slice loops.
+MAX_TABLE_SIZE = 5
+
+ROW_CHANGED = 0b01
+ROW_OVERFLOW = 0b10
+
+TABLE_MAGIC = b"2048ROWS"
+TABLE_VERSION = 1
+TABLE_HEADER = struct.Struct("<8sHBBI")
+
+DEFAULT_TABLE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "twenty-forty-eight"
+
+
+class TableError(Buzz):
+    pass
+
+
+def mash_row(exponents: list[int]) -> tuple[list[int], int, bool]:
+    """
+    Mash a row of exponents toward index 0 exactly the way ``Slice.mash`` does.
+
+    Zero means an empty cell. Returns the mashed exponents, the score gained,
+    and whether anything moved.
+    """
+    packed = [e for e in exponents if e != 0]
+    mashed = []
+    score = 0
+    i = 0
+    while i < len(packed):
+        if i < len(packed) - 1 and packed[i] == packed[i + 1]:
+            merged = packed[i] + 1
+            score += 2 ** merged
+            mashed.append(merged)
+            i += 2
+        else:
+            mashed.append(packed[i])
+            i += 1
+    mashed.extend([0] * (len(exponents) - len(mashed)))
+    return (mashed, score, mashed != exponents)
+
+
+def pack_row(exponents: list[int]) -> int:
+    return sum(e << (CELL_BITS * i) for (i, e) in enumerate(exponents))
+
+
+def unpack_row(row: int, size: int) -> list[int]:
+    return [(row >> (CELL_BITS * i)) & CELL_MASK for i in range(size)]
+
+
+def encode_values(values: list[int | None]) -> int | None:
+    """
+    Pack tile values into a row index.
+
+    Returns None if any value can't be stored in 4 bits, in which case the
+    caller has to fall back to mashing the values directly.
+    """
+    row = 0
+    for (i, value) in enumerate(values):
+        if value is None:
+            continue
+        exponent = value.bit_length() - 1
+        if exponent < 1 or exponent > MAX_EXPONENT or value != 1 << exponent:
+            return None
+        row |= exponent << (CELL_BITS * i)
+    return row
+
+
+def decode_values(row: int, size: int) -> list[int | None]:
+    return [None if e == 0 else 1 << e for e in unpack_row(row, size)]
+
+
+class RowTable:
+    """
+    The transition table for rows of one size.
+
+    ``mashed``, ``scores`` and ``flags`` are indexed by packed row. They are
+    either in-memory arrays or memoryviews over a mapped file; both index the
+    same way.
+    """
+
+    def __init__(self, size: int, mashed, scores, flags, source: mmap.mmap | None = None):
+        self.size = size
+        self.mashed = mashed
+        self.scores = scores
+        self.flags = flags
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def mash_values(self, values: list[int | None]) -> tuple[list[int | None], int, bool] | None:
+        """
+        Mash tile values toward index 0 with one lookup.
+
+        Returns the new values, the score gained and whether anything moved, or
+        None if the values can't be looked up.
+        """
+        row = encode_values(values)
+        if row is None or self.flags[row] & ROW_OVERFLOW:
+            return None
+        return (decode_values(self.mashed[row], self.size), self.scores[row], bool(self.flags[row] & ROW_CHANGED))
+
+    def can_mash_values(self, values: list[int | None]) -> bool | None:
+        row = encode_values(values)
+        if row is None:
+            return None
+        return bool(self.flags[row] & ROW_CHANGED)
+
+
+def build_row_table(size: int) -> RowTable:
+    TableError.require_condition(
+        1 <= size <= MAX_TABLE_SIZE,
+        f"Row tables are only built for sizes up to {MAX_TABLE_SIZE}",
+    )
+    count = 1 << (CELL_BITS * size)
+    mashed = array("I", bytes(4 * count))
+    scores = array("I", bytes(4 * count))
+    flags = array("B", bytes(count))
+    for row in range(count):
+        exponents = unpack_row(row, size)
+        (result, score, changed) = mash_row(exponents)
+        flag = ROW_CHANGED if changed else 0
+        if any(e > MAX_EXPONENT for e in result):
+            flag |= ROW_OVERFLOW
+            (result, score) = (exponents, 0)
+        mashed[row] = pack_row(result)
+        scores[row] = score
+        flags[row] = flag
+    return RowTable(size, mashed, scores, flags)
+
+
+def table_path(size: int, directory: Path | None = None) -> Path:
+    return (directory or DEFAULT_TABLE_DIR) / f"rows-{size}.bin"
+
+
+def save_row_table(table: RowTable, path: Path):
+    """
+    Write a table next to its final path and move it into place.
+
+    The rename is atomic, so a process opening the table never sees a
+    partially written file even if another process is saving it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    byteorder = 0 if sys.byteorder == "little" else 1
+    (fd, tmp_name) = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, table.size, byteorder, len(table)))
+            tmp.write(bytes(table.mashed))
+            tmp.write(bytes(table.scores))
+            tmp.write(bytes(table.flags))
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def open_row_table(path: Path) -> RowTable:
+    with open(path, "rb") as file:
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with TableError.handle_errors(f"Invalid row table header in {path}"):
+        (magic, version, size, byteorder, count) = TABLE_HEADER.unpack_from(source)
+    TableError.require_condition(magic == TABLE_MAGIC, f"{path} is not a row table")
+    TableError.require_condition(version == TABLE_VERSION, f"{path} has an unsupported version: {version}")
+    TableError.require_condition(
+        byteorder == (0 if sys.byteorder == "little" else 1),
+        f"{path} was written on a machine with a different byte order",
+    )
+    TableError.require_condition(
+        count == 1 << (CELL_BITS * size) and len(source) == TABLE_HEADER.size + 9 * count,
+        f"{path} is truncated or corrupt",
+    )
+
+    view = memoryview(source)
+    start = TABLE_HEADER.size
+    mashed = view[start:start + 4 * count].cast("I")
+    start += 4 * count
+    scores = view[start:start + 4 * count].cast("I")
+    start += 4 * count
+    flags = view[start:start + count]
+    return RowTable(size, mashed, scores, flags, source=source)
+
+
+_loaded: dict[int, RowTable] = {}
+
+
+def load_row_table(size: int, directory: Path | None = None) -> RowTable:
+    """
+    Open the cached table for ``size``, building and saving it first if needed.
+
+    The table is registered so that ``GameBoard.mash`` and ``GameBoard.can_mash``
+    use it for boards of that size.
+    """
+    path = table_path(size, directory)
+    if not path.exists():
+        save_row_table(build_row_table(size), path)
+    table = open_row_table(path)
+    TableError.require_condition(table.size == size, f"{path} holds a table for size {table.size}")
+    _loaded[size] = table
+    return table
+
+
+def unload_row_table(size: int):
+    _loaded.pop(size, None)
+
+
+def row_table(size: int) -> RowTable | None:
+    return _loaded.get(size)
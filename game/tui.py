@@ -0,0 +1,199 @@
+"""
+The terminal UI, built on textual.
+
+Only ``game.cli play`` needs this module; the engine in ``game.board``
+never imports it.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+import snick
+from rich.panel import Panel
+from textual.app import App
+from textual.views import GridView
+from textual.reactive import Reactive
+from textual.widget import Widget
+
+from game.board import DEFAULT_BOARD_SIZE, Direction, GameBoard, GameOverError, MoveFrame, idx
+from game.history import History
+from game.record import GameRecorder
+
+PANEL_CACHE_SIZE = 256
+
+
+class Status(Widget):
+
+    score = Reactive(0)
+    turn = Reactive(0)
+    message = Reactive("")
+
+    def render(self):
+        parts = [
+            f"Score: {self.score}",
+            f"Turn:  {self.turn}",
+        ]
+        if self.message:
+            parts.extend([
+                "",
+                self.message,
+            ])
+
+        return Panel(snick.dedent_all(*parts))
+
+
+class TuiTile(Widget):
+
+    value = Reactive(None)
+
+    def render(self):
+        if self.value is None:
+            return ""
+        return tile_panel(self.value, self.size.width)
+
+
+class TuiBoard(GridView):
+    board: GameBoard
+    turn = Reactive(0)
+    game_over = Reactive(False)
+
+    def __init__(self, size: int, *args, record: Path | None = None, **kwargs):
+        self.board = GameBoard(size=size)
+        self.board.reset()
+        self.history = History(self.board)
+        self.recorder = None
+        if record is not None:
+            self.recorder = GameRecorder(record, self.board)
+        super().__init__(*args, **kwargs)
+
+    def watch_game_over(self, value: bool):
+        self.log(f"Game over!")
+        if self.status is not None and value is True:
+            self.status.message = "Game Over! (no moves left)"
+
+    def watch_turn(self, value: int):
+        self.log(f"reacted to change in turn: {value}")
+        if self.status is not None:
+            self.status.score = self.board.score
+            self.status.turn = value
+
+    def show(self, frame: MoveFrame):
+        """
+        Update the tiles of the cells in ``frame``, leaving the rest of the board alone.
+        """
+        for move in frame.moves:
+            pos = move.final_pos
+            self.tui_tiles[idx(self.board.size, pos.row, pos.col)].value = move.final_value
+
+    def mash(self, direction: Direction):
+        if self.game_over:
+            return
+        self.log(f"Called mash with {direction}")
+        frame = MoveFrame(moves=[])
+        score = self.board.score
+        try:
+            if self.recorder is not None:
+                try:
+                    self.recorder.move(direction, frame)
+                finally:
+                    self.recorder.flush()
+            else:
+                self.board.move(direction, frame)
+            self.turn += 1
+            self.status.message = ""
+        except GameOverError:
+            self.game_over = True
+            self.turn += 1
+            self.log("That's it, man! Game over, man! Game OVER!")
+        except Exception as err:
+            self.status.message = str(err)
+        if frame.moves:
+            self.history.push(frame, self.board.score - score)
+        self.show(frame)
+
+    def undo(self):
+        # A record can only be replayed forward, so there is no going back
+        # while recording.
+        if self.recorder is not None:
+            self.status.message = "Can't undo while recording"
+            return
+        if not self.history.can_undo:
+            self.status.message = "Nothing to undo"
+            return
+        self.show(self.history.undo())
+        self.game_over = False
+        self.status.message = ""
+        self.turn -= 1
+
+    def redo(self):
+        if not self.history.can_redo:
+            self.status.message = "Nothing to redo"
+            return
+        self.show(self.history.redo())
+        self.game_over = not self.board.has_move()
+        self.status.message = ""
+        self.turn += 1
+
+    def on_mount(self) -> None:
+
+        self.grid.add_column("col", max_size=10, repeat=self.board.size)
+        self.grid.add_row("row", max_size=4, repeat=self.board.size)
+        self.grid.add_row("status", max_size=8)
+
+        self.grid.add_areas(status=f"col1-start|col{self.board.size}-end,status")
+
+        self.tui_tiles = [TuiTile() for _ in self.board.grid]
+        for (tui_tile, tile) in zip(self.tui_tiles, self.board.grid):
+            tui_tile.value = tile.value
+        self.status = Status()
+        self.game_over = False
+
+        self.grid.place(*self.tui_tiles, status=self.status)
+        self.turn = 1
+
+
+@lru_cache(maxsize=PANEL_CACHE_SIZE)
+def tile_panel(value: int, width: int) -> Panel:
+    """
+    Build the panel for a tile of ``value`` in a widget ``width`` cells wide.
+
+    A panel doesn't change once it is built, so every tile showing the same
+    value at the same width shares one.
+    """
+    # Leave room for the border and padding, but never cut a value short.
+    return Panel(f"{value: ^{max(len(str(value)), width - 4)}}")
+
+
+class Game(App):
+    tui_board: TuiBoard
+
+    def __init__(self, *args, size: int = DEFAULT_BOARD_SIZE, record: Path | None = None, **kwargs):
+        self.size = size
+        self.record = record
+        super().__init__(*args, **kwargs)
+
+    async def on_load(self, event):
+        await self.bind("w", f"mash('{Direction.NORTH}')")
+        await self.bind("up", f"mash('{Direction.NORTH}')")
+        await self.bind("s", f"mash('{Direction.SOUTH}')")
+        await self.bind("down", f"mash('{Direction.SOUTH}')")
+        await self.bind("a", f"mash('{Direction.WEST}')")
+        await self.bind("left", f"mash('{Direction.WEST}')")
+        await self.bind("d", f"mash('{Direction.EAST}')")
+        await self.bind("right", f"mash('{Direction.EAST}')")
+        await self.bind("u", "undo")
+        await self.bind("r", "redo")
+
+    async def action_mash(self, dir_str: str):
+        self.log(f"Got an action mash of {dir_str}")
+        self.tui_board.mash(Direction[dir_str])
+
+    async def action_undo(self):
+        self.tui_board.undo()
+
+    async def action_redo(self):
+        self.tui_board.redo()
+
+    async def on_mount(self) -> None:
+        self.tui_board = TuiBoard(self.size, record=self.record)
+        await self.view.dock(self.tui_board)
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from game.board import GameBoard, Tile
+
+
+@pytest.fixture
+def make_board():
+    """
+    Build a board from rows of tile values, with None for an empty cell.
+    """
+    def _helper(values: list[list[int | None]]) -> GameBoard:
+        size = len(values)
+        return GameBoard(size=size, grid=[Tile.make(i, j, values[i][j]) for i in range(size) for j in range(size)])
+
+    return _helper
+
+
+@pytest.fixture
+def random_board():
+    """
+    Build a board with about ``fill`` of its cells holding tiles up to ``2 ** max_exponent``.
+    """
+    def _helper(rng: random.Random, size: int = 4, fill: float = 0.6, max_exponent: int = 5) -> GameBoard:
+        return GameBoard(size=size, grid=[
+            Tile.make(i, j, value=2 ** rng.randint(1, max_exponent) if rng.random() < fill else None)
+            for i in range(size)
+            for j in range(size)
+        ])
+
+    return _helper
+
+
+@pytest.fixture
+def random_boards(random_board):
+    def _helper(count: int, size: int, seed: int = 0, fill: float = 0.6, max_exponent: int = 5) -> list[GameBoard]:
+        rng = random.Random(seed)
+        return [random_board(rng, size, fill, max_exponent) for _ in range(count)]
+
+    return _helper
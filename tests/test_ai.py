@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from game.ai import Expectimax, TranspositionTable, best_move, empty_cell_heuristic
+from game.bitboard import BitBoard
+from game.board import Direction, GameBoard, GameError, GameOverError
+
+
+def test_transposition_table_evicts_least_recently_used():
+    table = TranspositionTable(capacity=2)
+    table.put((1, 1), 1.0)
+    table.put((2, 1), 2.0)
+    assert table.get((1, 1)) == 1.0
+    table.put((3, 1), 3.0)
+    assert len(table) == 2
+    assert table.evictions == 1
+    assert table.get((2, 1)) is None
+    assert table.get((3, 1)) == 3.0
+    assert (table.hits, table.misses) == (2, 1)
+    assert table.hit_rate == pytest.approx(2 / 3)
+
+
+def test_transposition_table_rejects_bad_capacity():
+    with pytest.raises(GameError):
+        TranspositionTable(capacity=0)
+
+
+def test_empty_cell_heuristic(make_board):
+    assert empty_cell_heuristic(0) == 17.0
+    assert empty_cell_heuristic(BitBoard.from_game_board(make_board([[2] * 4] * 4)).cells) == 1.0
+
+
+def test_move_values_only_cover_legal_moves(make_board):
+    board = make_board([
+        [2, 4, 8, 16],
+        [4, 8, 16, 32],
+        [8, 16, 32, 64],
+        [16, 32, 64, None],
+    ])
+    values = Expectimax(depth=2).move_values(board)
+    assert set(values) == {Direction.SOUTH, Direction.EAST}
+
+
+def test_best_move_avoids_losing(make_board):
+    # Moving north or west fills the last gap with no merges left to make;
+    # moving south or east keeps the 2s lined up.
+    board = make_board([
+        [4, 8, 4, 8],
+        [8, 4, 8, 4],
+        [4, 8, 4, 2],
+        [8, 4, 2, None],
+    ])
+    assert Expectimax(depth=2).best_move(board) in (Direction.SOUTH, Direction.EAST)
+
+
+def test_best_move_raises_on_game_over(make_board):
+    board = make_board([
+        [2, 4, 2, 4],
+        [4, 2, 4, 2],
+        [2, 4, 2, 4],
+        [4, 2, 4, 2],
+    ])
+    with pytest.raises(GameOverError):
+        best_move(board)
+
+
+def test_search_reuses_the_table(make_board):
+    board = make_board([
+        [2, None, None, None],
+        [None, 4, None, None],
+        [None, None, 2, None],
+        [None, None, None, 8],
+    ])
+    ai = Expectimax(depth=3)
+    ai.best_move(board)
+    first_misses = ai.table.misses
+    assert ai.table.hits > 0
+    ai.best_move(board)
+    assert ai.table.misses == first_misses
+
+
+def test_plays_better_than_random():
+    random.seed(0)
+    board = GameBoard(size=4)
+    board.reset()
+    ai = Expectimax(depth=2)
+    try:
+        for _ in range(200):
+            board.move(ai.best_move(board))
+    except GameOverError:
+        pass
+    assert max(t.value or 0 for t in board.grid) >= 128
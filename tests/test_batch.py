@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from game.batch import BatchBoard, mash_rows
+from game.board import BadMoveError, Direction, GameBoard, GameError, GameOverError
+
+
+def test_round_trip(random_boards):
+    boards = random_boards(10, 5, seed=1)
+    for (n, board) in enumerate(boards):
+        board.score = n * 10
+    batch = BatchBoard.from_game_boards(boards)
+    assert batch.exponents.shape == (10, 5, 5)
+    assert batch.to_game_boards() == boards
+
+
+def test_from_game_boards_rejects_mixed_sizes(random_boards):
+    with pytest.raises(GameError, match="same size"):
+        BatchBoard.from_game_boards(random_boards(1, 3, seed=1) + random_boards(1, 4, seed=1))
+
+
+def test_mash_rows():
+    rows = np.array([
+        [1, 1, 1, 1],
+        [1, 0, 1, 2],
+        [0, 0, 0, 3],
+        [1, 2, 3, 4],
+        [2, 2, 1, 0],
+    ], dtype=np.uint8)
+    (mashed, scores) = mash_rows(rows)
+    assert mashed.tolist() == [
+        [2, 2, 0, 0],
+        [2, 2, 0, 0],
+        [3, 0, 0, 0],
+        [1, 2, 3, 4],
+        [3, 1, 0, 0],
+    ]
+    assert scores.tolist() == [8, 4, 0, 0, 8]
+
+
+@pytest.mark.parametrize("size", [3, 4, 6])
+def test_mash_matches_game_board(size, random_boards):
+    boards = random_boards(120, size, seed=size)
+    directions = [list(Direction)[n % 4] for n in range(len(boards))]
+    batch = BatchBoard.from_game_boards(boards)
+    expected_valid = [b.can_mash(d) for (b, d) in zip(boards, directions)]
+    assert batch.can_mash(directions).tolist() == expected_valid
+
+    (gained, valid) = batch.mash(directions)
+    expected_gained = [b.mash(d) for (b, d) in zip(boards, directions)]
+    assert gained.tolist() == expected_gained
+    assert valid.tolist() == expected_valid
+    assert batch.to_game_boards() == boards
+
+
+def test_has_move_matches_game_board(random_boards):
+    boards = random_boards(200, 3, seed=5, fill=0.95) + random_boards(1, 3, seed=5, fill=0.0)
+    batch = BatchBoard.from_game_boards(boards)
+    assert batch.has_move().tolist() == [b.has_move() for b in boards]
+
+
+def test_sprinkle():
+    batch = BatchBoard.empty(3, 3)
+    spawned = batch.sprinkle(
+        mask=np.array([True, True, False]),
+        picks=np.array([0.0, 0.99, 0.5]),
+        rolls=np.array([0.5, 0.95, 0.5]),
+    )
+    assert spawned.tolist() == [True, True, False]
+    assert batch.exponents.reshape(3, -1).tolist() == [
+        [1, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 2],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ]
+
+
+def test_sprinkle_split():
+    batch = BatchBoard.empty(20000, 3)
+    batch.sprinkle(rng=np.random.default_rng(0))
+    values = batch.exponents.max(axis=(1, 2))
+    assert (values > 0).all()
+    assert abs((values == 2).mean() - 0.1) < 0.01
+
+
+def test_move_matches_game_board(mocker):
+    size = 4
+    count = 20
+    boards = []
+    for _ in range(count):
+        board = GameBoard(size=size)
+        board.reset(should_sprinkle=False)
+        boards.append(board)
+    batch = BatchBoard.from_game_boards(boards)
+    alive = [True] * count
+
+    rng = np.random.default_rng(42)
+    picks = rng.random((150, count))
+    rolls = rng.random((150, count))
+    batch.sprinkle(picks=picks[0], rolls=rolls[0])
+    directions = rng.integers(0, 4, size=(150, count))
+
+    for n in range(count):
+        mocker.patch("game.board.choice", lambda seq: seq[int(picks[0][n] * len(seq))])
+        mocker.patch("game.board.random", return_value=rolls[0][n])
+        boards[n].sprinkle()
+
+    for turn in range(1, 150):
+        (gained, valid, over) = batch.move(directions[turn], picks=picks[turn], rolls=rolls[turn])
+        for n in range(count):
+            if not alive[n]:
+                continue
+            mocker.patch("game.board.choice", lambda seq: seq[int(picks[turn][n] * len(seq))])
+            mocker.patch("game.board.random", return_value=rolls[turn][n])
+            direction = list(Direction)[directions[turn][n]]
+            try:
+                boards[n].move(direction)
+                assert valid[n] and not over[n]
+            except BadMoveError:
+                assert not valid[n]
+            except GameOverError:
+                assert valid[n] and over[n]
+                alive[n] = False
+            assert batch.to_game_board(n) == boards[n]
@@ -0,0 +1,72 @@
+import pytest
+from typer.testing import CliRunner
+
+from game.benchmark import (
+    BenchmarkReport,
+    CASES,
+    compare,
+    load_report,
+    make_board,
+    measure_startup,
+    run_benchmarks,
+    save_report,
+)
+from game.cli import cli
+
+
+def test_make_board_is_seeded():
+    assert make_board(5, 0.5, seed=1) == make_board(5, 0.5, seed=1)
+    assert make_board(5, 0.5, seed=1) != make_board(5, 0.5, seed=2)
+    assert all(t.value is None for t in make_board(4, 0.0, seed=1).grid)
+
+
+def test_run_benchmarks_covers_every_case():
+    report = run_benchmarks(sizes=[3], fills=[0.5], min_time=0.001)
+    assert {r.name for r in report.results} == {c[0] for c in CASES}
+    assert all(r.ops_per_sec > 0 for r in report.results)
+    assert all(r.alloc_bytes_per_call >= 0 for r in report.results)
+
+
+def test_run_benchmarks_skips_impossible_cases():
+    report = run_benchmarks(sizes=[3], fills=[0.0], names=["GameBoard.move"], min_time=0.001)
+    assert report.results == []
+
+
+def test_compare_flags_regressions():
+    baseline = run_benchmarks(sizes=[3], fills=[0.5], names=["GameBoard.has_move"], min_time=0.001)
+    report = baseline.copy(deep=True)
+    assert compare(report, baseline) == []
+
+    report.results[0].ops_per_sec = baseline.results[0].ops_per_sec * 0.5
+    [regression] = compare(report, baseline, tolerance=0.2)
+    assert regression.name == "GameBoard.has_move"
+    assert regression.ratio == pytest.approx(0.5)
+    assert compare(report, baseline, tolerance=0.6) == []
+
+
+def test_save_and_load_report(tmp_path):
+    report = run_benchmarks(sizes=[3], fills=[0.5], names=["GameBoard.pretty"], min_time=0.001)
+    save_report(report, tmp_path / "results.json")
+    assert load_report(tmp_path / "results.json") == report
+
+
+def test_bench_command(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    save_report(BenchmarkReport(python="3", machine="x", results=[]), baseline)
+    result = CliRunner().invoke(cli, [
+        "bench",
+        "--size", "3",
+        "--case", "GameBoard.has_move",
+        "--min-time", "0.001",
+        "--output", str(tmp_path / "results.json"),
+        "--baseline", str(baseline),
+    ])
+    assert result.exit_code == 0, result.output
+    assert "No regressions" in result.output
+    assert len(load_report(tmp_path / "results.json").results) == 5
+
+
+def test_measure_startup():
+    results = measure_startup(repeat=1)
+    assert [r.name for r in results] == ["python", "import game.board", "import game.simulate", "game --help"]
+    assert all(r.seconds > 0 for r in results)
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from game.board import BadMoveError, Direction, GameError, GameOverError
+from game.bitboard import BitBoard, transpose
+
+
+def test_round_trip(make_board):
+    board = make_board([
+        [2, 4, 8, 16],
+        [None, 32, None, 64],
+        [128, 256, 512, 1024],
+        [2048, None, 4096, 32768],
+    ])
+    board.score = 1234
+    bits = BitBoard.from_game_board(board)
+    assert bits.value(0, 0) == 2
+    assert bits.value(1, 0) is None
+    assert bits.value(3, 3) == 32768
+    assert bits.to_game_board() == board
+
+
+def test_from_game_board_rejects_bad_boards(make_board):
+    with pytest.raises(GameError, match="must be 4x4"):
+        BitBoard.from_game_board(make_board([[None] * 3] * 3))
+
+    with pytest.raises(GameError, match="Invalid tile value"):
+        BitBoard.from_game_board(make_board([[3] + [None] * 3] + [[None] * 4] * 3))
+
+    with pytest.raises(GameError, match="too big"):
+        BitBoard.from_game_board(make_board([[65536] + [None] * 3] + [[None] * 4] * 3))
+
+
+def test_transpose(random_board):
+    rng = random.Random(1)
+    board = random_board(rng, fill=1.0, max_exponent=6)
+    bits = BitBoard.from_game_board(board)
+    transposed = BitBoard(transpose(bits.cells))
+    for i in range(4):
+        for j in range(4):
+            assert transposed.exponent(j, i) == bits.exponent(i, j)
+    assert transpose(transposed.cells) == bits.cells
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+def test_matches_game_board(direction, random_board):
+    rng = random.Random(direction.value)
+    for _ in range(200):
+        board = random_board(rng, max_exponent=6)
+        bits = BitBoard.from_game_board(board)
+        assert bits.can_mash(direction) is board.can_mash(direction)
+        assert bits.mash(direction) == board.mash(direction)
+        assert bits.to_game_board() == board
+        assert bits.has_move() is board.has_move()
+
+
+def test_mash_overflow(make_board):
+    bits = BitBoard.from_game_board(make_board([[32768, 32768, None, None]] + [[None] * 4] * 3))
+    assert bits.can_mash(Direction.WEST)
+    with pytest.raises(GameError, match="too big"):
+        bits.mash(Direction.WEST)
+
+
+def test_sprinkle(mocker):
+    bits = BitBoard()
+    mocker.patch("game.bitboard.random", return_value=0.8)
+    bits.sprinkle()
+    assert bits.cells.bit_count() == 1
+    assert sorted(bits.to_game_board().grid, key=lambda t: t.value or 0)[-1].value == 2
+
+    bits = BitBoard()
+    mocker.patch("game.bitboard.random", return_value=0.9)
+    bits.sprinkle()
+    assert sorted(bits.to_game_board().grid, key=lambda t: t.value or 0)[-1].value == 4
+
+
+def test_move(mocker, make_board):
+    mocker.patch("game.bitboard.random", return_value=0.5)
+    bits = BitBoard.from_game_board(make_board([
+        [2, 4, 8, 16],
+        [32, 64, 128, 256],
+        [512, 1024, 2048, 4096],
+        [8192, 16384, 2, 2],
+    ]))
+    with pytest.raises(BadMoveError):
+        bits.move(Direction.NORTH)
+
+    with pytest.raises(GameOverError):
+        bits.move(Direction.WEST)
+    assert bits.score == 4
+
+
+def test_move_detects_game_over_like_has_move(random_board):
+    rng = random.Random(7)
+    random.seed(7)
+    bits = BitBoard.from_game_board(random_board(rng, max_exponent=6))
+    for _ in range(2000):
+        legal = [d for d in Direction if bits.can_mash(d)]
+        if not legal:
+            bits = BitBoard.from_game_board(random_board(rng, max_exponent=6))
+            continue
+        try:
+            bits.move(rng.choice(legal))
+            assert bits.has_move()
+        except GameOverError:
+            assert not bits.has_move()
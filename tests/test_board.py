@@ -1,27 +1,34 @@
+import random
+import subprocess
+import sys
+
 import pytest
 import snick
+from typer.testing import CliRunner
 
-from game.board import Direction, Tile, Slice, GameBoard
-
-
-@pytest.fixture
-def board_reader():
-    def _helper(text: str):
-        lines = text.strip().split("\n")
-        size = len(lines)
-        grid = []
-        for (i, line) in enumerate(lines):
-            values = [v.strip()  for v in line.split(',')]
-            for (j, value) in enumerate(values):
-                if value == "":
-                    value = None
-                else:
-                    value = int(value)
-                grid.append(Tile.make(i, j, value=value))
-
-        return GameBoard(size=size, grid=grid)
-
-    return _helper
+from game.board import (
+    SPAWN_VALUES,
+    Afterstate,
+    BadMoveError,
+    CounterSpawns,
+    Direction,
+    GameError,
+    GameOverError,
+    MoveFrame,
+    Position,
+    RandomSpawns,
+    Spawn,
+    SpawnSource,
+    Tile,
+    Slice,
+    GameBoard,
+    decode_grid,
+    encode_grid,
+    exponent_to_value,
+    value_to_exponent,
+)
+from game.ai import SPAWN_ODDS
+from game.cli import cli
 
 
 @pytest.mark.parametrize(
@@ -366,8 +373,8 @@ def test_slice(size, direction, expected):
     assert all(c == e for (c, e) in zip(computed, expected))
 
 
-def test_reader(board_reader):
-    board = board_reader("""
+def test_reader():
+    board = GameBoard.from_text("""
         2, 4, 8
         4,  , 4
         8, 4, 2
@@ -385,8 +392,8 @@ def test_reader(board_reader):
     assert board.tile(2, 2).value == 2
 
 
-def test_pretty(board_reader):
-    board = board_reader("""
+def test_pretty():
+    board = GameBoard.from_text("""
          2,   4,   8
         16,    ,  32
         64, 128, 256
@@ -487,8 +494,8 @@ def test_pretty(board_reader):
         ),
     ],
 )
-def test_can_mash(board_text, direction, expected, board_reader):
-    board = board_reader(board_text)
+def test_can_mash(board_text, direction, expected):
+    board = GameBoard.from_text(board_text)
     assert board.can_mash(direction) is expected
 
 
@@ -599,10 +606,10 @@ def test_can_mash(board_text, direction, expected, board_reader):
         ),
     ],
 )
-def test_mash_board(board_text, direction, expected, score, board_reader):
-    board = board_reader(board_text)
+def test_mash_board(board_text, direction, expected, score):
+    board = GameBoard.from_text(board_text)
     assert board.mash(direction) == score
-    assert board== board_reader(expected)
+    assert board== GameBoard.from_text(expected)
 
 
 @pytest.mark.parametrize(
@@ -650,8 +657,8 @@ def test_mash_board(board_text, direction, expected, score, board_reader):
         ),
     ],
 )
-def test_has_move(board_text, expected, board_reader):
-    board = board_reader(board_text)
+def test_has_move(board_text, expected):
+    board = GameBoard.from_text(board_text)
     assert board.has_move() is expected
 
 
@@ -675,3 +682,409 @@ def test_sprinkle(mocker):
     assert values.count(2) == 0
     assert values.count(4) == 1
     assert values.count(None) == 8
+
+
+def test_empty_index_follows_moves():
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 2,  ,
+             , 4, 4, 8
+            2,  , 2,
+            8, 4, 2, 2
+            """
+        )
+    )
+    assert board.empty_count == 5
+    assert not board.is_full()
+
+    for direction in [Direction.WEST, Direction.SOUTH, Direction.EAST, Direction.NORTH] * 3:
+        if board.can_mash(direction):
+            board.mash(direction)
+        if not board.is_full():
+            board.sprinkle()
+        assert board.empty_count == [t.value for t in board.grid].count(None)
+        assert board.is_full() is (board.empty_count == 0)
+
+
+def test_sprinkle_picks_in_row_major_order(mocker):
+    board = GameBoard(size=3)
+    board.reset(should_sprinkle=False)
+    board.tile(0, 0).value = 2
+    board.tile(1, 1).value = 2
+    board.reindex()
+
+    mocker.patch("game.board.choice", lambda seq: seq[1])
+    mocker.patch("game.board.random", return_value=0.5)
+    tile = board.sprinkle()
+    assert tile is board.tile(0, 2)
+    assert tile.value == 2
+    assert board.empty_count == 6
+
+
+def test_sprinkle_full_board():
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 4, 8
+            4, 8, 2
+            8, 2, 4
+            """
+        )
+    )
+    assert board.is_full()
+    assert not board.has_move()
+    with pytest.raises(IndexError):
+        board.sprinkle()
+
+
+def test_move_rejects_a_move_that_changes_nothing():
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 4,
+            8,  ,
+             ,  ,
+            """
+        )
+    )
+    before = board.copy(deep=True)
+    with pytest.raises(BadMoveError, match="Can't move WEST"):
+        board.move(Direction.WEST)
+    assert board == before
+    assert board.empty_count == 6
+
+
+def test_move_ends_the_game(mocker):
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 4, 2
+            4, 2, 4
+             , 8, 16
+            """
+        )
+    )
+    mocker.patch("game.board.random", return_value=0.5)
+    with pytest.raises(GameOverError, match="No moves left"):
+        board.move(Direction.WEST)
+    assert board.score == 0
+    assert [t.value for t in board.grid] == [2, 4, 2, 4, 2, 4, 8, 16, 2]
+
+
+def test_move_mashes_once(mocker):
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 2,
+             , 4,
+             ,  ,
+            """
+        )
+    )
+    can_mash = mocker.spy(GameBoard, "can_mash")
+    board.move(Direction.WEST)
+    assert can_mash.call_count == 0
+    assert board.score == 4
+
+
+@pytest.mark.parametrize("size", [3, 4, 6])
+def test_has_move_matches_can_mash_on_full_boards(size):
+    rng = random.Random(size)
+    for _ in range(200):
+        grid = [Tile.make(i, j, value=2 ** rng.randint(1, 3)) for i in range(size) for j in range(size)]
+        board = GameBoard(size=size, grid=grid)
+        assert board.has_move() is any(board.can_mash(d) for d in Direction)
+
+
+@pytest.mark.parametrize("size", [3, 4, 6])
+def test_afterstates_match_mash(size):
+    rng = random.Random(size)
+    for _ in range(100):
+        grid = [
+            Tile.make(i, j, value=2 ** rng.randint(1, 3) if rng.random() < 0.7 else None)
+            for i in range(size)
+            for j in range(size)
+        ]
+        board = GameBoard(size=size, grid=grid, score=10, spawns=CounterSpawns(1))
+        before = board.copy(deep=True)
+        afterstates = board.afterstates()
+        assert list(afterstates) == list(Direction)
+        assert board == before
+
+        for direction in Direction:
+            after = afterstates[direction]
+            expected = board.copy(deep=True)
+            assert after.legal is expected.can_mash(direction)
+            assert after.score == expected.mash(direction)
+            assert after.values == [t.value for t in expected.grid]
+
+            played = after.board()
+            assert played.grid == expected.grid
+            assert played.score == 10 + after.score
+            assert played.spawns is board.spawns
+            assert played.empty_count == expected.empty_count
+
+
+def test_afterstates_of_a_stuck_board():
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 4, 2
+            4, 2, 4
+            2, 4, 2
+            """
+        )
+    )
+    values = [t.value for t in board.grid]
+    assert list(board.afterstates().values()) == [
+        Afterstate(direction, board, values, 0, False) for direction in Direction
+    ]
+
+
+def test_spawn_outcomes():
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 4,
+             , 8, 2
+            4, 2, 4
+            """
+        )
+    )
+    before = board.copy(deep=True)
+    outcomes = []
+    for spawn in board.spawn_outcomes():
+        tile = board.place(spawn.pos.row, spawn.pos.col, spawn.value)
+        assert board.empty_count == 1
+        board.put(tile.pos.row, tile.pos.col, None)
+        outcomes.append(spawn)
+    assert board == before
+    assert board.empty_count == 2
+    assert outcomes == [
+        Spawn(Position.make(0, 2), 2, 0.45),
+        Spawn(Position.make(0, 2), 4, 0.05),
+        Spawn(Position.make(1, 0), 2, 0.45),
+        Spawn(Position.make(1, 0), 4, 0.05),
+    ]
+
+
+def test_random_spawns_are_seeded():
+    def draws(spawns):
+        return [spawns.draw() for _ in range(3000)]
+
+    assert draws(RandomSpawns(7)) == draws(RandomSpawns(7, block_size=13))
+    assert draws(RandomSpawns(7)) != draws(RandomSpawns(8))
+
+
+def test_spawn_sources_must_be_complete():
+    class DrawOnly(SpawnSource):
+        def draw(self) -> tuple[float, int]:
+            return (0.0, 2)
+
+    with pytest.raises(TypeError, match="abstract"):
+        DrawOnly()
+
+
+def test_random_spawns_split():
+    spawns = RandomSpawns(0)
+    values = [spawns.draw()[1] for _ in range(100_000)]
+    assert set(values) == {2, 4}
+    assert abs(values.count(4) / len(values) - 0.1) < 0.005
+
+
+def test_sprinkle_from_spawn_source(mocker):
+    choice = mocker.patch("game.board.choice")
+    boards = []
+    for _ in range(2):
+        board = GameBoard(size=4, spawns=RandomSpawns("game"))
+        board.reset()
+        for _ in range(10):
+            board.sprinkle()
+        boards.append(board)
+    assert boards[0] == boards[1]
+    assert boards[0].empty_count == 4
+    assert choice.call_count == 0
+
+
+def test_deep_copy_spawns_the_same_tiles():
+    board = GameBoard(size=4, spawns=RandomSpawns(3))
+    board.reset()
+    twin = board.copy(deep=True)
+    assert twin.spawns is not board.spawns
+    for _ in range(5):
+        assert board.sprinkle() == twin.sprinkle()
+    assert board.copy().spawns is board.spawns
+
+
+def test_move_frame_holds_the_changed_cells():
+    board = GameBoard.from_text(
+        snick.dedent(
+            """
+            2, 2, 4,
+             , 4,  , 4
+            8, 4, 2, 2
+            2, 4, 8, 16
+            """
+        )
+    )
+    board.spawns = RandomSpawns(0)
+    for direction in [Direction.WEST, Direction.SOUTH, Direction.EAST, Direction.NORTH] * 5:
+        before = board.copy(deep=True)
+        frame = MoveFrame(moves=[])
+        try:
+            board.move(direction, frame)
+        except BadMoveError:
+            assert frame.moves == []
+            continue
+        except GameOverError:
+            pass
+
+        replayed = before.copy(deep=True)
+        for move in frame.moves:
+            assert move.start_pos == move.final_pos
+            tile = replayed.tile(move.final_pos.row, move.final_pos.col)
+            assert tile.value == move.start_value
+            tile.value = move.final_value
+        assert replayed.grid == board.grid
+
+        changed = {(t.pos.row, t.pos.col) for (t, u) in zip(board.grid, before.grid) if t.value != u.value}
+        assert changed <= {(m.final_pos.row, m.final_pos.col) for m in frame.moves}
+
+
+def test_from_text_round_trip():
+    text = snick.dedent(
+        """
+        2, , 4
+        , 8,
+        16, , 2048
+        """
+    )
+    board = GameBoard.from_text(text)
+    assert board.size == 3
+    assert board.key() == (2, 0, 4, 0, 8, 0, 16, 0, 2048)
+    assert board.empty_count == 4
+    assert GameBoard.from_text(board.to_text()) == board
+
+
+@pytest.mark.parametrize(
+    "text,message",
+    [
+        ("2, 4\n4, 2", "too small"),
+        ("2, 4, 8\n4, 2\n8, 4, 2", "Wrong number of values on line 2"),
+        ("2, 4, x\n4, 2, 8\n8, 4, 2", "Invalid tile value: x"),
+        ("2, 4, 6\n4, 2, 8\n8, 4, 2", "6 is not a power of 2"),
+    ],
+)
+def test_from_text_rejects_bad_boards(text, message):
+    with pytest.raises(GameError, match=message):
+        GameBoard.from_text(text)
+
+
+def test_save_and_load(tmp_path):
+    board = GameBoard.from_text("2, , 4\n, 8, \n16, , 2")
+    board.score = 120
+    board.save(tmp_path / "board.json")
+    loaded = GameBoard.load(tmp_path / "board.json")
+    assert loaded == board
+    assert loaded.empty_count == 4
+
+    (tmp_path / "board.csv").write_text(board.to_text())
+    assert GameBoard.load(tmp_path / "board.csv").key() == board.key()
+
+    (tmp_path / "broken.json").write_text('{"size": 3, "grid": "nope"}')
+    with pytest.raises(GameError, match="Invalid board file"):
+        GameBoard.load(tmp_path / "broken.json")
+
+
+@pytest.mark.parametrize("size,message", [(2, "too small: 2x2"), (33, "too big: 33x33")])
+def test_board_size_is_checked(size, message):
+    with pytest.raises(GameError, match=message):
+        GameBoard(size=size)
+    with pytest.raises(GameError, match=message):
+        GameBoard.from_key((2,) * size * size)
+    with pytest.raises(GameError, match=message):
+        GameBoard.from_text("\n".join([", ".join(["2"] * size)] * size))
+
+    result = CliRunner().invoke(cli, ["play", "--size", str(size)])
+    assert result.exit_code == 2
+    assert message in result.output
+
+
+def test_big_boards():
+    board = GameBoard(size=32, spawns=RandomSpawns(32))
+    board.reset()
+    assert board.empty_count == 32 * 32 - 2
+    board.move(next(d for d in Direction if board.can_mash(d)))
+    assert board.empty_count in (32 * 32 - 3, 32 * 32 - 2)
+    assert board.score in (0, 4, 8)
+
+
+def test_counter_spawns():
+    spawns = CounterSpawns(7)
+    draws = [spawns.draw() for _ in range(1000)]
+    assert spawns.drawn == 1000
+    assert all(0 <= pick < 1 and value in (2, 4) for (pick, value) in draws)
+    assert 50 < sum(value == 4 for (_, value) in draws) < 150
+
+    # The state is just the seed and the draw count.
+    resumed = CounterSpawns(7, drawn=500)
+    assert [resumed.draw() for _ in range(500)] == draws[500:]
+    assert CounterSpawns("seven").seed == CounterSpawns("seven").seed
+    assert CounterSpawns(-1).seed >= 0
+
+
+def test_engine_import_is_headless():
+    script = "import sys, game.board; print(sorted({'textual', 'rich', 'typer', 'snick'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_exponent_encoding():
+    assert [value_to_exponent(v) for v in (None, 2, 4, 2048)] == [0, 1, 2, 11]
+    assert [exponent_to_value(e) for e in (0, 1, 2, 11)] == [None, 2, 4, 2048]
+    for value in (1, 3, 6):
+        with pytest.raises(GameError, match="Invalid tile value"):
+            value_to_exponent(value)
+
+    board = GameBoard.from_text(
+        """
+        2,,4
+        ,8,
+        1024,,
+        """
+    )
+    assert encode_grid(board.grid) == bytes([1, 0, 2, 0, 3, 0, 10, 0, 0])
+    assert decode_grid(encode_grid(board.grid), 3) == board.grid
+
+
+def test_spawn_odds_come_from_spawn_values():
+    assert sum(odds for (_, odds) in SPAWN_VALUES) == pytest.approx(1.0)
+    assert SPAWN_ODDS == tuple((value_to_exponent(value), odds) for (value, odds) in SPAWN_VALUES)
+    for spawns in (RandomSpawns(3), CounterSpawns(3)):
+        draws = [spawns.draw() for _ in range(20_000)]
+        for (value, odds) in SPAWN_VALUES:
+            assert sum(v == value for (_, v) in draws) / len(draws) == pytest.approx(odds, abs=0.01)
+
+
+def test_slice_mash_keeps_the_empty_index():
+    board = GameBoard.from_text(
+        """
+        2, 2,
+         ,  , 4
+         ,  ,
+        """
+    )
+    for slc in board.slice(Direction.WEST):
+        slc.mash()
+    assert board == GameBoard.from_text(
+        """
+        4,  ,
+        4,  ,
+         ,  ,
+        """
+    )
+    assert board.empty_count == 7
+    for _ in range(7):
+        board.sprinkle()
+    assert all(t.value is not None for t in board.grid)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from game.board import Direction
+from game.corpus import Corpus, CorpusError, save_corpus
+
+
+def test_round_trip(tmp_path, random_boards):
+    boards = random_boards(50, 4, max_exponent=11)
+    assert save_corpus(tmp_path / "boards.corpus", boards, 4) == 50
+    with Corpus(tmp_path / "boards.corpus") as corpus:
+        assert len(corpus) == 50
+        assert corpus.size == 4
+        assert corpus[7] == boards[7]
+        assert corpus[-1] == boards[-1]
+        assert list(corpus) == boards
+        with pytest.raises(IndexError):
+            corpus[50]
+
+
+def test_append(tmp_path, random_boards):
+    path = tmp_path / "boards.corpus"
+    boards = random_boards(10, 3, max_exponent=11)
+    save_corpus(path, boards[:4], 3)
+    save_corpus(path, boards[4:], 3, append=True)
+    with Corpus(path) as corpus:
+        assert list(corpus) == boards
+
+    with pytest.raises(CorpusError, match="4x4 boards to a corpus of 3x3"):
+        save_corpus(path, random_boards(1, 4, max_exponent=11), 4, append=True)
+    with pytest.raises(CorpusError, match="a 4x4 board to a corpus of 3x3"):
+        save_corpus(tmp_path / "other.corpus", random_boards(1, 4, max_exponent=11), 3)
+
+
+def test_exponents_and_batch(tmp_path, random_boards):
+    boards = random_boards(20, 4, seed=1, max_exponent=11)
+    save_corpus(tmp_path / "boards.corpus", boards, 4)
+    with Corpus(tmp_path / "boards.corpus") as corpus:
+        exponents = corpus.exponents(5, 8)
+        assert exponents.shape == (3, 4, 4)
+        assert not exponents.flags.writeable
+        assert int(exponents[0, 1, 2]) == (boards[5].tile(1, 2).value or 1).bit_length() - 1
+        del exponents
+
+        batch = corpus.batch()
+        batch.mash(np.full(len(batch), list(Direction).index(Direction.WEST)))
+        for (n, board) in enumerate(boards):
+            board.mash(Direction.WEST)
+            assert batch.to_game_board(n).key() == board.key()
+
+
+def test_bad_files(tmp_path, random_boards):
+    path = tmp_path / "boards.corpus"
+    path.write_bytes(b"")
+    with pytest.raises(CorpusError, match="empty"):
+        Corpus(path)
+
+    path.write_bytes(b"not a corpus at all")
+    with pytest.raises(CorpusError, match="not a board corpus"):
+        Corpus(path)
+
+    save_corpus(path, random_boards(2, 3, max_exponent=11), 3)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(CorpusError, match="truncated"):
+        Corpus(path)
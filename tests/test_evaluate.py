@@ -0,0 +1,127 @@
+import random
+
+import numpy as np
+import pytest
+
+from game.ai import Expectimax
+from game.batch import BatchBoard
+from game.bitboard import BitBoard
+from game.board import GameBoard, GameError
+from game.evaluate import Heuristic, LineTerms, Weights, line_terms, term_tables
+
+
+def exponents(board: GameBoard) -> list[list[int]]:
+    return [[(board.tile(i, j).value or 1).bit_length() - 1 for j in range(board.size)] for i in range(board.size)]
+
+
+def direct_score(board: GameBoard, weights: Weights) -> float:
+    grid = exponents(board)
+    size = board.size
+    score = weights.base
+    for (k, line) in enumerate(grid + [list(column) for column in zip(*grid)]):
+        terms = line_terms(line)
+        score += (
+            weights.monotonicity * terms.monotonicity
+            + weights.smoothness * terms.smoothness
+            + weights.merges * terms.merges
+            + (weights.empty * terms.empty if k < size else 0)
+        )
+    corners = [
+        sum(grid[i][j] * (row(i) + col(j)) for i in range(size) for j in range(size))
+        for row in (lambda i: i, lambda i: size - 1 - i)
+        for col in (lambda j: j, lambda j: size - 1 - j)
+    ]
+    return score + weights.corner * max(corners)
+
+
+def test_line_terms():
+    assert line_terms([0, 0, 0, 0]) == LineTerms(empty=4, monotonicity=0, smoothness=0, merges=0)
+    assert line_terms([1, 2, 3, 4]) == LineTerms(empty=0, monotonicity=0, smoothness=-3, merges=0)
+    assert line_terms([3, 0, 3, 1]) == LineTerms(empty=1, monotonicity=-3, smoothness=-2, merges=1)
+    assert line_terms([2, 2, 2, 5]) == LineTerms(empty=0, monotonicity=0, smoothness=-3, merges=2)
+
+
+def test_term_tables_match_line_terms():
+    tables = term_tables(3)
+    for row in range(16 ** 3):
+        line = [(row >> (4 * i)) & 0xF for i in range(3)]
+        assert (
+            tables.empty[row],
+            tables.monotonicity[row],
+            tables.smoothness[row],
+            tables.merges[row],
+        ) == line_terms(line)
+        assert tables.totals[row] == sum(line)
+        assert tables.leans[row] == sum(j * e for (j, e) in enumerate(line))
+
+
+def test_term_tables_reject_big_sizes():
+    with pytest.raises(GameError, match="only built for sizes up to"):
+        term_tables(6)
+
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_evaluate_matches_direct_score(size, random_board):
+    rng = random.Random(size)
+    weights = Weights(empty=3.0, monotonicity=0.5, smoothness=0.2, merges=1.5, corner=0.25, base=10.0)
+    heuristic = Heuristic(size, weights)
+    for _ in range(50):
+        board = random_board(rng, size, 0.7, max_exponent=11)
+        assert heuristic.evaluate(board) == pytest.approx(direct_score(board, weights))
+
+
+def test_weights_pick_out_terms(make_board):
+    board = make_board([
+        [2, None, None, None],
+        [4, 2, None, None],
+        [8, 4, None, None],
+        [16, 16, 8, 2],
+    ])
+    only = {name: Weights(**{**dict.fromkeys(Weights._fields, 0.0), name: 1.0}) for name in Weights._fields}
+    assert Heuristic(weights=only["base"]).evaluate(board) == 1.0
+    assert Heuristic(weights=only["empty"]).evaluate(board) == 7.0
+    assert Heuristic(weights=only["merges"]).evaluate(board) == 1.0
+    assert Heuristic(weights=only["smoothness"]).evaluate(board) == -11.0
+    assert Heuristic(weights=only["monotonicity"]).evaluate(board) == 0.0
+
+    # Every exponent weighed by its distance from the top right corner.
+    assert Heuristic(weights=only["corner"]).evaluate(board) == (
+        1 * 3 + 2 * 4 + 1 * 3 + 3 * 5 + 2 * 4 + 4 * 6 + 4 * 5 + 3 * 4 + 1 * 3
+    )
+
+
+def test_evaluate_cells_and_batch_agree(random_board):
+    rng = random.Random(4)
+    heuristic = Heuristic()
+    boards = [random_board(rng, 4, 0.7, max_exponent=11) for _ in range(40)]
+    expected = [heuristic.evaluate(board) for board in boards]
+    cells = [BitBoard.from_game_board(board).cells for board in boards]
+    assert [heuristic.evaluate_cells(c) for c in cells] == pytest.approx(expected)
+    batch = BatchBoard.from_game_boards(boards)
+    assert heuristic.evaluate_batch(batch) == pytest.approx(expected)
+    assert heuristic.evaluate_batch(batch.exponents) == pytest.approx(expected)
+
+
+def test_evaluate_rejects_mismatches(make_board):
+    heuristic = Heuristic(4)
+    with pytest.raises(GameError, match="scores 4x4 boards"):
+        heuristic.evaluate(GameBoard(size=3))
+    with pytest.raises(GameError, match="can't be evaluated"):
+        heuristic.evaluate(make_board([[65536] + [None] * 3] + [[None] * 4] * 3))
+    with pytest.raises(GameError, match=r"must be an \(N, 4, 4\) array"):
+        heuristic.evaluate_batch(np.zeros((2, 3, 3), dtype=np.uint8))
+    with pytest.raises(GameError, match="can't be evaluated"):
+        heuristic.evaluate_batch(np.full((1, 4, 4), 16, dtype=np.uint8))
+    with pytest.raises(GameError, match="Only a 4x4 heuristic"):
+        Heuristic(3).evaluate_cells(0)
+
+
+def test_expectimax_with_heuristic(make_board):
+    board = make_board([
+        [2, 4, 8, 16],
+        [None, None, None, 32],
+        [None, None, None, None],
+        [None, None, None, 2],
+    ])
+    agent = Expectimax(depth=1, evaluate=Heuristic().evaluate_cells)
+    assert agent.best_move(board) in agent.move_values(board)
@@ -0,0 +1,104 @@
+import random
+import sys
+
+import pytest
+
+from game.board import BadMoveError, Direction, GameBoard, GameOverError, MoveFrame, RandomSpawns
+from game.history import History, HistoryError, decode_turn, encode_turn
+
+
+def play(history: History, rng: random.Random, turns: int) -> list[GameBoard]:
+    board = history.board
+    boards = [board.copy(deep=True)]
+    for _ in range(turns):
+        try:
+            history.move(rng.choice([d for d in Direction if board.can_mash(d)]))
+        except GameOverError:
+            boards.append(board.copy(deep=True))
+            break
+        boards.append(board.copy(deep=True))
+    return boards
+
+
+@pytest.fixture
+def board():
+    board = GameBoard(size=4, spawns=RandomSpawns(0))
+    board.reset()
+    return board
+
+
+def test_undo_and_redo(board):
+    history = History(board, limit=None)
+    boards = play(history, random.Random(0), 60)
+    assert len(history) == len(boards) - 1
+
+    for expected in reversed(boards[:-1]):
+        history.undo()
+        assert board == expected
+        assert board.empty_count == [t.value for t in board.grid].count(None)
+    assert not history.can_undo
+    with pytest.raises(HistoryError, match="Nothing to undo"):
+        history.undo()
+
+    for expected in boards[1:]:
+        history.redo()
+        assert board == expected
+    with pytest.raises(HistoryError, match="Nothing to redo"):
+        history.redo()
+
+
+def test_undo_returns_changed_cells(board):
+    history = History(board)
+    before = board.copy(deep=True)
+    history.move(next(d for d in Direction if board.can_mash(d)))
+    after = board.copy(deep=True)
+
+    frame = history.undo()
+    changed = {(t.pos.row, t.pos.col) for (t, u) in zip(before.grid, after.grid) if t.value != u.value}
+    assert changed <= {(m.final_pos.row, m.final_pos.col) for m in frame.moves}
+
+
+def test_new_turn_clears_redo(board):
+    history = History(board)
+    play(history, random.Random(1), 5)
+    history.undo()
+    assert history.can_redo
+    history.move(next(d for d in Direction if board.can_mash(d)))
+    assert not history.can_redo
+
+
+def test_bad_moves_are_not_kept():
+    board = GameBoard.from_key((2, 0, 0, 0, 0, 0, 0, 0, 0))
+    history = History(board)
+    with pytest.raises(BadMoveError):
+        history.move(Direction.WEST)
+    assert len(history) == 0
+
+
+def test_limit(board):
+    history = History(board, limit=10)
+    boards = play(history, random.Random(2), 30)
+    assert len(history) == 10
+    for _ in range(10):
+        history.undo()
+    assert board == boards[-11]
+    assert not history.can_undo
+
+    with pytest.raises(HistoryError, match="positive"):
+        History(board, limit=0)
+
+
+def test_turns_are_small(board):
+    history = History(board, limit=None)
+    play(history, random.Random(3), 100)
+    stored = sum(sys.getsizeof(t) for t in history.undo_stack) / len(history)
+    assert stored < 100
+    assert stored * 10 < sum(sys.getsizeof(t) for t in board.grid)
+
+
+def test_turn_codes():
+    board = GameBoard(size=8, spawns=RandomSpawns(4))
+    board.reset()
+    frame = MoveFrame(moves=[])
+    board.move(next(d for d in Direction if board.can_mash(d)), frame)
+    assert decode_turn(encode_turn(frame, 12, 8), 8) == (frame, 12)
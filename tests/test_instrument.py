@@ -0,0 +1,114 @@
+import pytest
+from typer.testing import CliRunner
+
+from game.board import Direction, GameBoard, RandomSpawns
+from game.cli import cli
+from game.instrument import DEFAULT_BUCKETS, ProfileError, Profiler, ProfileSnapshot
+from game.simulate import PolicyName, run_games
+
+
+def play(board: GameBoard, turns: int):
+    for _ in range(turns):
+        board.move(next(d for d in Direction if board.can_mash(d)))
+
+
+def test_disabled_profiler_leaves_the_engine_alone():
+    originals = (GameBoard._mash, GameBoard.move, GameBoard.slice)
+    profiler = Profiler()
+    with profiler:
+        assert GameBoard.move is not originals[1]
+    assert (GameBoard._mash, GameBoard.move, GameBoard.slice) == originals
+    assert not profiler.enabled
+
+
+def test_counts_and_latencies():
+    board = GameBoard(size=4, spawns=RandomSpawns(1))
+    board.reset()
+    with Profiler() as profiler:
+        play(board, 10)
+        sliced = profiler.snapshot().histogram("GameBoard.slice").count
+
+        # A generator is counted even when it isn't run to the end.
+        assert len(next(board.slice(Direction.NORTH)).tiles) == 4
+        assert profiler.snapshot().histogram("GameBoard.slice").count == sliced + 1
+    play(board, 5)
+
+    snapshot = profiler.snapshot()
+    moves = snapshot.histogram("GameBoard.move")
+    assert moves.count == 10
+    assert sum(moves.counts) == 10
+    assert moves.total_seconds > 0
+    assert 0 < moves.mean_seconds <= moves.quantile(0.99)
+    assert snapshot.histogram("GameBoard.mash").count == 10
+    assert snapshot.histogram("GameBoard.sprinkle").count == 10
+    assert snapshot.histogram("GameBoard.has_move").count == 10
+
+    with pytest.raises(ProfileError, match="No histogram"):
+        snapshot.histogram("GameBoard.dance")
+
+
+def test_one_profiler_at_a_time():
+    with Profiler():
+        with pytest.raises(ProfileError, match="already enabled"):
+            Profiler().enable()
+
+
+def test_prometheus_export():
+    board = GameBoard(size=3, spawns=RandomSpawns(2))
+    board.reset()
+    with Profiler() as profiler:
+        play(board, 3)
+    text = profiler.snapshot().to_prometheus()
+    lines = text.splitlines()
+    assert lines[:2] == [
+        "# HELP game_call_seconds Time spent in the engine's hot paths.",
+        "# TYPE game_call_seconds histogram",
+    ]
+    buckets = [line for line in lines if line.startswith('game_call_seconds_bucket{function="GameBoard.move"')]
+    assert len(buckets) == len(DEFAULT_BUCKETS) + 1
+    assert buckets[0].startswith('game_call_seconds_bucket{function="GameBoard.move",le="1e-06"} ')
+    counts = [int(line.split()[-1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1] == 'game_call_seconds_bucket{function="GameBoard.move",le="+Inf"} 3'
+    assert 'game_call_seconds_count{function="GameBoard.move"} 3' in lines
+
+
+def test_save_and_merge(tmp_path):
+    board = GameBoard(size=3, spawns=RandomSpawns(3))
+    board.reset()
+    with Profiler() as profiler:
+        play(board, 4)
+    profiler.snapshot().save(tmp_path / "profile.json")
+    profiler.snapshot().save(tmp_path / "profile.prom")
+    assert (tmp_path / "profile.prom").read_text() == profiler.snapshot().to_prometheus()
+
+    loaded = ProfileSnapshot.parse_file(tmp_path / "profile.json")
+    assert loaded == profiler.snapshot()
+    profiler.merge(loaded)
+    assert profiler.snapshot().histogram("GameBoard.move").count == 8
+
+    with pytest.raises(ProfileError, match="buckets don't match"):
+        Profiler(bounds=(1.0,)).merge(loaded)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_profile_simulation(workers, tmp_path):
+    profiler = Profiler()
+    results = list(run_games(4, PolicyName.RANDOM, size=3, workers=workers, table_dir=tmp_path, profiler=profiler))
+    snapshot = profiler.snapshot()
+    assert snapshot.histogram("GameBoard.move").count == sum(r.moves for r in results)
+    assert not profiler.enabled
+
+
+def test_simulate_command_profile(tmp_path):
+    result = CliRunner().invoke(cli, [
+        "simulate",
+        "--games", "2",
+        "--size", "3",
+        "--workers", "1",
+        "--no-tables",
+        "--output", str(tmp_path / "results.jsonl"),
+        "--profile", str(tmp_path / "profile.prom"),
+    ])
+    assert result.exit_code == 0, result.output
+    assert "game_call_seconds_count{function=\"GameBoard.move\"}" in (tmp_path / "profile.prom").read_text()
@@ -0,0 +1,66 @@
+import sys
+
+from game.board import Context, Direction, Move, MoveFrame, Position, Tile
+from game.models import ContextModel, GameBoardModel, MoveFrameModel, TileModel
+
+
+def test_board_round_trip(make_board):
+    board = make_board([
+        [2, None, 4],
+        [None, 8, None],
+        [16, None, 2],
+    ])
+    board.score = 36
+    model = GameBoardModel.from_core(board)
+    assert model.to_core() == board
+    assert GameBoardModel.parse_raw(model.json()).to_core() == board
+
+
+def test_round_trip_is_detached(make_board):
+    board = make_board([[2, None, None], [None, 4, None], [None, None, None]])
+    restored = GameBoardModel.from_core(board).to_core()
+    restored.tile(0, 0).value = 8
+    assert board.tile(0, 0).value == 2
+
+
+def test_context_round_trip():
+    move = Move(
+        start_pos=Position.make(0, 2),
+        final_pos=Position.make(0, 0),
+        start_value=2,
+        final_value=4,
+    )
+    context = Context(turn=3, score=4, history=[MoveFrame(moves=[move])])
+    assert ContextModel.parse_raw(ContextModel.from_core(context).json()).to_core() == context
+    assert MoveFrameModel.from_core(MoveFrame(moves=[])).to_core() == MoveFrame(moves=[])
+
+
+def test_tile_model_matches_old_shape():
+    assert TileModel.from_core(Tile.make(1, 2, value=8)).dict() == {"pos": {"row": 1, "col": 2}, "value": 8}
+
+
+def test_positions_are_shared():
+    assert Position.make(2, 3) is Position.make(2, 3)
+    assert Position.make(2, 3) == Position(row=2, col=3)
+    assert len({Position.make(2, 3), Position(row=2, col=3)}) == 1
+
+
+def test_copy(make_board):
+    board = make_board([[2, None, None], [None, 4, None], [None, None, None]])
+    shallow = board.copy()
+    deep = board.copy(deep=True)
+    shallow.mash(Direction.WEST)
+    assert shallow != board
+    assert deep == board
+    assert board.tile(1, 1).value == 4
+
+    # The original's empty-cell index still matches its own tiles.
+    for _ in range(7):
+        board.sprinkle()
+    assert all(t.value is not None for t in board.grid)
+
+
+def test_core_is_compact():
+    tile = Tile.make(0, 0, value=2)
+    assert not hasattr(tile, "__dict__")
+    assert sys.getsizeof(tile) < 64
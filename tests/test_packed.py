@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+import pytest
+
+from game.batch import mash_rows
+from game.board import BadMoveError, Direction, GameBoard, GameError, GameOverError, RandomSpawns
+from game.packed import PackedBoard, merge_rows
+
+
+def test_merge_rows():
+    rows = np.array([
+        [1, 1, 1, 1],
+        [1, 0, 1, 2],
+        [0, 0, 0, 3],
+        [1, 2, 3, 4],
+        [2, 2, 1, 0],
+        [2, 2, 2, 0],
+    ], dtype=np.uint8)
+    (mashed, scores) = merge_rows(rows)
+    assert mashed.tolist() == [
+        [2, 2, 0, 0],
+        [2, 2, 0, 0],
+        [3, 0, 0, 0],
+        [1, 2, 3, 4],
+        [3, 1, 0, 0],
+        [3, 2, 0, 0],
+    ]
+    assert scores.tolist() == [8, 4, 0, 0, 8, 8]
+
+
+@pytest.mark.parametrize("size", [3, 8, 32])
+def test_merge_rows_matches_mash_rows(size):
+    rows = np.random.default_rng(size).integers(0, 4, (200, size), dtype=np.uint8)
+    (expected, expected_scores) = mash_rows(rows.copy())
+    (mashed, scores) = merge_rows(rows)
+    assert np.array_equal(mashed, expected)
+    assert np.array_equal(scores, expected_scores)
+
+
+@pytest.mark.parametrize("size", [3, 5, 16])
+def test_plays_the_same_game_as_game_board(size):
+    board = GameBoard(size=size, spawns=RandomSpawns(size))
+    board.reset()
+    packed = PackedBoard.from_game_board(board.copy(deep=True))
+    rng = random.Random(size)
+    for _ in range(200):
+        for direction in Direction:
+            assert packed.can_mash(direction) == board.can_mash(direction)
+        direction = rng.choice([d for d in Direction if board.can_mash(d)])
+        try:
+            spawned = board.move(direction)
+        except GameOverError:
+            with pytest.raises(GameOverError):
+                packed.move(direction)
+            break
+        assert packed.move(direction) == (spawned.pos.row, spawned.pos.col, spawned.value)
+        assert packed.to_game_board() == board
+        assert packed.has_move() == board.has_move()
+
+
+def test_round_trip():
+    board = GameBoard.from_text("2, , 4\n, 8, \n16, , 2048")
+    board.score = 12
+    packed = PackedBoard.from_game_board(board)
+    assert packed.exponents.tolist() == [[1, 0, 2], [0, 3, 0], [4, 0, 11]]
+    assert packed.value(2, 2) == 2048
+    assert packed.value(0, 1) is None
+    assert packed.empty_count == 4
+    assert packed.to_game_board() == board
+
+
+def test_bad_move():
+    packed = PackedBoard(np.array([[1, 2, 3], [0, 0, 0], [0, 0, 0]]))
+    with pytest.raises(BadMoveError, match="Can't move"):
+        packed.move(Direction.NORTH)
+    assert packed.exponents.tolist() == [[1, 2, 3], [0, 0, 0], [0, 0, 0]]
+
+
+def test_copy():
+    packed = PackedBoard.empty(16, spawns=RandomSpawns(1))
+    packed.reset()
+    twin = packed.copy(deep=True)
+    assert twin == packed
+    packed.move(next(d for d in Direction if packed.can_mash(d)))
+    assert twin != packed
+
+
+@pytest.mark.parametrize("size,message", [(2, "too small"), (33, "too big")])
+def test_size_is_checked(size, message):
+    with pytest.raises(GameError, match=message):
+        PackedBoard.empty(size)
+    with pytest.raises(GameError, match=message):
+        PackedBoard(np.zeros((size, size)))
+    with pytest.raises(GameError, match="must be a"):
+        PackedBoard(np.zeros((4, 5)))
@@ -0,0 +1,108 @@
+import pytest
+
+from game.ai import Expectimax
+from game.bitboard import BitBoard
+from game.board import Direction, GameError, GameOverError
+from game.parallel import ParallelExpectimax, SharedTranspositionTable
+from game.tables import table_path, unload_row_table
+
+
+@pytest.fixture(autouse=True)
+def unload_tables():
+    yield
+    unload_row_table(4)
+
+
+@pytest.fixture
+def board(make_board):
+    return make_board([
+        [2, 4, 8, 2],
+        [None, 2, 16, 4],
+        [None, None, 4, 32],
+        [2, None, None, 64],
+    ])
+
+
+@pytest.fixture
+def table():
+    table = SharedTranspositionTable(slots=1024)
+    yield table
+    table.close()
+
+
+def test_table_get_and_put(table):
+    assert table.get((0x1234, 2)) is None
+    table.put((0x1234, 2), 7.5)
+    assert table.get((0x1234, 2)) == 7.5
+    assert table.get((0x1234, 1)) is None
+    assert table.get((0x4321, 2)) is None
+    assert (table.hits, table.misses) == (1, 3)
+
+    table.clear()
+    assert table.get((0x1234, 2)) is None
+
+
+def test_table_is_shared_by_name(table):
+    table.put((99, 3), 1.25)
+    other = SharedTranspositionTable(slots=1024, name=table.name)
+    try:
+        assert other.get((99, 3)) == 1.25
+        other.put((100, 3), 2.5)
+        assert table.get((100, 3)) == 2.5
+    finally:
+        other.close()
+
+
+def test_table_ignores_torn_entries():
+    table = SharedTranspositionTable(slots=1)
+    try:
+        table.put((5, 1), 3.0)
+        # Another writer has stored its value but not yet its check word.
+        table.values[0] = 4.0
+        assert table.get((5, 1)) is None
+        table.put((6, 1), 4.0)
+        assert table.get((5, 1)) is None
+        assert table.get((6, 1)) == 4.0
+    finally:
+        table.close()
+
+
+def test_table_rejects_bad_slots():
+    with pytest.raises(GameError, match="power of two"):
+        SharedTranspositionTable(slots=1000)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matches_serial_search(workers, board, tmp_path):
+    serial = Expectimax(depth=2, min_probability=0.0)
+    expected = serial.move_values(board)
+    with ParallelExpectimax(
+        depth=2, min_probability=0.0, table_slots=1 << 14, workers=workers, table_dir=tmp_path,
+    ) as agent:
+        assert agent.move_values(board) == pytest.approx(expected)
+        assert agent.best_move(BitBoard.from_game_board(board)) is serial.best_move(board)
+        assert agent.nodes > 0
+        assert agent.nodes_per_second > 0
+
+
+def test_game_over(make_board):
+    board = make_board([[2, 4, 2, 4], [4, 2, 4, 2]] * 2)
+    with ParallelExpectimax(depth=1, table_slots=16, workers=1) as agent:
+        assert agent.move_values(board) == {}
+        with pytest.raises(GameOverError):
+            agent.best_move(board)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_keeps_its_table_between_decisions(workers, board, tmp_path):
+    with ParallelExpectimax(depth=2, table_slots=1 << 14, workers=workers, table_dir=tmp_path) as agent:
+        agent.move_values(board)
+        (nodes, hits) = (agent.nodes, agent.hits)
+        agent.move_values(board)
+        assert agent.nodes - nodes < nodes
+        assert Direction.WEST in agent.move_values(board)
+
+        # Lookups made in the workers are counted here too.
+        assert agent.hits > hits
+        assert 0.0 < agent.hit_rate < 1.0
+    assert table_path(4, tmp_path).exists() == (workers > 1)
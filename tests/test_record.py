@@ -0,0 +1,120 @@
+import random
+
+import pytest
+from typer.testing import CliRunner
+
+from game.board import Direction, GameBoard, GameError, GameOverError, Tile
+from game.cli import cli
+from game.record import GameRecord, GameRecorder, RecordError, Turn, decode_turn, encode_turn
+
+
+def play_recorded(path, size: int, seed: int, keyframe_interval: int, turns: int | None = None) -> list[GameBoard]:
+    """
+    Play random moves through a recorder and return a copy of the board after every turn.
+    """
+    random.seed(seed)
+    rng = random.Random(seed)
+    board = GameBoard(size=size)
+    board.reset()
+    boards = [board.copy(deep=True)]
+    with GameRecorder(path, board, seed=seed, keyframe_interval=keyframe_interval) as recorder:
+        while turns is None or len(boards) <= turns:
+            direction = rng.choice([d for d in Direction if board.can_mash(d)])
+            try:
+                recorder.move(direction)
+            except GameOverError:
+                boards.append(board.copy(deep=True))
+                break
+            boards.append(board.copy(deep=True))
+    return boards
+
+
+def test_turn_codes():
+    tile = Tile.make(31, 31, value=4)
+    code = encode_turn(Direction.WEST, tile, 32)
+    assert code < 1 << 16
+    assert decode_turn(code, 32) == Turn(direction=Direction.WEST, row=31, col=31, value=4)
+    with pytest.raises(RecordError, match="sprinkled 8"):
+        encode_turn(Direction.WEST, Tile.make(0, 0, value=8), 4)
+
+
+@pytest.mark.parametrize("size,interval", [(3, 1), (4, 5), (5, 64)])
+def test_replay_rebuilds_every_turn(tmp_path, size, interval):
+    path = tmp_path / "game.rec"
+    boards = play_recorded(path, size, seed=size, keyframe_interval=interval)
+    with GameRecord(path) as record:
+        assert record.size == size
+        assert record.seed == size
+        assert len(record) == len(boards) - 1
+        for (turn, board) in enumerate(boards):
+            assert record.board_at(turn) == board
+        assert [b.copy(deep=True) for (_, b) in record.replay()] == boards
+        assert [t for (t, _) in record.replay(start=3, stop=6)] == [3, 4, 5]
+
+
+def test_record_is_compact(tmp_path):
+    path = tmp_path / "game.rec"
+    boards = play_recorded(path, 4, seed=1, keyframe_interval=25, turns=100)
+    assert len(boards) == 101
+    # A 24 byte header, five 24 byte keyframes and two bytes a turn.
+    assert path.stat().st_size == 24 + 5 * 24 + 2 * 100
+
+
+def test_truncated_record(tmp_path):
+    path = tmp_path / "game.rec"
+    boards = play_recorded(path, 4, seed=2, keyframe_interval=10, turns=30)
+    data = path.read_bytes()
+
+    # Cut into the keyframe after turn 30: turns up to 30 still replay from
+    # the keyframe at 20.
+    path.write_bytes(data[:-5])
+    with GameRecord(path) as record:
+        assert len(record) == 30
+        assert record.board_at(30) == boards[30]
+
+    path.write_bytes(data[:10])
+    with pytest.raises(RecordError, match="header"):
+        GameRecord(path)
+
+
+def test_bad_turns(tmp_path):
+    path = tmp_path / "game.rec"
+    play_recorded(path, 3, seed=3, keyframe_interval=4, turns=5)
+    with GameRecord(path) as record:
+        with pytest.raises(RecordError, match="No turn 6"):
+            record.board_at(6)
+        with pytest.raises(RecordError, match="No turn 0"):
+            record.turn(0)
+
+
+def test_seeds(tmp_path):
+    board = GameBoard(size=3)
+    board.reset()
+    for seed in (None, 0, 2 ** 64 - 1):
+        with GameRecorder(tmp_path / "game.rec", board, seed=seed):
+            pass
+        with GameRecord(tmp_path / "game.rec") as record:
+            assert record.seed == seed
+
+    for seed in ("seven", -1, 2 ** 64, 1.5):
+        with pytest.raises(RecordError, match="record seed must be an int"):
+            GameRecorder(tmp_path / "bad.rec", board, seed=seed)
+    assert not (tmp_path / "bad.rec").exists()
+
+
+def test_place():
+    board = GameBoard(size=3)
+    board.reset(should_sprinkle=False)
+    board.place(1, 2, 4)
+    assert board.tile(1, 2).value == 4
+    assert board.empty_count == 8
+    with pytest.raises(GameError, match="full cell"):
+        board.place(1, 2, 2)
+
+
+def test_replay_command(tmp_path):
+    path = tmp_path / "game.rec"
+    boards = play_recorded(path, 4, seed=4, keyframe_interval=8, turns=12)
+    result = CliRunner().invoke(cli, ["replay", str(path), "--turn", "12"])
+    assert result.exit_code == 0, result.output
+    assert result.output == boards[12].pretty() + f"Turn 12 of 12, score {boards[12].score}\n"
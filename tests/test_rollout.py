@@ -0,0 +1,79 @@
+from random import Random
+
+import pytest
+
+from game.bitboard import BitBoard
+from game.board import Direction, GameError, GameOverError
+from game.rollout import RolloutAgent, playout, run_rollouts
+from game.tables import table_path, unload_row_table
+
+
+@pytest.fixture(autouse=True)
+def unload_tables():
+    yield
+    unload_row_table(4)
+
+
+@pytest.fixture
+def board(make_board):
+    return make_board([
+        [2, 4, 8, 16],
+        [4, 8, 16, 32],
+        [8, 16, 32, 64],
+        [16, 32, 64, None],
+    ])
+
+
+def test_playout_ends_the_game(make_board):
+    rng = Random(0)
+    bits = BitBoard.from_game_board(make_board([[None] * 4] * 3 + [[2, 2, None, None]]))
+    score = playout(bits.cells, rng)
+    assert score > 0
+
+
+def test_run_rollouts_is_seeded(board):
+    bits = BitBoard.from_game_board(board)
+    roots = [(bits.cells, 0)]
+    first = run_rollouts(roots, None, 20, seed=3)
+    assert first == run_rollouts(roots, None, 20, seed=3)
+    assert first[0][1] == 20
+
+
+def test_agent_needs_a_limit():
+    with pytest.raises(GameError):
+        RolloutAgent(workers=1, time_budget=None, max_rollouts=None)
+
+
+def test_agent_only_considers_legal_moves(board):
+    with RolloutAgent(workers=1, time_budget=None, max_rollouts=10, seed=0) as agent:
+        decision = agent.decide(board)
+    assert {m.direction for m in decision.moves} == {Direction.SOUTH, Direction.EAST}
+    assert decision.rollouts == 20
+    assert decision.rollouts_per_second > 0
+
+
+def test_agent_is_reproducible(board):
+    decisions = []
+    for _ in range(2):
+        with RolloutAgent(workers=1, time_budget=None, max_rollouts=30, seed=5) as agent:
+            decisions.append(agent.decide(board).moves)
+    assert decisions[0] == decisions[1]
+
+
+def test_agent_uses_a_pool(board, tmp_path):
+    with RolloutAgent(workers=2, time_budget=0.05, seed=0, table_dir=tmp_path) as agent:
+        decision = agent.decide(board)
+    assert table_path(4, tmp_path).exists()
+    assert decision.direction in (Direction.SOUTH, Direction.EAST)
+    assert all(m.rollouts >= 2 for m in decision.moves)
+
+
+def test_agent_raises_on_game_over(make_board):
+    board = make_board([
+        [2, 4, 2, 4],
+        [4, 2, 4, 2],
+        [2, 4, 2, 4],
+        [4, 2, 4, 2],
+    ])
+    with pytest.raises(GameOverError):
+        RolloutAgent(workers=1, max_rollouts=1).decide(board)
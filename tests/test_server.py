@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+from game.board import Direction, GameBoard, CounterSpawns
+from game.server import MAX_PENDING_MESSAGES, Connection, GameClient, GameServer, run_load
+from game.store import SessionStore
+
+
+async def start_server(path, **kwargs) -> tuple[GameServer, asyncio.AbstractServer, int]:
+    game_server = GameServer(store=SessionStore(path / "sessions.db", **kwargs))
+    server = await game_server.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return (game_server, server, port)
+
+
+def test_play_a_session(tmp_path):
+    async def scenario():
+        (game_server, server, port) = await start_server(tmp_path)
+        async with server:
+            client = await GameClient.connect("127.0.0.1", port)
+            state = await client.request(op="new", size=3, seed=5, id=1)
+            assert state["ok"] and state["id"] == 1
+            assert state["size"] == 3 and state["turn"] == 0
+
+            # The server's board plays the same game as a local one with the same seed.
+            board = GameBoard(size=3, spawns=CounterSpawns(5))
+            board.reset()
+            assert state["cells"] == list(board.key())
+            direction = next(d for d in Direction if board.can_mash(d))
+            board.move(direction)
+
+            state = await client.request(op="move", session=state["session"], direction=direction.value.lower())
+            assert state["ok"] and state["turn"] == 1
+            assert state["cells"] == list(board.key())
+            assert state["score"] == board.score
+            assert await client.request(op="show", session=state["session"]) == state
+
+            assert (await client.request(op="close", session=state["session"]))["ok"]
+            assert len(game_server.store) == 0
+            await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_errors(tmp_path):
+    async def scenario():
+        (_, server, port) = await start_server(tmp_path)
+        async with server:
+            client = await GameClient.connect("127.0.0.1", port)
+            client.writer.write(b"not json\n[1, 2]\n")
+            assert json.loads(await client.reader.readline())["error"].startswith("Requests must be JSON --")
+            assert json.loads(await client.reader.readline())["error"] == "Requests must be JSON objects"
+            assert (await client.request(op="dance"))["error"] == "Unknown op: dance"
+            assert (await client.request(op="show", session="nope"))["error"] == "No session nope"
+            assert "too small" in (await client.request(op="new", size=2))["error"]
+
+            state = await client.request(op="new", size=3, seed=1)
+            reply = await client.request(op="move", session=state["session"], direction="up")
+            assert reply == {"ok": False, "error": "Unknown direction: up"}
+            await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_watchers_get_pushed_moves(tmp_path):
+    async def scenario():
+        (_, server, port) = await start_server(tmp_path)
+        async with server:
+            player = await GameClient.connect("127.0.0.1", port)
+            watcher = await GameClient.connect("127.0.0.1", port)
+            state = await player.request(op="new", size=4, seed=3)
+            await watcher.request(op="join", session=state["session"])
+
+            board = GameBoard(size=4, spawns=CounterSpawns(3))
+            board.reset()
+            for _ in range(3):
+                direction = next(d for d in Direction if board.can_mash(d))
+                board.move(direction)
+                state = await player.request(op="move", session=state["session"], direction=direction.value)
+                assert state["ok"]
+            assert player.pushes == []
+
+            # Pushes arrive ahead of the reply to the watcher's next request.
+            await watcher.request(op="show", session=state["session"])
+            assert [p["turn"] for p in watcher.pushes] == [1, 2, 3]
+            assert watcher.pushes[-1] == {**state, "push": True}
+            await player.close()
+            await watcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_slow_readers_are_dropped(mocker):
+    async def scenario():
+        writer = mocker.Mock()
+        connection = Connection(writer)
+        for n in range(MAX_PENDING_MESSAGES):
+            connection.send({"n": n})
+        assert not connection.closed
+        assert len(connection.pending) == MAX_PENDING_MESSAGES
+
+        connection.send({"n": MAX_PENDING_MESSAGES})
+        assert connection.closed
+        assert connection.pending == []
+        writer.transport.abort.assert_called_once_with()
+
+        connection.send({"n": 0})
+        assert connection.pending == []
+
+    asyncio.run(scenario())
+
+
+def test_load(tmp_path):
+    async def scenario():
+        (game_server, server, port) = await start_server(tmp_path)
+        async with server:
+            report = await run_load("127.0.0.1", port, sessions=200, moves=20, size=4)
+        assert report.sessions == 200
+        assert report.moves == 200 * 20
+        assert report.rejected < report.moves
+        assert len(game_server.store) == 0
+        assert game_server.connections == 0
+
+    asyncio.run(scenario())
+
+
+def test_load_with_spilled_sessions(tmp_path):
+    async def scenario():
+        (game_server, server, port) = await start_server(tmp_path, memory_budget=20_000)
+        async with server:
+            report = await run_load("127.0.0.1", port, sessions=100, moves=20, size=4)
+        assert report.moves == 100 * 20
+        stats = game_server.store.stats()
+        assert stats.evictions > 0
+        assert stats.misses > 0
+        assert stats.resident_bytes <= 20_000
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+import json
+import random
+
+import pytest
+from typer.testing import CliRunner
+
+from game.board import Direction, GameBoard, Tile
+from game.cli import cli
+from game.simulate import (
+    PolicyName,
+    POLICIES,
+    corner_policy,
+    greedy_policy,
+    play_game,
+    run_games,
+)
+from game.tables import RowTable, load_row_table, row_table, unload_row_table
+
+
+@pytest.fixture(autouse=True)
+def unload_tables():
+    yield
+    unload_row_table(3)
+
+
+@pytest.fixture
+def board():
+    return GameBoard(size=3, grid=[
+        Tile.make(0, 0, 8), Tile.make(0, 1, 8), Tile.make(0, 2, 4),
+        Tile.make(1, 0, 2), Tile.make(1, 1, 4), Tile.make(1, 2, 16),
+        Tile.make(2, 0, 2), Tile.make(2, 1, 32), Tile.make(2, 2, 64),
+    ])
+
+
+@pytest.mark.parametrize("policy_name", list(PolicyName))
+def test_policies_pick_legal_moves(policy_name, board):
+    rng = random.Random(0)
+    for _ in range(20):
+        assert board.can_mash(POLICIES[policy_name](board, rng))
+
+
+def test_corner_policy(board):
+    assert corner_policy(board, random.Random(0)) is Direction.SOUTH
+
+
+def test_greedy_policy(board):
+    before = board.copy(deep=True)
+    assert greedy_policy(board, random.Random(0)) is Direction.WEST
+    assert board == before
+
+
+def test_run_games_is_reproducible_across_workers(tmp_path):
+    single = sorted(run_games(6, size=3, workers=1, seed=7, table_dir=tmp_path), key=lambda r: r.game)
+    pooled = sorted(run_games(6, size=3, workers=2, seed=7, table_dir=tmp_path), key=lambda r: r.game)
+
+    def strip(results):
+        return [r.dict(exclude={"seconds"}) for r in results]
+
+    assert strip(single) == strip(pooled)
+    assert [r.seed for r in single] == list(range(7, 13))
+
+
+def test_run_games_without_tables_unloads_them(tmp_path, mocker):
+    load_row_table(3, tmp_path)
+    mash_values = mocker.spy(RowTable, "mash_values")
+    results = list(run_games(2, size=3, seed=7, use_tables=False, table_dir=tmp_path))
+    assert row_table(3) is None
+    assert mash_values.call_count == 0
+    assert len(results) == 2
+
+
+def test_play_game_ignores_global_random():
+    random.seed(1)
+    first = play_game(0, 5, 3, PolicyName.RANDOM)
+    random.seed(2)
+    second = play_game(0, 5, 3, PolicyName.RANDOM)
+    assert first.dict(exclude={"seconds"}) == second.dict(exclude={"seconds"})
+
+
+def test_simulate_command(tmp_path):
+    output = tmp_path / "results.jsonl"
+    result = CliRunner().invoke(cli, [
+        "simulate",
+        "--games", "4",
+        "--policy", "corner",
+        "--size", "3",
+        "--workers", "1",
+        "--no-tables",
+        "--output", str(output),
+    ])
+    assert result.exit_code == 0, result.output
+    assert "Games per second" in result.output
+    assert "Moves per second" in result.output
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["game"] for line in lines] == [0, 1, 2, 3]
+    assert all(line["moves"] > 0 for line in lines)
+
+
+def test_simulate_command_rejects_unknown_policy(tmp_path):
+    result = CliRunner().invoke(cli, ["simulate", "--policy", "psychic", "--output", str(tmp_path / "x")])
+    assert result.exit_code != 0
+    assert "Unknown policy" in result.output
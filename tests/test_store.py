@@ -0,0 +1,112 @@
+import pytest
+
+from game.board import CounterSpawns, Direction, GameBoard
+from game.store import SESSION_OVERHEAD, PackedSession, SessionStore, StoreError
+
+
+def play(session: PackedSession, turns: int):
+    board = session.board()
+    for _ in range(turns):
+        board.move(next(d for d in Direction if board.can_mash(d)))
+        session.turn += 1
+    session.update(board)
+
+
+def test_packed_session_plays_the_same_game():
+    session = PackedSession.new("a", 4, seed=9)
+    board = GameBoard(size=4, spawns=CounterSpawns(9))
+    board.reset()
+    assert session.board() == board
+    assert session.values() == list(board.key())
+
+    # Playing in pieces, unpacking and packing in between, matches playing straight through.
+    for _ in range(3):
+        play(session, 5)
+    for _ in range(15):
+        board.move(next(d for d in Direction if board.can_mash(d)))
+    assert session.board() == board
+    assert session.drawn == board.spawns.drawn == 17
+    assert len(session.cells) == 16
+
+
+def test_only_counter_spawns_are_stored():
+    session = PackedSession.new("a", 3)
+    with pytest.raises(StoreError, match="counter spawns"):
+        session.update(GameBoard(size=3))
+
+
+def test_lru_eviction(tmp_path):
+    size = PackedSession.new("s0", 4).nbytes
+    with SessionStore(tmp_path / "sessions.db", memory_budget=3 * size) as store:
+        for n in range(3):
+            store.add(PackedSession.new(f"s{n}", 4, seed=n))
+        store.get("s0")
+        store.add(PackedSession.new("s3", 4, seed=3))
+
+        # s1 was the least recently used.
+        assert list(store.resident) == ["s2", "s0", "s3"]
+        stats = store.stats()
+        assert (stats.resident, stats.spilled, stats.evictions) == (3, 1, 1)
+        assert len(store) == 4
+        assert "s1" in store
+
+        # Reading it back in evicts the next coldest.
+        assert store.get("s1") == PackedSession.new("s1", 4, seed=1)
+        assert list(store.resident) == ["s0", "s3", "s1"]
+        stats = store.stats()
+        assert (stats.hits, stats.misses, stats.evictions) == (1, 1, 2)
+        assert stats.hit_rate == 0.5
+        assert stats.resident_bytes == 3 * size
+
+
+def test_spilled_sessions_keep_their_game(tmp_path):
+    with SessionStore(tmp_path / "sessions.db", memory_budget=1) as store:
+        session = PackedSession.new("a", 5, seed="abc")
+        store.add(session)
+        play(session, 10)
+        store.add(PackedSession.new("b", 5))
+        assert list(store.resident) == ["b"]
+        assert store.get("a") == session
+
+
+def test_reopen(tmp_path):
+    path = tmp_path / "sessions.db"
+    with SessionStore(path) as store:
+        session = PackedSession.new("a", 4, seed=1)
+        store.add(session)
+        play(session, 4)
+    with SessionStore(path) as store:
+        assert len(store) == 1
+        assert store.get("a") == session
+        assert store.stats().misses == 1
+
+
+def test_delete(tmp_path):
+    with SessionStore(tmp_path / "sessions.db", memory_budget=SESSION_OVERHEAD + 100) as store:
+        store.add(PackedSession.new("a", 4))
+        store.add(PackedSession.new("b", 4))
+        store.delete("a")
+        store.delete("b")
+        assert len(store) == 0
+        with pytest.raises(StoreError, match="No session a"):
+            store.delete("a")
+        with pytest.raises(StoreError, match="No session a"):
+            store.get("a")
+
+
+def test_errors(tmp_path):
+    with pytest.raises(StoreError, match="must be positive"):
+        SessionStore(tmp_path / "sessions.db", memory_budget=0)
+    with SessionStore(tmp_path / "sessions.db") as store:
+        store.add(PackedSession.new("a", 4))
+        with pytest.raises(StoreError, match="already exists"):
+            store.add(PackedSession.new("a", 4))
+
+
+def test_temporary_store_cleans_up():
+    store = SessionStore()
+    store.add(PackedSession.new("a", 4))
+    path = store.path
+    assert path.exists()
+    store.close()
+    assert not path.exists()
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from game.board import Direction, GameBoard, GameError
+from game.symmetry import (
+    Transform,
+    canonical_key,
+    canonicalize,
+    distinct_spawn_outcomes,
+    transform_board,
+    transform_key,
+)
+
+
+def test_key_round_trip(random_board):
+    board = random_board(random.Random(0), 4)
+    key = board.key()
+    assert hash(key) == hash(board.key())
+    assert GameBoard.from_key(key) == board
+    assert key.count(0) == board.empty_count
+
+
+def test_from_key_rejects_bad_keys():
+    with pytest.raises(GameError, match="square board"):
+        GameBoard.from_key((2, 4, 0))
+
+
+def test_transforms():
+    key = (
+        1, 2, 3,
+        4, 5, 6,
+        7, 8, 9,
+    )
+    assert transform_key(key, Transform.ROTATE_90) == (7, 4, 1, 8, 5, 2, 9, 6, 3)
+    assert transform_key(key, Transform.FLIP_HORIZONTAL) == (3, 2, 1, 6, 5, 4, 9, 8, 7)
+    assert transform_key(key, Transform.TRANSPOSE) == (1, 4, 7, 2, 5, 8, 3, 6, 9)
+    assert transform_key(key, Transform.ANTI_TRANSPOSE) == (9, 6, 3, 8, 5, 2, 7, 4, 1)
+    assert len({transform_key(key, t) for t in Transform}) == 8
+
+
+@pytest.mark.parametrize("transform", list(Transform))
+def test_inverse(transform):
+    key = tuple(range(16))
+    assert transform_key(transform_key(key, transform), transform.inverse) == key
+
+
+def test_rotate_direction():
+    assert Transform.ROTATE_90.direction(Direction.NORTH) is Direction.EAST
+    assert Transform.ROTATE_90.direction(Direction.EAST) is Direction.SOUTH
+    assert Transform.FLIP_HORIZONTAL.direction(Direction.NORTH) is Direction.NORTH
+    assert Transform.FLIP_HORIZONTAL.direction(Direction.WEST) is Direction.EAST
+    assert Transform.TRANSPOSE.direction(Direction.SOUTH) is Direction.EAST
+
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_moves_commute_with_transforms(size, random_board):
+    rng = random.Random(size)
+    for _ in range(20):
+        board = random_board(rng, size)
+        for transform in Transform:
+            for direction in Direction:
+                moved = board.copy(deep=True)
+                moved.score += moved.mash(direction)
+                turned = transform_board(board, transform)
+                turned.score += turned.mash(transform.direction(direction))
+                assert turned == transform_board(moved, transform)
+
+
+@pytest.mark.parametrize("size", [3, 4, 8])
+def test_canonicalize(size, random_board):
+    rng = random.Random(size)
+    for _ in range(20):
+        board = random_board(rng, size)
+        (canonical, transform) = canonical_key(board)
+        assert transform_key(board.key(), transform) == canonical
+        assert canonical == min(transform_key(board.key(), t) for t in Transform)
+        for other in Transform:
+            assert canonicalize(transform_key(board.key(), other))[0] == canonical
+
+
+def canonical_spawns(board: GameBoard, spawns) -> dict:
+    """
+    Add up the probability of reaching each canonical child board.
+    """
+    found: dict = {}
+    for spawn in spawns:
+        board.place(spawn.pos.row, spawn.pos.col, spawn.value)
+        (key, _) = canonical_key(board)
+        found[key] = found.get(key, 0.0) + spawn.probability
+        board.put(spawn.pos.row, spawn.pos.col, None)
+    return found
+
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_distinct_spawn_outcomes(size, random_board):
+    rng = random.Random(size)
+    symmetric = [
+        GameBoard.from_key((0,) * (size * size)),
+        GameBoard.from_key((2,) + (0,) * (size * size - 2) + (2,)),
+    ]
+    for board in symmetric + [random_board(rng, size, fill=0.3) for _ in range(20)]:
+        outcomes = list(board.spawn_outcomes())
+        grouped = list(distinct_spawn_outcomes(board))
+        assert sum(s.probability for s in grouped) == pytest.approx(1.0)
+        assert sum(s.count for s in grouped) == len(outcomes)
+
+        expected = canonical_spawns(board, outcomes)
+        found = canonical_spawns(board, grouped)
+        assert len(found) == len(grouped)
+        assert found.keys() == expected.keys()
+        for key in expected:
+            assert found[key] == pytest.approx(expected[key])
+
+
+def test_distinct_spawn_outcomes_of_an_empty_board():
+    board = GameBoard.from_key((0,) * 16)
+    grouped = list(distinct_spawn_outcomes(board))
+    # A corner, an edge and a middle cell, for a 2 and a 4.
+    assert [(s.pos.row, s.pos.col, s.value, s.count) for s in grouped] == [
+        (0, 0, 2, 4), (0, 0, 4, 4),
+        (0, 1, 2, 8), (0, 1, 4, 8),
+        (1, 1, 2, 4), (1, 1, 4, 4),
+    ]
@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+import game.tables
+
+from game.board import Direction, GameBoard, Slice, Tile
+from game.tables import (
+    ROW_CHANGED,
+    ROW_OVERFLOW,
+    TableError,
+    build_row_table,
+    decode_values,
+    load_row_table,
+    open_row_table,
+    row_table,
+    save_row_table,
+    table_path,
+    unload_row_table,
+)
+
+
+@pytest.fixture
+def loaded_tables(tmp_path):
+    yield lambda size: load_row_table(size, tmp_path)
+    for size in range(1, 6):
+        unload_row_table(size)
+
+
+def test_build_row_table_matches_slice():
+    table = build_row_table(3)
+    assert len(table) == 16 ** 3
+    for row in range(len(table)):
+        if table.flags[row] & ROW_OVERFLOW:
+            continue
+        values = decode_values(row, 3)
+        slc = Slice.make(*[Tile.make(0, i, v) for (i, v) in enumerate(values)])
+        changed = slc.can_mash()
+        score = slc.mash()
+        assert bool(table.flags[row] & ROW_CHANGED) is changed
+        assert table.scores[row] == score
+        assert decode_values(table.mashed[row], 3) == [t.value for t in slc.tiles]
+
+
+def test_build_row_table_flags_overflow():
+    table = build_row_table(2)
+    row = 15 | (15 << 4)
+    assert table.flags[row] & ROW_OVERFLOW
+    assert table.mashed[row] == row
+    assert table.mash_values([32768, 32768]) is None
+
+
+def test_build_row_table_rejects_big_sizes():
+    with pytest.raises(TableError, match="only built for sizes up to"):
+        build_row_table(6)
+
+
+def test_save_and_open(tmp_path):
+    table = build_row_table(3)
+    path = tmp_path / "rows.bin"
+    save_row_table(table, path)
+    opened = open_row_table(path)
+    assert opened.size == 3
+    assert list(opened.mashed) == list(table.mashed)
+    assert list(opened.scores) == list(table.scores)
+    assert list(opened.flags) == list(table.flags)
+
+
+def test_open_rejects_bad_files(tmp_path):
+    path = tmp_path / "rows.bin"
+    path.write_bytes(b"not a table at all")
+    with pytest.raises(TableError, match="not a row table"):
+        open_row_table(path)
+
+    save_row_table(build_row_table(2), path)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(TableError, match="truncated"):
+        open_row_table(path)
+
+
+def test_load_row_table_builds_once(tmp_path, mocker, loaded_tables):
+    spy = mocker.spy(game.tables, "build_row_table")
+    assert row_table(3) is None
+    table = loaded_tables(3)
+    assert table_path(3, tmp_path).exists()
+    assert row_table(3) is table
+    loaded_tables(3)
+    assert spy.call_count == 1
+
+
+@pytest.mark.parametrize("size", [3, 4])
+def test_game_board_uses_tables(size, loaded_tables):
+    rng = random.Random(size)
+    boards = []
+    for _ in range(50):
+        grid = [
+            Tile.make(i, j, 2 ** rng.randint(1, 5) if rng.random() < 0.6 else None)
+            for i in range(size)
+            for j in range(size)
+        ]
+        boards.append(GameBoard(size=size, grid=grid))
+
+    expected = []
+    for board in boards:
+        for direction in Direction:
+            copied = board.copy(deep=True)
+            expected.append((copied.can_mash(direction), copied.mash(direction), copied))
+
+    loaded_tables(size)
+    computed = []
+    for board in boards:
+        for direction in Direction:
+            copied = board.copy(deep=True)
+            computed.append((copied.can_mash(direction), copied.mash(direction), copied))
+
+    assert computed == expected
+
+
+def test_game_board_falls_back_for_big_tiles(loaded_tables):
+    loaded_tables(3)
+    board = GameBoard(size=3, grid=[
+        Tile.make(0, 0, 65536), Tile.make(0, 1, 65536), Tile.make(0, 2, None),
+        Tile.make(1, 0, 32768), Tile.make(1, 1, 32768), Tile.make(1, 2, None),
+        Tile.make(2, 0, 2), Tile.make(2, 1, None), Tile.make(2, 2, 2),
+    ])
+    assert board.can_mash(Direction.WEST)
+    assert board.mash(Direction.WEST) == 131072 + 65536 + 4
+    assert [t.value for t in board.grid] == [131072, None, None, 65536, None, None, 4, None, None]
@@ -0,0 +1,27 @@
+from game.board import Direction, MoveFrame
+from game.tui import TuiBoard, TuiTile, tile_panel
+
+
+def test_tile_panels_are_cached():
+    assert tile_panel(2048, 10) is tile_panel(2048, 10)
+    assert tile_panel(2048, 10) is not tile_panel(2048, 12)
+    assert tile_panel(2, 10).renderable == "  2   "
+    assert tile_panel(131072, 8).renderable == "131072"
+
+
+def test_tui_board_repaints_only_changed_tiles(mocker):
+    tui_board = TuiBoard(4)
+    tui_board.tui_tiles = [TuiTile() for _ in tui_board.board.grid]
+    for (tui_tile, tile) in zip(tui_board.tui_tiles, tui_board.board.grid):
+        tui_tile.value = tile.value
+
+    refresh = mocker.patch("textual.widget.Widget.refresh", autospec=True)
+    frame = MoveFrame(moves=[])
+    tui_board.board.move(next(d for d in Direction if tui_board.board.can_mash(d)), frame)
+    tui_board.show(frame)
+    assert [t.value for t in tui_board.tui_tiles] == [t.value for t in tui_board.board.grid]
+
+    # Two tiles on a fresh board: at most both move away, two cells fill,
+    # and one new tile appears.
+    repainted = {id(c.args[0]) for c in refresh.call_args_list}
+    assert 0 < len(repainted) <= 5